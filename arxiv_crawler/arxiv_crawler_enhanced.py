@@ -3,16 +3,143 @@ import urllib.parse
 import re
 import os
 import time
+import queue
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 import xml.etree.ElementTree as ET
 import feedparser
 import json
 
-def search_arxiv(title_query="", abstract_query="", category="", max_results=50, database_manager=None, skip_existing=True):
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter
+    
+    Args:
+        rate (float): Tokens added per second
+        capacity (int): Maximum number of tokens that can accumulate (burst size)
+    """
+    
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, tokens=1):
+        """
+        Block until the requested number of tokens is available, then consume them
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                
+                wait = (tokens - self._tokens) / self.rate
+            
+            time.sleep(wait)
+
+# Global limiter for export.arxiv.org, shared by every search in this process
+ARXIV_API_LIMITER = TokenBucket(rate=1.0 / float(os.environ.get('ARXIV_QUERY_DELAY', 3.0)))
+
+def _put_unless_stopped(page_queue, item, stop_event):
+    """
+    Put an item on a bounded queue, giving up if the consumer has stopped
+    """
+    while not stop_event.is_set():
+        try:
+            page_queue.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _fetch_pages(session, request_urls, page_queue, stop_event, limits, rate_limiter):
+    """
+    Producer: fetch result pages in order and hand the raw responses to the consumer
+    
+    Each item put on the queue is (batch_number, start_index, content, error).
+    A final None marks the end of the page stream.
+    """
+    for batch_number, (start_index, url) in enumerate(request_urls, start=1):
+        # Stop once the consumer has enough papers or the feed has no more results
+        if stop_event.is_set() or start_index >= limits['total_results']:
+            break
+        
+        rate_limiter.acquire()
+        if stop_event.is_set():
+            break
+        
+        print(f"Searching batch {batch_number}: results {start_index} to {start_index + limits['batch_size']}")
+        
+        try:
+            response = session.get(url, timeout=60)
+            item = (batch_number, start_index, response.content, None)
+        except Exception as e:
+            _put_unless_stopped(page_queue, (batch_number, start_index, None, e), stop_event)
+            return
+        
+        if not _put_unless_stopped(page_queue, item, stop_event):
+            return
+    
+    _put_unless_stopped(page_queue, None, stop_event)
+
+def _parse_entry(entry):
+    """
+    Convert a feedparser entry into a paper information dictionary
+    """
+    paper_id = entry.id.split('/abs/')[-1]
+    
+    # Extract the PDF link
+    pdf_url = f"https://arxiv.org/pdf/{paper_id}.pdf"
+    
+    # Get categories
+    categories = [tag['term'] for tag in entry.tags] if 'tags' in entry else []
+    
+    # Extract DOI if available
+    doi = None
+    if hasattr(entry, 'arxiv_doi'):
+        doi = entry.arxiv_doi
+    elif hasattr(entry, 'doi'):
+        doi = entry.doi
+    # Try to find DOI in the summary
+    elif hasattr(entry, 'summary'):
+        doi_match = re.search(r'doi:\s*(10\.\d+/[^\s]+)', entry.summary, re.IGNORECASE)
+        if doi_match:
+            doi = doi_match.group(1)
+    
+    return {
+        'id': paper_id,
+        'title': entry.title,
+        'authors': [author.name for author in entry.authors],
+        'abstract': entry.summary,
+        'published': entry.published,
+        'updated': entry.updated,
+        'categories': categories,
+        'url': entry.link,
+        'pdf_url': pdf_url,
+        'doi': doi,
+        'already_exists': False  # 默认标记为不存在
+    }
+
+def search_arxiv(title_query="", abstract_query="", category="", max_results=50, database_manager=None,
+                 skip_existing=True, prefetch_pages=2, rate_limiter=None):
     """
     Search arXiv for papers matching the query and return a list of paper info
     
+    Result pages are fetched by a background thread, which prefetches up to
+    `prefetch_pages` pages while the current page is parsed and checked against
+    the database. All requests go through a shared token bucket, so the search
+    runs as fast as the export.arxiv.org rate limit allows.
+    
     Args:
         title_query (str): Query for title
         abstract_query (str): Query for abstract
@@ -20,6 +147,8 @@ def search_arxiv(title_query="", abstract_query="", category="", max_results=50,
         max_results (int): Maximum number of NEW papers to return
         database_manager: DatabaseManager instance for checking existing papers
         skip_existing (bool): Whether to skip papers that exist in the database
+        prefetch_pages (int): Number of pages fetched ahead of the consumer
+        rate_limiter (TokenBucket): Rate limiter for API requests, defaults to ARXIV_API_LIMITER
         
     Returns:
         list: List of paper information dictionaries
@@ -55,113 +184,151 @@ def search_arxiv(title_query="", abstract_query="", category="", max_results=50,
     # URL encode the query
     encoded_query = urllib.parse.quote(search_query)
     
-    # 存储所有论文信息
-    papers = []
-    new_papers_count = 0
-    
-    # 分页搜索，直到找到足够的新论文或达到最大搜索限制
+    # 构建所有分页请求URL
+    request_urls = []
     for attempt in range(max_search_attempts):
         start_index = attempt * batch_size
-        
         if start_index >= max_total_results:
-            print(f"Reached maximum search limit of {max_total_results} results")
             break
-            
-        # 构建API请求URL
         params = f"search_query={encoded_query}&start={start_index}&max_results={batch_size}&sortBy=submittedDate&sortOrder=descending"
-        
-        print(f"Searching batch {attempt+1}: results {start_index} to {start_index+batch_size}")
-        
-        try:
-            # 发送请求
-            response = requests.get(base_url + params)
-            
-            # 解析响应
-            feed = feedparser.parse(response.content)
+        request_urls.append((start_index, base_url + params))
+    
+    # 存储所有论文信息
+    papers = []
+    new_papers_count = 0
+    
+    # 启动后台线程预取分页结果
+    page_queue = queue.Queue(maxsize=max(1, prefetch_pages))
+    stop_event = threading.Event()
+    limits = {'total_results': max_total_results, 'batch_size': batch_size}
+    
+    session = requests.Session()
+    fetcher = threading.Thread(
+        target=_fetch_pages,
+        args=(session, request_urls, page_queue, stop_event, limits, rate_limiter or ARXIV_API_LIMITER),
+        daemon=True
+    )
+    fetcher.start()
+    
+    try:
+        while True:
+            item = page_queue.get()
+            if item is None:
+                if limits['total_results'] >= max_total_results:
+                    print(f"Reached maximum search limit of {max_total_results} results")
+                else:
+                    print("No more results found")
+                break
             
-            # 检查是否有结果
-            if not feed.entries:
-                print("No more results found")
+            batch_number, start_index, content, error = item
+            if error is not None:
+                print(f"Error searching arXiv: {str(error)}")
                 break
+            
+            try:
+                # 解析响应
+                feed = feedparser.parse(content)
                 
-            # 处理这一批结果
-            for entry in feed.entries:
-                paper_id = entry.id.split('/abs/')[-1]
-                
-                # Extract the PDF link
-                pdf_url = f"https://arxiv.org/pdf/{paper_id}.pdf"
-                
-                # Get categories
-                categories = [tag['term'] for tag in entry.tags] if 'tags' in entry else []
+                # 检查是否有结果
+                if not feed.entries:
+                    print("No more results found")
+                    break
                 
-                # Extract DOI if available
-                doi = None
-                if hasattr(entry, 'arxiv_doi'):
-                    doi = entry.arxiv_doi
-                elif hasattr(entry, 'doi'):
-                    doi = entry.doi
-                # Try to find DOI in the summary
-                elif hasattr(entry, 'summary'):
-                    doi_match = re.search(r'doi:\s*(10\.\d+/[^\s]+)', entry.summary, re.IGNORECASE)
-                    if doi_match:
-                        doi = doi_match.group(1)
+                # 根据返回的结果总数，避免请求不存在的分页
+                total_results = feed.feed.get('opensearch_totalresults')
+                if total_results:
+                    limits['total_results'] = min(max_total_results, int(total_results))
                 
-                paper_info = {
-                    'id': paper_id,
-                    'title': entry.title,
-                    'authors': [author.name for author in entry.authors],
-                    'abstract': entry.summary,
-                    'published': entry.published,
-                    'updated': entry.updated,
-                    'categories': categories,
-                    'url': entry.link,
-                    'pdf_url': pdf_url,
-                    'doi': doi,
-                    'already_exists': False  # 默认标记为不存在
-                }
+                # 处理这一批结果
+                page_papers = [_parse_entry(entry) for entry in feed.entries]
                 
-                # 检查是否已存在于数据库中
+                # 整页一次性查重，每页只需一次数据库查询
                 if skip_existing and database_manager:
-                    if check_if_paper_exists(paper_info, database_manager):
+                    existing_flags = check_papers_exist(page_papers, database_manager)
+                else:
+                    existing_flags = [False] * len(page_papers)
+                
+                for paper_info, exists in zip(page_papers, existing_flags):
+                    paper_id = paper_info['id']
+                    
+                    if exists:
                         paper_info['already_exists'] = True
                         print(f"Paper already exists in database: {paper_id}")
                     else:
                         new_papers_count += 1
-                        print(f"New paper found: {paper_id}")
-                else:
-                    new_papers_count += 1
+                        if skip_existing and database_manager:
+                            print(f"New paper found: {paper_id}")
+                    
+                    papers.append(paper_info)
                 
-                papers.append(paper_info)
-            
-            # 如果已经找到足够的新论文，可以提前停止
-            if new_papers_count >= max_results:
-                print(f"Found {new_papers_count} new papers, stopping search")
-                break
+                # 如果已经找到足够的新论文，可以提前停止
+                if new_papers_count >= max_results:
+                    print(f"Found {new_papers_count} new papers, stopping search")
+                    break
                 
-            # 防止过快请求
-            time.sleep(3)
-            
-        except Exception as e:
-            print(f"Error searching arXiv: {str(e)}")
-            break
+            except Exception as e:
+                print(f"Error searching arXiv: {str(e)}")
+                break
+    finally:
+        # 通知预取线程停止并释放连接
+        stop_event.set()
+        fetcher.join(timeout=5)
+        session.close()
     
     print(f"Search completed. Found {len(papers)} total papers, {new_papers_count} are new.")
     return papers
 
-def download_pdf(paper_info, output_dir, progress_callback=None):
+def _pdf_filepath(paper_info, output_dir):
     """
-    Download PDF and save to the specified directory
+    Build the local PDF path for a paper from its title and arXiv ID
     """
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    
     # Create a valid filename from the title
     filename = re.sub(r'[^\w\s-]', '', paper_info['title'])
     filename = re.sub(r'[-\s]+', '_', filename)
     
     # Append paper ID to ensure uniqueness
     filename = f"{filename}_{paper_info['id']}.pdf"
-    filepath = os.path.join(output_dir, filename)
+    return os.path.join(output_dir, filename)
+
+def _content_range_total(content_range):
+    """
+    Parse the complete length from a Content-Range header such as "bytes */12345"
+    
+    Args:
+        content_range (str): Content-Range header value, may be None
+        
+    Returns:
+        int: Complete length of the document, or None if it is missing or unknown
+    """
+    match = re.match(r'\s*bytes\s+(?:\*|\d+-\d+)/(\d+)\s*$', content_range or '')
+    return int(match.group(1)) if match else None
+
+def download_pdf(paper_info, output_dir, progress_callback=None, session=None, rate_limiter=None):
+    """
+    Download PDF and save to the specified directory
+    
+    Data is written to a ".part" file that is renamed into place only after the
+    download completes, so an interrupted download never leaves a truncated PDF.
+    If a ".part" file from an earlier attempt exists, the download resumes from
+    its current size with an HTTP Range request. A 416 response only completes
+    the download when its Content-Range length equals the partial file's size;
+    otherwise the partial file is discarded and the download starts over.
+    
+    Args:
+        paper_info (dict): Paper information, must contain 'id', 'title' and 'pdf_url'
+        output_dir (str): Directory to save the PDF in
+        progress_callback (callable): Called as callback(event_type, paper_info, data)
+        session (requests.Session): Session to reuse pooled connections, defaults to requests
+        rate_limiter (TokenBucket): Rate limiter acquired before the request is sent
+        
+    Returns:
+        str: Path of the downloaded file, or None if the download failed
+    """
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+    
+    filepath = _pdf_filepath(paper_info, output_dir)
+    partial_path = filepath + ".part"
     
     # Check if already downloaded
     if os.path.exists(filepath):
@@ -175,24 +342,63 @@ def download_pdf(paper_info, output_dir, progress_callback=None):
         if progress_callback:
             progress_callback('downloading', paper_info, None)
         
-        response = requests.get(paper_info['pdf_url'], stream=True)
+        http = session or requests
         
-        # Get content length if available
-        total_size = int(response.headers.get('content-length', 0))
+        while True:
+            # Resume a previous partial download if there is one
+            resume_from = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+            headers = {'Range': f'bytes={resume_from}-'} if resume_from else {}
+            
+            if rate_limiter:
+                rate_limiter.acquire()
+            
+            response = http.get(paper_info['pdf_url'], stream=True, headers=headers, timeout=60)
+            
+            if not (resume_from and response.status_code == 416):
+                break
+            
+            response.close()
+            if _content_range_total(response.headers.get('content-range')) == resume_from:
+                # The partial file already holds the whole document
+                os.replace(partial_path, filepath)
+                if progress_callback:
+                    progress_callback('download_complete', paper_info, filepath)
+                return filepath
+            
+            # The partial file does not match the document on the server, start over
+            print(f"Discarding partial download of {paper_info['id']} ({resume_from} bytes)")
+            os.remove(partial_path)
         
-        with open(filepath, 'wb') as f:
-            if total_size > 0 and progress_callback:
-                downloaded = 0
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        progress = min(100, int(downloaded * 100 / total_size))
-                        progress_callback('downloading_progress', paper_info, progress)
+        with response:
+            response.raise_for_status()
+            
+            if response.status_code == 206:
+                print(f"Resuming download of {paper_info['id']} from byte {resume_from}")
+                mode = 'ab'
             else:
-                for chunk in response.iter_content(chunk_size=8192):
+                # The server ignored the Range header, start over
+                resume_from = 0
+                mode = 'wb'
+            
+            # Get content length if available
+            content_length = int(response.headers.get('content-length', 0))
+            total_size = resume_from + content_length if content_length else 0
+            
+            downloaded = resume_from
+            with open(partial_path, mode) as f:
+                for chunk in response.iter_content(chunk_size=65536):
                     if chunk:
                         f.write(chunk)
+                        downloaded += len(chunk)
+                        if total_size > 0 and progress_callback:
+                            progress = min(100, int(downloaded * 100 / total_size))
+                            progress_callback('downloading_progress', paper_info, progress)
+            
+            if total_size and downloaded < total_size:
+                raise IOError(f"Incomplete download: {downloaded} of {total_size} bytes")
+        
+        # Atomically move the finished file into place
+        os.replace(partial_path, filepath)
         
         if progress_callback:
             progress_callback('download_complete', paper_info, filepath)
@@ -204,6 +410,106 @@ def download_pdf(paper_info, output_dir, progress_callback=None):
         print(f"Error downloading {paper_info['id']}: {str(e)}")
         return None
 
+class PDFDownloadManager:
+    """
+    Download PDFs with a pool of worker threads sharing pooled HTTP connections
+    
+    Requests to each host are throttled by a per-host token bucket, so adding
+    workers overlaps transfers without exceeding the configured request rate.
+    
+    Args:
+        output_dir (str): Directory to save PDFs in
+        workers (int): Number of concurrent download workers
+        requests_per_second (float): Maximum request rate per host
+        progress_callback (callable): Same callback as download_pdf; calls are serialized
+    """
+    
+    def __init__(self, output_dir, workers=4, requests_per_second=1.0, progress_callback=None):
+        self.output_dir = output_dir
+        self.workers = max(1, workers)
+        self.requests_per_second = requests_per_second
+        self.progress_callback = progress_callback
+        
+        # Pooled session shared by all workers
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        self._limiters = {}
+        self._lock = threading.Lock()
+        self._callback_lock = threading.Lock()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        self.session.close()
+    
+    def _limiter_for(self, url):
+        """
+        Get the token bucket for the host of a URL
+        """
+        host = urllib.parse.urlparse(url).netloc
+        with self._lock:
+            if host not in self._limiters:
+                self._limiters[host] = TokenBucket(rate=self.requests_per_second)
+            return self._limiters[host]
+    
+    def _callback(self, event_type, paper_info, data):
+        if self.progress_callback:
+            with self._callback_lock:
+                self.progress_callback(event_type, paper_info, data)
+    
+    def download(self, paper_info):
+        """
+        Download a single PDF through the shared session and rate limiter
+        
+        Returns:
+            str: Path of the downloaded file, or None if the download failed
+        """
+        return download_pdf(
+            paper_info,
+            self.output_dir,
+            self._callback,
+            session=self.session,
+            rate_limiter=self._limiter_for(paper_info['pdf_url'])
+        )
+    
+    def download_all(self, papers, on_result=None):
+        """
+        Download all papers concurrently
+        
+        Args:
+            papers (list): Paper information dictionaries
+            on_result (callable): Called as on_result(paper_info, filepath) in the
+                calling thread as each download finishes
+            
+        Returns:
+            list: File paths (or None for failures) in the same order as papers
+        """
+        results = [None] * len(papers)
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self.download, paper): i for i, paper in enumerate(papers)}
+            
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    filepath = future.result()
+                except Exception as e:
+                    print(f"Error processing paper {papers[index]['id']}: {str(e)}")
+                    filepath = None
+                
+                results[index] = filepath
+                if on_result:
+                    on_result(papers[index], filepath)
+        
+        return results
+
 def save_metadata(papers, output_dir, filename="papers_metadata"):
     """
     Save paper metadata to a CSV file
@@ -263,6 +569,30 @@ def check_if_paper_exists(paper_info, database_manager=None):
     
     return False
 
+def check_papers_exist(papers, database_manager=None):
+    """
+    Check a whole page of papers against the database with a single bulk query
+    
+    Args:
+        papers (list): Paper information dictionaries
+        database_manager: DatabaseManager instance for database checks
+    
+    Returns:
+        list: One bool per paper, True if the paper exists (matched by DOI or arXiv ID)
+    """
+    if database_manager is None or not papers:
+        return [False] * len(papers)
+    
+    existing_ids, existing_dois = database_manager.find_existing_papers(
+        arxiv_ids=[p.get('id') for p in papers],
+        dois=[p.get('doi') for p in papers]
+    )
+    
+    return [
+        bool((p.get('doi') and str(p['doi']) in existing_dois) or (p.get('id') and p['id'] in existing_ids))
+        for p in papers
+    ]
+
 def save_progress(output_dir, total, processed, skipped, completed, current_paper=None, status="in_progress"):
     """
     Save crawler progress information to a JSON file
@@ -289,8 +619,12 @@ def save_progress(output_dir, total, processed, skipped, completed, current_pape
         "current_paper": current_paper
     }
     
-    with open(progress_file, 'w', encoding='utf-8') as f:
+    # Write to a per-thread temp file and rename, so concurrent download workers
+    # never leave a half-written progress file for the web UI to read
+    temp_file = f"{progress_file}.{threading.get_ident()}.tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
         json.dump(progress_data, f, ensure_ascii=False, indent=2)
+    os.replace(temp_file, progress_file)
     
     return progress_file
 
@@ -305,6 +639,8 @@ def main():
     parser.add_argument('--metadata-only', action='store_true', help='Save metadata without downloading PDFs')
     parser.add_argument('--skip-existing', action='store_true', help='Skip papers that exist in the database')
     parser.add_argument('--database-check', action='store_true', help='Check if papers exist in database before downloading')
+    parser.add_argument('--workers', type=int, default=4, help='Number of concurrent PDF downloads')
+    parser.add_argument('--download-rate', type=float, default=1.0, help='Maximum PDF download requests per second per host')
     args = parser.parse_args()
     
     # Ensure at least one search criterion is provided
@@ -414,16 +750,14 @@ def main():
         )
         return
     
-    print("Starting download...")
+    print(f"Starting download with {args.workers} workers...")
     
-    # Define progress callback for UI updates
+    # Define progress callback for UI updates (called from download workers, serialized by the manager)
     def progress_callback(event_type, paper, data):
-        nonlocal processed_papers, skipped_papers_count, completed_papers
+        nonlocal skipped_papers_count
         
         if event_type == 'skipped_existing':
             skipped_papers_count += 1
-        elif event_type == 'download_complete':
-            completed_papers += 1
         
         # Update progress file on significant events
         if event_type in ['skipped_existing', 'download_complete', 'download_error']:
@@ -437,37 +771,35 @@ def main():
                 "in_progress"
             )
     
-    for i, paper in enumerate(papers_to_process):
+    # Called in this thread as each download finishes
+    def on_result(paper, filepath):
+        nonlocal processed_papers, completed_papers
         processed_papers += 1
         
-        try:
-            print(f"Processing paper {i+1}/{len(papers_to_process)}: {paper['id']}")
-            print(f"Title: {paper['title']}")
-            print(f"Authors: {', '.join(paper['authors'])}")
-            print(f"Categories: {', '.join(paper['categories'])}")
-            
-            filepath = download_pdf(paper, args.output, progress_callback)
-            
-            if filepath:
-                print(f"Saved to: {filepath}")
-                completed_papers += 1
-            
-            # Update progress after each paper
-            save_progress(
-                args.output,
-                total_papers,
-                processed_papers,
-                skipped_papers_count, 
-                completed_papers,
-                paper,
-                "in_progress"
-            )
-            
-            # Add a small delay to avoid overwhelming the server
-            time.sleep(1)
-            
-        except Exception as e:
-            print(f"Error processing paper {paper['id']}: {str(e)}")
+        print(f"Finished paper {processed_papers}/{total_papers}: {paper['id']}")
+        print(f"Title: {paper['title']}")
+        if filepath:
+            print(f"Saved to: {filepath}")
+            completed_papers += 1
+        
+        # Update progress after each paper
+        save_progress(
+            args.output,
+            total_papers,
+            processed_papers,
+            skipped_papers_count, 
+            completed_papers,
+            paper,
+            "in_progress"
+        )
+    
+    with PDFDownloadManager(
+        args.output,
+        workers=args.workers,
+        requests_per_second=args.download_rate,
+        progress_callback=progress_callback
+    ) as manager:
+        manager.download_all(papers_to_process, on_result)
     
     # Final progress update
     save_progress(
@@ -0,0 +1,178 @@
+"""
+PDF文本提取后端基准测试
+
+在固定语料上比较各后端的提取速度和文本质量：
+- 速度：每秒页数、每秒MB（单进程、不使用文本缓存，取多次运行的最小耗时）
+- 质量：提取文本与参考文本按单词（多重集）计算的F1。语料中的PDF有同名.txt参考文本时
+  （如corpus.py生成的合成语料）与参考文本比较，否则与PyPDF2的结果比较
+
+用法:
+    python benchmarks/bench_pdf_backends.py                      # 使用合成语料（不存在时自动生成）
+    python benchmarks/bench_pdf_backends.py --corpus papers/ --repeat 5 --output results.json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+from collections import Counter
+
+# 添加父目录到路径，以便导入其他模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_processor.pdf_backends import BACKENDS, available_backends
+from pdf_processor.pdf_extractor import extract_text_from_pdf
+from benchmarks.corpus import generate_corpus
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+_WORD_RE = re.compile(r"\S+")
+
+
+def word_f1(text, reference):
+    """
+    按单词多重集计算提取文本相对参考文本的F1
+
+    参数:
+        text (str): 提取的文本
+        reference (str): 参考文本
+
+    返回:
+        float: 0到1之间的F1，两者都为空时为1
+    """
+    words = Counter(_WORD_RE.findall(text))
+    expected = Counter(_WORD_RE.findall(reference))
+    if not words and not expected:
+        return 1.0
+
+    common = sum((words & expected).values())
+    if common == 0:
+        return 0.0
+    precision = common / sum(words.values())
+    recall = common / sum(expected.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def _page_count(pdf_path):
+    with BACKENDS["pypdf2"].open(pdf_path) as (num_pages, _):
+        return num_pages
+
+
+def benchmark_backend(name, pdf_paths, references, repeat=3):
+    """
+    测试一个后端
+
+    参数:
+        name (str): 后端名称
+        pdf_paths (list): PDF文件路径
+        references (dict): PDF路径到参考文本的映射
+        repeat (int): 每个文件的运行次数
+
+    返回:
+        dict: 总耗时、页数、字节数、吞吐量和平均F1
+    """
+    total_seconds = 0.0
+    scores = []
+
+    for pdf_path in pdf_paths:
+        best = None
+        text = ""
+        for _ in range(repeat):
+            start = time.perf_counter()
+            text = extract_text_from_pdf(pdf_path, use_cache=False, processes=1, backend=name)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        total_seconds += best
+        scores.append(word_f1(text, references[pdf_path]))
+
+    pages = sum(_page_count(path) for path in pdf_paths)
+    size = sum(os.path.getsize(path) for path in pdf_paths)
+    return {
+        "backend": name,
+        "documents": len(pdf_paths),
+        "pages": pages,
+        "seconds": round(total_seconds, 4),
+        "pages_per_second": round(pages / total_seconds, 1) if total_seconds else None,
+        "mb_per_second": round(size / 1024 / 1024 / total_seconds, 2) if total_seconds else None,
+        "mean_f1": round(sum(scores) / len(scores), 4) if scores else None,
+        "min_f1": round(min(scores), 4) if scores else None,
+    }
+
+
+def load_references(pdf_paths):
+    """
+    读取参考文本：优先使用同名.txt文件，否则使用PyPDF2的提取结果
+
+    返回:
+        tuple: (PDF路径到参考文本的映射, 参考文本来源说明)
+    """
+    references = {}
+    sources = set()
+    for pdf_path in pdf_paths:
+        txt_path = os.path.splitext(pdf_path)[0] + ".txt"
+        if os.path.exists(txt_path):
+            with open(txt_path, encoding="utf-8") as f:
+                references[pdf_path] = f.read()
+            sources.add("参考文本")
+        else:
+            references[pdf_path] = extract_text_from_pdf(pdf_path, use_cache=False, processes=1, backend="pypdf2")
+            sources.add("PyPDF2")
+    return references, "、".join(sorted(sources))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PDF文本提取后端基准测试')
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='PDF语料目录（默认使用合成语料）')
+    parser.add_argument('--backends', nargs='*', choices=sorted(BACKENDS), help='要测试的后端，默认测试已安装的全部后端')
+    parser.add_argument('--repeat', type=int, default=3, help='每个文件的运行次数（取最小耗时）')
+    parser.add_argument('--documents', type=int, default=20, help='生成合成语料时的论文数')
+    parser.add_argument('--pages', type=int, default=12, help='生成合成语料时每篇论文的页数')
+    parser.add_argument('--output', help='将结果保存为JSON文件')
+    args = parser.parse_args()
+
+    # 逐文件的提取日志会淹没结果表格
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if args.corpus == DEFAULT_CORPUS and not os.path.isdir(args.corpus):
+        generate_corpus(args.corpus, args.documents, args.pages)
+    if not os.path.isdir(args.corpus):
+        print(f"语料目录不存在: {args.corpus}")
+        return 1
+
+    pdf_paths = sorted(
+        os.path.join(args.corpus, name) for name in os.listdir(args.corpus) if name.lower().endswith('.pdf')
+    )
+    if not pdf_paths:
+        print(f"语料目录中没有PDF文件: {args.corpus}")
+        return 1
+
+    installed = available_backends()
+    backends = [name for name in (args.backends or installed) if name in installed]
+    skipped = sorted(set(args.backends or []) - set(installed))
+    if skipped:
+        print(f"未安装，跳过: {', '.join(skipped)}")
+
+    references, source = load_references(pdf_paths)
+    print(f"语料: {args.corpus}（{len(pdf_paths)} 个PDF，质量比较对象: {source}）\n")
+
+    results = [benchmark_backend(name, pdf_paths, references, args.repeat) for name in backends]
+
+    print(f"{'后端':<12}{'页数':>8}{'耗时(秒)':>12}{'页/秒':>10}{'MB/秒':>10}{'平均F1':>10}{'最低F1':>10}")
+    for result in results:
+        print(f"{result['backend']:<12}{result['pages']:>8}{result['seconds']:>12.3f}"
+              f"{result['pages_per_second'] or 0:>10.1f}{result['mb_per_second'] or 0:>10.2f}"
+              f"{result['mean_f1']:>10.4f}{result['min_f1']:>10.4f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"corpus": args.corpus, "reference": source, "results": results}, f,
+                      ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
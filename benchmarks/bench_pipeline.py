@@ -0,0 +1,387 @@
+"""
+参数提取流水线各阶段的基准测试
+
+在合成论文语料上逐篇执行流水线，分别统计每个阶段的延迟（p50/p90/p99）、吞吐量和内存峰值：
+- extract_text_from_pdf: PDF文本提取（单进程、不使用文本缓存）
+- extract_sections: 章节识别
+- _split_text: 按token预算分块
+- build_full_prompt: 为每个文本块构建提示
+- llm_request: 向模拟LLM服务发送请求（本地HTTP，只反映客户端和网络开销）
+- parse_csv_response: 解析CSV响应
+- _deduplicate_parameters: 合并各块的重复参数
+- add_parameters: 写入临时SQLite数据库
+
+每个阶段的一次操作是处理一篇论文。延迟来自--repeat轮计时，内存峰值来自单独一轮开启tracemalloc的运行
+（tracemalloc只统计Python分配的内存，不包括PyMuPDF、pdfium等C库内部的内存，且会拖慢运行，所以不与计时同时进行）。
+
+结果可以保存为基线，之后的运行与基线比较p50延迟和内存峰值，超过阈值的阶段标记为退化。
+基线只在同一台机器、相同参数下可比
+
+用法:
+    python benchmarks/bench_pipeline.py                          # 与benchmarks/baseline.json比较（存在时）
+    python benchmarks/bench_pipeline.py --save-baseline          # 保存为新的基线
+    python benchmarks/bench_pipeline.py --documents 5 --pages 40 --output results.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import platform
+import argparse
+import datetime
+import tempfile
+import tracemalloc
+from collections import defaultdict
+
+# 添加父目录到路径，以便导入其他模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_processor.pdf_backends import get_backend
+from pdf_processor.pdf_extractor import extract_text_from_pdf, extract_sections
+from pdf_processor.prompt_engineering import build_full_prompt
+from pdf_processor.llm_processor import LLMProcessor, SYSTEM_MESSAGE
+from database.db_utils import DatabaseManager
+from benchmarks.corpus import generate_corpus
+from benchmarks.mock_llm import MockLLMServer
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+STAGES = [
+    "extract_text_from_pdf",
+    "extract_sections",
+    "_split_text",
+    "build_full_prompt",
+    "llm_request",
+    "parse_csv_response",
+    "_deduplicate_parameters",
+    "add_parameters",
+]
+
+# 与基线比较时参与比较的配置项
+_CONFIG_KEYS = ("documents", "pages", "seed", "chunk_tokens", "backend")
+
+
+def percentile(values, q):
+    """
+    计算百分位数（线性插值）
+
+    参数:
+        values (list): 样本
+        q (float): 百分位（0到100）
+
+    返回:
+        float: 百分位数，样本为空时为None
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class StageRecorder:
+    """
+    记录各阶段的耗时或内存峰值
+
+    trace_memory为False时记录每次调用的耗时（秒），为True时记录每次调用的内存峰值（字节，
+    相对调用前已分配的内存）
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.samples = defaultdict(list)
+
+    def measure(self, stage, func, *args, **kwargs):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            result = func(*args, **kwargs)
+            self.samples[stage].append(tracemalloc.get_traced_memory()[1] - before)
+            return result
+
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.samples[stage].append(time.perf_counter() - start)
+        return result
+
+
+def _request_completion(processor, prompt):
+    messages = [
+        {"role": "system", "content": SYSTEM_MESSAGE},
+        {"role": "user", "content": prompt}
+    ]
+    response = processor.create_chat_completion(messages, stream=False)
+    return response.choices[0].message.content
+
+
+def run_document(recorder, pdf_path, paper_id, processor, db_manager, chunk_tokens, backend):
+    """
+    对一篇论文执行完整的流水线，各阶段的耗时或内存记录到recorder
+
+    返回:
+        int: 写入数据库的参数数
+    """
+    paper_info = {"title": os.path.basename(pdf_path), "authors": ["Benchmark"], "categories": ["physics.plasm-ph"]}
+
+    text = recorder.measure(
+        "extract_text_from_pdf", extract_text_from_pdf, pdf_path, use_cache=False, processes=1, backend=backend
+    )
+    recorder.measure("extract_sections", extract_sections, text)
+    chunks = recorder.measure("_split_text", processor._split_text, text, chunk_tokens)
+    prompts = recorder.measure(
+        "build_full_prompt",
+        lambda: [build_full_prompt(chunk, paper_info, max_text_tokens=chunk_tokens) for chunk in chunks]
+    )
+    responses = recorder.measure(
+        "llm_request", lambda: [_request_completion(processor, prompt) for prompt in prompts]
+    )
+    parameters = recorder.measure(
+        "parse_csv_response",
+        lambda: [parameter for response in responses for parameter in processor.parse_csv_response(response)]
+    )
+    unique = recorder.measure("_deduplicate_parameters", processor._deduplicate_parameters, parameters)
+
+    # 每轮写入前清空该论文的参数，数据库的大小不随轮数增长
+    db_manager.delete_parameters(paper_id=paper_id)
+    return recorder.measure("add_parameters", db_manager.add_parameters, paper_id, unique)
+
+
+def summarize(timings, peaks):
+    """
+    汇总各阶段的延迟、吞吐量和内存峰值
+
+    参数:
+        timings (dict): 阶段名称到耗时样本（秒）的映射
+        peaks (dict): 阶段名称到内存峰值样本（字节）的映射
+
+    返回:
+        dict: 阶段名称到统计结果的映射，另含整条流水线（pipeline）的每篇耗时
+    """
+    stages = {}
+    for stage in STAGES:
+        samples = timings.get(stage, [])
+        if not samples:
+            continue
+        total = sum(samples)
+        stages[stage] = {
+            "count": len(samples),
+            "p50_ms": round(percentile(samples, 50) * 1000, 3),
+            "p90_ms": round(percentile(samples, 90) * 1000, 3),
+            "p99_ms": round(percentile(samples, 99) * 1000, 3),
+            "mean_ms": round(total / len(samples) * 1000, 3),
+            "ops_per_second": round(len(samples) / total, 2) if total else None,
+            "peak_memory_kb": round(max(peaks[stage]) / 1024, 1) if peaks.get(stage) else None,
+        }
+
+    # 每篇论文各阶段耗时之和
+    per_document = [sum(values) for values in zip(*(timings[stage] for stage in stages))]
+    if per_document:
+        stages["pipeline"] = {
+            "count": len(per_document),
+            "p50_ms": round(percentile(per_document, 50) * 1000, 3),
+            "p90_ms": round(percentile(per_document, 90) * 1000, 3),
+            "p99_ms": round(percentile(per_document, 99) * 1000, 3),
+            "mean_ms": round(sum(per_document) / len(per_document) * 1000, 3),
+            "ops_per_second": round(len(per_document) / sum(per_document), 2),
+            "peak_memory_kb": None,
+        }
+    return stages
+
+
+def compare_with_baseline(stages, baseline, threshold):
+    """
+    与基线比较p50延迟和内存峰值
+
+    参数:
+        stages (dict): summarize的结果
+        baseline (dict): 基线结果（save_results保存的JSON）
+        threshold (float): 允许的相对增长（如0.2表示20%）
+
+    返回:
+        dict: 阶段名称到比较结果的映射，包含p50和内存的变化比例以及是否退化
+    """
+    comparison = {}
+    for stage, result in stages.items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base:
+            continue
+
+        entry = {"p50_change": None, "memory_change": None, "regressed": False}
+        if base.get("p50_ms"):
+            entry["p50_change"] = result["p50_ms"] / base["p50_ms"] - 1
+        if base.get("peak_memory_kb") and result.get("peak_memory_kb") is not None:
+            entry["memory_change"] = result["peak_memory_kb"] / base["peak_memory_kb"] - 1
+        entry["regressed"] = any(
+            change is not None and change > threshold for change in (entry["p50_change"], entry["memory_change"])
+        )
+        comparison[stage] = entry
+    return comparison
+
+
+def _format_change(change):
+    return f"{change * 100:+.1f}%" if change is not None else "-"
+
+
+def print_report(stages, comparison=None):
+    print(f"{'阶段':<26}{'次数':>6}{'p50(ms)':>11}{'p90(ms)':>11}{'p99(ms)':>11}{'篇/秒':>10}{'内存峰值(KB)':>14}", end="")
+    print(f"{'p50变化':>10}{'内存变化':>10}" if comparison is not None else "")
+
+    for stage, result in stages.items():
+        peak = f"{result['peak_memory_kb']:.1f}" if result["peak_memory_kb"] is not None else "-"
+        line = (f"{stage:<26}{result['count']:>6}{result['p50_ms']:>11.3f}{result['p90_ms']:>11.3f}"
+                f"{result['p99_ms']:>11.3f}{result['ops_per_second'] or 0:>10.2f}{peak:>14}")
+        if comparison is not None:
+            entry = comparison.get(stage)
+            if entry:
+                line += f"{_format_change(entry['p50_change']):>10}{_format_change(entry['memory_change']):>10}"
+                if entry["regressed"]:
+                    line += "  退化"
+        print(line)
+
+
+def save_results(path, config, stages):
+    data = {
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "stages": stages,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def run_benchmark(pdf_paths, repeat=3, chunk_tokens=2000, backend=None, latency=0.0, trace_memory=True):
+    """
+    在给定的PDF上运行流水线基准测试
+
+    参数:
+        pdf_paths (list): PDF文件路径
+        repeat (int): 计时轮数
+        chunk_tokens (int): 每个文本块的token预算
+        backend (str, optional): PDF后端名称
+        latency (float): 模拟LLM服务每个请求的延迟（秒）
+        trace_memory (bool): 是否额外运行一轮统计内存峰值
+
+    返回:
+        dict: summarize的结果
+    """
+    work_dir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    try:
+        db_manager = DatabaseManager(f"sqlite:///{os.path.join(work_dir, 'bench.db')}")
+        paper_ids = [
+            db_manager.add_paper({"id": f"bench-{index:04d}", "title": os.path.basename(path)}).id
+            for index, path in enumerate(pdf_paths)
+        ]
+
+        with MockLLMServer(latency=latency) as server:
+            processor = LLMProcessor(api_key="sk-bench", base_url=server.base_url, use_cache=False)
+
+            # 预热：导入延迟加载的模块、建立HTTP连接
+            run_document(StageRecorder(), pdf_paths[0], paper_ids[0], processor, db_manager, chunk_tokens, backend)
+
+            timings = StageRecorder()
+            for _ in range(repeat):
+                for pdf_path, paper_id in zip(pdf_paths, paper_ids):
+                    run_document(timings, pdf_path, paper_id, processor, db_manager, chunk_tokens, backend)
+
+            peaks = StageRecorder(trace_memory=True)
+            if trace_memory:
+                tracemalloc.start()
+                try:
+                    for pdf_path, paper_id in zip(pdf_paths, paper_ids):
+                        run_document(peaks, pdf_path, paper_id, processor, db_manager, chunk_tokens, backend)
+                finally:
+                    tracemalloc.stop()
+
+        db_manager.engine.dispose()
+        return summarize(timings.samples, peaks.samples)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='参数提取流水线各阶段的基准测试')
+    parser.add_argument('--corpus', help='PDF语料目录，默认在临时目录中生成合成语料')
+    parser.add_argument('--documents', type=int, default=10, help='合成语料的论文数')
+    parser.add_argument('--pages', type=int, default=12, help='合成语料中每篇论文的页数')
+    parser.add_argument('--seed', type=int, default=42, help='合成语料的随机种子')
+    parser.add_argument('--repeat', type=int, default=3, help='计时轮数')
+    parser.add_argument('--chunk-tokens', type=int, default=2000, help='每个文本块的token预算')
+    parser.add_argument('--backend', help='PDF后端（默认auto）')
+    parser.add_argument('--latency', type=float, default=0.0, help='模拟LLM服务每个请求的延迟（秒）')
+    parser.add_argument('--no-memory', action='store_true', help='不统计内存峰值')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基线结果文件')
+    parser.add_argument('--save-baseline', action='store_true', help='将本次结果保存为基线')
+    parser.add_argument('--threshold', type=float, default=0.2, help='判定退化的相对增长（默认0.2即20%%）')
+    parser.add_argument('--fail-on-regression', action='store_true', help='有阶段退化时以状态码1退出')
+    parser.add_argument('--output', help='将结果保存为JSON文件')
+    args = parser.parse_args()
+
+    # 逐篇的提取和解析日志会淹没结果表格
+    logging.getLogger().setLevel(logging.WARNING)
+
+    backend = get_backend(args.backend).name
+    config = {
+        "documents": args.documents, "pages": args.pages, "seed": args.seed, "repeat": args.repeat,
+        "chunk_tokens": args.chunk_tokens, "backend": backend, "latency": args.latency,
+        "corpus": args.corpus or "synthetic",
+    }
+
+    corpus_dir = None
+    try:
+        if args.corpus:
+            pdf_paths = sorted(
+                os.path.join(args.corpus, name) for name in os.listdir(args.corpus) if name.lower().endswith('.pdf')
+            )
+            config["documents"] = len(pdf_paths)
+            config["pages"] = None
+        else:
+            corpus_dir = tempfile.mkdtemp(prefix="bench_corpus_")
+            pdf_paths = generate_corpus(corpus_dir, args.documents, args.pages, args.seed)
+        if not pdf_paths:
+            print(f"语料目录中没有PDF文件: {args.corpus}")
+            return 1
+
+        print(f"语料: {config['corpus']}（{len(pdf_paths)} 篇），PDF后端: {backend}，"
+              f"分块预算: {args.chunk_tokens} tokens，计时 {args.repeat} 轮\n")
+        stages = run_benchmark(pdf_paths, args.repeat, args.chunk_tokens, backend, args.latency,
+                               trace_memory=not args.no_memory)
+    finally:
+        if corpus_dir:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    comparison = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        mismatched = [key for key in _CONFIG_KEYS if baseline.get("config", {}).get(key) != config[key]]
+        if mismatched:
+            print(f"注意: 基线的配置不同（{', '.join(mismatched)}），比较结果仅供参考")
+        comparison = compare_with_baseline(stages, baseline, args.threshold)
+        print(f"基线: {args.baseline}（{baseline.get('created_at', '未知时间')}）\n")
+
+    print_report(stages, comparison)
+
+    if args.output:
+        save_results(args.output, config, stages)
+        print(f"\n结果已保存到: {args.output}")
+    if args.save_baseline:
+        save_results(args.baseline, config, stages)
+        print(f"\n基线已保存到: {args.baseline}")
+
+    regressed = [stage for stage, entry in (comparison or {}).items() if entry["regressed"]]
+    if regressed:
+        print(f"\n退化超过 {args.threshold * 100:.0f}% 的阶段: {', '.join(regressed)}")
+        if args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
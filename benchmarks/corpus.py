@@ -0,0 +1,198 @@
+"""
+基准测试用的合成论文语料
+
+生成只包含文本的PDF（不依赖第三方库），每个PDF旁边保存同名的.txt文件作为文本提取的参考答案。
+论文按常见结构包含摘要、引言、方法、实验装置、结果和结论章节，正文中混有带单位的参数、公式和表格行，
+与真实的激光物理论文大致相当
+
+用法:
+    python benchmarks/corpus.py --output benchmarks/corpus --documents 20 --pages 12
+"""
+
+import os
+import random
+import argparse
+
+# 每页的行数与行距（A4/Letter页面，10pt字体）
+LINES_PER_PAGE = 60
+LINE_HEIGHT = 12
+
+SECTIONS = ["Abstract", "1. Introduction", "2. Methods", "3. Experimental Setup", "4. Results", "5. Conclusion"]
+
+PARAMETERS = [
+    ("laser wavelength", ["800 nm", "1030 nm", "1.064 um", "400 nm"]),
+    ("pulse duration", ["30 fs", "25 fs", "1.2 ps", "500 fs"]),
+    ("pulse energy", ["2.5 J", "150 mJ", "40 mJ", "3 mJ"]),
+    ("peak intensity", ["1e19 W/cm2", "5e18 W/cm2", "2.1e20 W/cm2"]),
+    ("plasma density", ["1e18 cm-3", "3.5e18 cm-3", "8e17 cm-3"]),
+    ("focal spot size", ["12 um", "20 um", "6.5 um"]),
+    ("repetition rate", ["10 Hz", "1 kHz", "0.1 Hz"]),
+    ("electron energy", ["250 MeV", "1.2 GeV", "80 MeV"]),
+    ("energy spread", ["5 %", "2.3 %", "12 %"]),
+    ("normalized vector potential a0", ["1.5", "2.8", "4.0"]),
+]
+
+FILLER = (
+    "laser plasma wakefield acceleration electron beam injection driver pulse gas jet target "
+    "diagnostic spectrometer measured observed simulation particle-in-cell nonlinear regime "
+    "self-focusing guiding channel betatron radiation stability shot-to-shot fluctuation"
+).split()
+
+EQUATIONS = [
+    "E = m c^2 (gamma - 1), gamma = 1 / sqrt(1 - v^2/c^2)",
+    "a0 = 0.855 lambda[um] sqrt(I / 1e18 W cm^-2)",
+    "lambda_p = 2 pi c / omega_p, omega_p = sqrt(n_e e^2 / (eps0 m_e))",
+    "L_d = lambda_p^3 / lambda^2, Delta W = 4 m_e c^2 (n_c / n_e)",
+]
+
+
+def _sentence(rng):
+    if rng.random() < 0.35:
+        name, values = rng.choice(PARAMETERS)
+        return f"The {name} was {rng.choice(values)} in this {rng.choice(FILLER)} experiment."
+    words = [rng.choice(FILLER) for _ in range(rng.randint(8, 16))]
+    return " ".join(words).capitalize() + "."
+
+
+def generate_paper(rng, pages, line_width=90):
+    """
+    生成一篇论文的文本
+
+    参数:
+        rng (random.Random): 随机数生成器
+        pages (int): 页数
+        line_width (int): 每行最多字符数
+
+    返回:
+        list: 每页的文本行列表
+    """
+    total_lines = pages * LINES_PER_PAGE
+    lines = [f"Laser Wakefield Acceleration Study {rng.randint(1, 10 ** 6)}", ""]
+    section_every = max(8, total_lines // len(SECTIONS))
+
+    current = ""
+    next_section = 0
+    while len(lines) < total_lines:
+        if next_section < len(SECTIONS) and len(lines) >= next_section * section_every:
+            if current:
+                lines.append(current)
+                current = ""
+            lines.extend(["", SECTIONS[next_section]])
+            next_section += 1
+            continue
+
+        roll = rng.random()
+        if roll < 0.03:
+            if current:
+                lines.append(current)
+                current = ""
+            lines.append(rng.choice(EQUATIONS))
+            continue
+        if roll < 0.05:
+            if current:
+                lines.append(current)
+                current = ""
+            name, values = rng.choice(PARAMETERS)
+            lines.append(f"Table {rng.randint(1, 5)}: {name} | " + " | ".join(values))
+            continue
+
+        # 按行宽折行
+        for word in _sentence(rng).split():
+            if current and len(current) + 1 + len(word) > line_width:
+                lines.append(current)
+                current = word
+            else:
+                current = f"{current} {word}" if current else word
+
+    lines = lines[:total_lines]
+    return [lines[i:i + LINES_PER_PAGE] for i in range(0, total_lines, LINES_PER_PAGE)]
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path, pages):
+    """
+    将文本行写成PDF（Helvetica字体，每行一个文本对象，只支持ASCII字符）
+
+    参数:
+        path (str): 输出文件路径
+        pages (list): 每页的文本行列表
+    """
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages)))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>")
+    font_id = 3 + 2 * len(pages)
+
+    for i, lines in enumerate(pages):
+        content = f"BT /F1 10 Tf {LINE_HEIGHT} TL 50 770 Td " + " ".join(
+            f"({_escape(line)}) Tj T*" for line in lines
+        ) + " ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>"
+        )
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    data = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    data += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    data += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def generate_corpus(output_dir, documents=20, pages=12, seed=42):
+    """
+    生成合成论文语料（已存在的文件会被覆盖）
+
+    参数:
+        output_dir (str): 输出目录
+        documents (int): 论文数
+        pages (int): 每篇论文的页数
+        seed (int): 随机种子，相同参数生成相同的语料
+
+    返回:
+        list: 生成的PDF文件路径
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+
+    for index in range(documents):
+        paper = generate_paper(rng, pages)
+        pdf_path = os.path.join(output_dir, f"paper_{index:03d}.pdf")
+        write_pdf(pdf_path, paper)
+
+        # 参考文本：页内按行拼接，页之间空一行
+        with open(os.path.splitext(pdf_path)[0] + ".txt", "w", encoding="utf-8") as f:
+            f.write("\n\n".join("\n".join(lines) for lines in paper))
+        paths.append(pdf_path)
+
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成基准测试用的合成论文语料')
+    parser.add_argument('--output', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus'),
+                        help='输出目录')
+    parser.add_argument('--documents', type=int, default=20, help='论文数')
+    parser.add_argument('--pages', type=int, default=12, help='每篇论文的页数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    args = parser.parse_args()
+
+    paths = generate_corpus(args.output, args.documents, args.pages, args.seed)
+    print(f"已生成 {len(paths)} 个PDF文件: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+基准测试用的模拟LLM服务
+
+本地HTTP服务，实现OpenAI兼容的/chat/completions接口（普通响应和流式响应），不调用真实API。
+响应是固定格式的CSV：从提示中找出合成语料里的参数句（"The <参数> was <值> <单位> in this ..."），
+每处生成一行，因此响应长度随文本块变化，相邻块重叠部分会产生重复参数
+
+用法:
+    python benchmarks/mock_llm.py --port 8001 --latency 0.5
+    # 然后使用 LLMProcessor(api_key="sk-bench", base_url="http://127.0.0.1:8001")
+"""
+
+import re
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CSV_HEADER = "parameter_name,value,unit,context,confidence_score"
+
+_PARAMETER_RE = re.compile(r"The ([a-z][a-z0-9 ]*?) was ([0-9][0-9.e+-]*)(?: (\S+))? in this (\S+) experiment")
+
+# 没有找到参数句时返回的参数
+_FALLBACK_ROWS = [
+    'laser_wavelength,800,nm,"Ti:Sapphire laser, central wavelength",0.99',
+    'pulse_duration,30,fs,"measured with autocorrelator, FWHM",0.95',
+]
+
+
+def canned_csv(prompt, max_rows=200):
+    """
+    根据提示生成CSV格式的响应
+
+    参数:
+        prompt (str): 用户消息（完整提示）
+        max_rows (int): 最多返回的参数行数
+
+    返回:
+        str: 包含表头的CSV文本
+    """
+    rows = []
+    for match in _PARAMETER_RE.finditer(prompt):
+        name, value, unit, context = match.groups()
+        rows.append(f'{name.replace(" ", "_")},{value},{unit or ""},"{context} experiment, synthetic corpus",0.9')
+        if len(rows) >= max_rows:
+            break
+    return "\n".join([CSV_HEADER] + (rows or _FALLBACK_ROWS))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 响应头和响应体分两次写入，不关闭Nagle算法时每个请求会多等待一次延迟确认（约40毫秒）
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        messages = body.get("messages") or []
+        prompt = messages[-1].get("content", "") if messages else ""
+        content = canned_csv(prompt)
+
+        # token数按4字符约1个token粗略计算，只用于客户端的用量统计
+        prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4
+        completion_tokens = len(content) // 4
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        base = {"id": "chatcmpl-bench", "created": int(time.time()), "model": body.get("model", "mock")}
+        if body.get("stream"):
+            self._send_stream(base, content, usage)
+        else:
+            payload = dict(base, object="chat.completion", usage=usage, choices=[{
+                "index": 0, "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content},
+            }])
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    def _send_stream(self, base, content, usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def send(payload):
+            self.wfile.write(f"data: {payload}\n\n".encode("utf-8"))
+
+        # 每行CSV作为一个片段发送
+        for line in content.splitlines(keepends=True):
+            send(json.dumps(dict(base, object="chat.completion.chunk", choices=[{
+                "index": 0, "finish_reason": None, "delta": {"content": line},
+            }])))
+        send(json.dumps(dict(base, object="chat.completion.chunk", usage=usage, choices=[])))
+        send("[DONE]")
+        self.wfile.flush()
+
+
+class MockLLMServer:
+    """
+    在后台线程中运行的模拟LLM服务，可以作为上下文管理器使用
+
+    参数:
+        host (str): 监听地址
+        port (int): 监听端口，0表示随机选择空闲端口
+        latency (float): 每个请求的模拟延迟（秒）
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.latency = latency
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='模拟LLM服务（OpenAI兼容接口，返回固定格式的CSV）')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8001, help='监听端口')
+    parser.add_argument('--latency', type=float, default=0.0, help='每个请求的模拟延迟（秒）')
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.host, args.port, args.latency)
+    print(f"模拟LLM服务已启动: {server.base_url}")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -28,6 +28,17 @@ elif DB_TYPE == 'mysql':
 else:
     DATABASE_URL = f'sqlite:///{os.path.join(BASE_DIR, "laser_papers.db")}'
 
+# 后台任务worker配置
+WORKER_CONCURRENCY = int(os.environ.get('WORKER_CONCURRENCY', 2))
+JOB_LEASE_SECONDS = float(os.environ.get('JOB_LEASE_SECONDS', 120))
+
+# 批量提取配置：PDF文本提取线程数、流水线阶段之间的队列容量（0表示LLM并发数的两倍）
+BATCH_PDF_WORKERS = int(os.environ.get('BATCH_PDF_WORKERS', 2))
+BATCH_QUEUE_SIZE = int(os.environ.get('BATCH_QUEUE_SIZE', 0))
+
+# 参数统计读缓存时间（秒），统计表在写入参数时增量更新
+STATS_CACHE_TTL = float(os.environ.get('STATS_CACHE_TTL', 60))
+
 # 文件存储配置
 UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', os.path.join(BASE_DIR, 'paper_library'))
 MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 50 * 1024 * 1024))  # 默认50MB
@@ -46,6 +57,47 @@ PORT_CONFLICT_STRATEGY = os.environ.get('PORT_CONFLICT_STRATEGY', 'auto_change')
 # LLM模型配置
 LLM_MODEL = os.environ.get('LLM_MODEL', 'deepseek-chat')
 LLM_API_BASE = os.environ.get('LLM_API_BASE', 'https://api.deepseek.com')
+LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', 4))  # 长文本分块时的最大并发请求数
+LLM_EXTRACTION_MODE = os.environ.get('LLM_EXTRACTION_MODE', 'full')  # 'full' 截取全文开头, 'sections' 按章节选取
+LLM_CONTEXT_WINDOW = int(os.environ.get('LLM_CONTEXT_WINDOW', 65536))  # 模型上下文窗口（token）
+LLM_MAX_OUTPUT_TOKENS = int(os.environ.get('LLM_MAX_OUTPUT_TOKENS', 4096))  # 单次响应的最大token数
+LLM_MAX_CHUNK_TOKENS = int(os.environ.get('LLM_MAX_CHUNK_TOKENS', 0))  # 每块文本的token上限，0表示按上下文窗口计算
+LLM_CHUNK_OVERLAP_TOKENS = int(os.environ.get('LLM_CHUNK_OVERLAP_TOKENS', 200))  # 相邻文本块重叠的token数
+
+# LLM限流与重试配置（限流器在同一进程的所有请求间共享，0表示不限制）
+# 限额是所有进程的总配额，每个进程使用 限额/LLM_RATE_LIMIT_PROCESSES；run_worker.py默认设为worker进程数，
+# Web服务或batch_extract.py同时调用API时，应设为所有调用API的进程总数
+LLM_RPM_LIMIT = float(os.environ.get('LLM_RPM_LIMIT', 0))  # 每分钟最大请求数
+LLM_TPM_LIMIT = float(os.environ.get('LLM_TPM_LIMIT', 0))  # 每分钟最大token数
+LLM_RATE_LIMIT_PROCESSES = int(os.environ.get('LLM_RATE_LIMIT_PROCESSES', 1))  # 平分限额的进程数
+LLM_REQUEST_TIMEOUT = float(os.environ.get('LLM_REQUEST_TIMEOUT', 60))  # 单次请求超时（秒）
+LLM_MAX_RETRIES = int(os.environ.get('LLM_MAX_RETRIES', 5))  # 限流、服务端错误和超时的最大重试次数
+LLM_RETRY_MAX_DELAY = float(os.environ.get('LLM_RETRY_MAX_DELAY', 60))  # 指数退避的最长等待时间（秒）
+LLM_STREAMING = os.environ.get('LLM_STREAMING', 'False').lower() == 'true'  # 流式响应，边接收边解析和保存参数
+
+# LLM响应缓存配置
+LLM_CACHE_ENABLED = os.environ.get('LLM_CACHE_ENABLED', 'True').lower() == 'true'
+LLM_CACHE_PATH = os.environ.get('LLM_CACHE_PATH', os.path.join(BASE_DIR, 'cache', 'llm_responses.db'))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', 10000))  # 最大缓存条目数，0表示不限制
+LLM_CACHE_MAX_AGE = float(os.environ.get('LLM_CACHE_MAX_AGE', 30 * 24 * 3600))  # 缓存有效期（秒），0表示永不过期
+
+# PDF文本缓存配置（按PDF内容的SHA-256缓存提取的文本）
+PDF_TEXT_CACHE_ENABLED = os.environ.get('PDF_TEXT_CACHE_ENABLED', 'True').lower() == 'true'
+PDF_TEXT_CACHE_DIR = os.environ.get('PDF_TEXT_CACHE_DIR', os.path.join(BASE_DIR, 'cache', 'pdf_text'))
+
+# PDF文本提取后端：auto（已安装的最快后端）、pymupdf、pypdfium2、pypdf2
+PDF_BACKEND = os.environ.get('PDF_BACKEND', 'auto')
+
+# 沙箱模式：在子进程中解析PDF，限制每页和整个文件的等待时间（秒）以及子进程内存（MB）
+PDF_SANDBOX = os.environ.get('PDF_SANDBOX', 'False').lower() == 'true'
+PDF_SANDBOX_PAGE_TIMEOUT = float(os.environ.get('PDF_SANDBOX_PAGE_TIMEOUT', 30))
+PDF_SANDBOX_DOCUMENT_TIMEOUT = float(os.environ.get('PDF_SANDBOX_DOCUMENT_TIMEOUT', 300))
+PDF_SANDBOX_MEMORY_MB = int(os.environ.get('PDF_SANDBOX_MEMORY_MB', 2048))
+
+# 大文件按页并行提取（页数达到PDF_PARALLEL_MIN_PAGES时启用；默认1即不并行，0表示使用全部CPU核心）
+# 每个进程（如每个任务worker）共享一个进程池，总进程数约为 worker数 × PDF_EXTRACT_PROCESSES
+PDF_EXTRACT_PROCESSES = int(os.environ.get('PDF_EXTRACT_PROCESSES', 1))
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get('PDF_PARALLEL_MIN_PAGES', 100))
 
 # arXiv API配置
 ARXIV_QUERY_DELAY = float(os.environ.get('ARXIV_QUERY_DELAY', 3.0))  # 请求之间的延迟（秒）
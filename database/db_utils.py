@@ -1,16 +1,104 @@
 import os
+import re
 import logging
 import datetime
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import desc, insert, select, func, exists, and_, text
 import pandas as pd
 
-from .models import Paper, LaserParameter, ProcessingRecord, ExtractedTable, get_engine, get_session_factory, init_db
+from .models import (Paper, LaserParameter, ProcessingRecord, ExtractedTable, ParameterStatistic,
+                     get_engine, get_session_factory, init_db)
+from .fulltext import has_fulltext, match_ids_select, ranked_ids_select
+from .normalization import normalize_quantity
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# 参数分类规则，按优先级排列，命中第一个类别即返回
+_CATEGORY_RULES = [
+    ('laser', ['laser', 'wavelength', 'pulse', 'intensity', 'power', 'energy', 'contrast', 'focal']),
+    ('plasma', ['plasma', 'density', 'gas', 'ionization', 'temp']),
+    ('electron_beam', ['electron', 'beam', 'charge', 'emittance', 'divergence', 'energy']),
+    ('acceleration_field', ['field', 'gradient', 'acceleration', 'electric']),
+    ('experimental_setup', ['setup', 'diagnostic', 'detector', 'camera', 'spectrometer'])
+]
+
+# 每个类别的关键词预编译为一个正则
+_CATEGORY_PATTERNS = [
+    (category, re.compile("|".join(re.escape(term) for term in terms)))
+    for category, terms in _CATEGORY_RULES
+]
+
+# 参数统计表中按列统计的维度，另有"total"维度保存参数总数
+STATISTICS_DIMENSIONS = ('category', 'unit', 'parameter_name')
+
+# PostgreSQL上重建参数统计时使用的咨询锁编号
+STATISTICS_REBUILD_LOCK_KEY = 7313001
+
+# 重试也不会成功的参数提取失败（如PDF缺失或无法解析），处理记录的消息以此开头，批量提取时跳过这些论文
+PERMANENT_FAILURE_PREFIX = "[不再重试] "
+
+def _permanent_failure_filter():
+    """论文最新的参数提取记录是不再重试的失败（直接提交的单篇提取会产生新记录，之后不再跳过）"""
+    latest = aliased(ProcessingRecord)
+    latest_id = (
+        select(func.max(latest.id))
+        .where(latest.paper_id == Paper.id, latest.process_type == "parameter_extraction")
+        .correlate(Paper)
+        .scalar_subquery()
+    )
+    return exists().where(and_(
+        ProcessingRecord.id == latest_id,
+        ProcessingRecord.status == "failed",
+        ProcessingRecord.message.startswith(PERMANENT_FAILURE_PREFIX, autoescape=True)
+    ))
+
+def count_parameter_statistics(rows):
+    """
+    统计参数行在各维度上的数量，用于增量更新参数统计表
+    
+    参数:
+        rows (list): 包含category、unit、parameter_name的行（字典或具名元组）
+        
+    返回:
+        Counter: (维度, 取值) 到数量的映射
+    """
+    counts = Counter()
+    for row in rows:
+        get = row.get if isinstance(row, dict) else row._mapping.get
+        counts[('total', '')] += 1
+        for dimension in STATISTICS_DIMENSIONS:
+            counts[(dimension, (get(dimension) or '')[:100])] += 1
+    return counts
+
+@lru_cache(maxsize=8192)
+def categorize_parameter_name(parameter_name):
+    """
+    根据参数名称自动分类（结果按名称缓存，批量写入时相同名称只计算一次）
+    
+    参数:
+        parameter_name (str): 参数名称
+        
+    返回:
+        str: 参数类别
+    """
+    if not parameter_name:
+        return 'other'
+    
+    parameter_name = parameter_name.lower()
+    
+    for category, pattern in _CATEGORY_PATTERNS:
+        if pattern.search(parameter_name):
+            return category
+    
+    # 默认分类
+    return 'other'
+
 class DatabaseManager:
     """
     数据库管理类，处理论文和参数的数据库操作
@@ -33,6 +121,18 @@ class DatabaseManager:
         # 初始化数据库（如果需要）
         init_db(self.engine)
         
+        # 全文索引由迁移脚本创建，这里只检查是否存在，不存在时搜索回退到LIKE查询
+        self.fulltext_enabled = has_fulltext(self.engine)
+        if not self.fulltext_enabled and self.engine.dialect.name in ('sqlite', 'postgresql'):
+            logger.info("全文索引尚未创建，搜索将使用LIKE查询；运行 python database/migrate_db.py 创建全文索引")
+        
+        # 参数统计的读缓存（秒），统计表在写入时增量更新，缓存只用于减少仪表盘的查询次数
+        self.stats_cache_ttl = float(os.environ.get('STATS_CACHE_TTL', 60))
+        self._stats_cache = None
+        self._stats_cache_time = 0.0
+        self._stats_lock = threading.Lock()
+        self._check_parameter_statistics()
+        
         logger.info(f"数据库管理器初始化完成，使用数据库: {self.db_url}")
     
     def get_session(self):
@@ -279,14 +379,63 @@ class DatabaseManager:
             
             return result
     
-    def search_papers(self, query, field=None, limit=100):
+    def get_unprocessed_papers(self, after_id=0, limit=100, skip_permanent_failures=False):
+        """
+        按id顺序获取未处理的论文（键集分页，用于批量提取）
+        
+        参数:
+            after_id (int): 只返回id大于该值的论文
+            limit (int): 最大返回数量
+            skip_permanent_failures (bool): 跳过最新的参数提取记录为不再重试的失败（见PERMANENT_FAILURE_PREFIX）的论文
+            
+        返回:
+            list: 论文列表，只包含提取参数需要的字段
+        """
+        with self.get_session() as session:
+            query = session.query(
+                Paper.id, Paper.title, Paper.authors, Paper.categories, Paper.local_pdf_path
+            ).filter(
+                Paper.processed.isnot(True), Paper.id > after_id
+            )
+            if skip_permanent_failures:
+                query = query.filter(~_permanent_failure_filter())
+            rows = query.order_by(Paper.id).limit(limit).all()
+            
+            return [{
+                'id': row.id,
+                'title': row.title,
+                'authors': row.authors,
+                'categories': row.categories,
+                'local_pdf_path': row.local_pdf_path
+            } for row in rows]
+    
+    def count_unprocessed_papers(self, skip_permanent_failures=False):
+        """
+        统计未处理的论文数量
+        
+        参数:
+            skip_permanent_failures (bool): 不统计不再重试的论文，见get_unprocessed_papers
+        
+        返回:
+            int: 论文数量
+        """
+        with self.get_session() as session:
+            query = session.query(func.count(Paper.id)).filter(Paper.processed.isnot(True))
+            if skip_permanent_failures:
+                query = query.filter(~_permanent_failure_filter())
+            return query.scalar() or 0
+    
+    def search_papers(self, query, field=None, limit=100, offset=0):
         """
         搜索论文
         
+        未指定字段时优先使用全文索引，结果按相关度排序
+        
         参数:
             query (str): 搜索关键词
             field (str): 搜索字段，如 'title', 'abstract' 等，默认搜索所有字段
             limit (int): 最大返回数量
+            offset (int): 结果偏移量，用于分页
             
         返回:
             list: 论文列表
@@ -294,8 +443,15 @@ class DatabaseManager:
         with self.get_session() as session:
             q = session.query(Paper)
             
+            # 全文检索：连接按相关度分页的子查询，一次查询完成检索和加载
+            ranked = None
+            if not field:
+                ranked = self._fulltext_ranked_select('papers', query, limit, offset)
+            
             # 添加搜索条件
-            if field:
+            if ranked is not None:
+                q = q.join(ranked, ranked.c.id == Paper.id).order_by(ranked.c.rank)
+            elif field:
                 if hasattr(Paper, field):
                     q = q.filter(getattr(Paper, field).like(f'%{query}%'))
             else:
@@ -308,8 +464,10 @@ class DatabaseManager:
                     Paper.categories.like(f'%{query}%')
                 ))
             
-            # 应用限制
-            papers = q.limit(limit).all()
+            # 应用限制（全文检索的子查询已经分页）
+            if ranked is None:
+                q = q.offset(offset).limit(limit)
+            papers = q.all()
             
             # 转换为字典列表
             result = []
@@ -379,6 +537,53 @@ class DatabaseManager:
                 'processed': paper.processed
             }
     
+    def find_existing_papers(self, arxiv_ids=None, dois=None, batch_size=500):
+        """
+        批量检查论文是否已存在
+        
+        只在有索引的arxiv_id和doi字段上做一次IN查询，不再对标题和摘要做模糊匹配，
+        适合在爬取时对一整页搜索结果查重
+        
+        参数:
+            arxiv_ids (list, optional): 待检查的arXiv ID列表
+            dois (list, optional): 待检查的DOI列表
+            batch_size (int): 每次查询的最大ID数量，避免超出数据库的参数个数限制
+            
+        返回:
+            tuple: (已存在的arXiv ID集合, 已存在的DOI集合)
+        """
+        from sqlalchemy import or_
+        
+        arxiv_ids = list({str(i) for i in (arxiv_ids or []) if i})
+        dois = list({str(d) for d in (dois or []) if d})
+        
+        existing_arxiv_ids = set()
+        existing_dois = set()
+        
+        if not arxiv_ids and not dois:
+            return existing_arxiv_ids, existing_dois
+        
+        with self.get_session() as session:
+            for start in range(0, max(len(arxiv_ids), len(dois)), batch_size):
+                id_batch = arxiv_ids[start:start + batch_size]
+                doi_batch = dois[start:start + batch_size]
+                
+                conditions = []
+                if id_batch:
+                    conditions.append(Paper.arxiv_id.in_(id_batch))
+                if doi_batch:
+                    conditions.append(Paper.doi.in_(doi_batch))
+                
+                rows = session.query(Paper.arxiv_id, Paper.doi).filter(or_(*conditions)).all()
+                
+                for arxiv_id, doi in rows:
+                    if arxiv_id:
+                        existing_arxiv_ids.add(arxiv_id)
+                    if doi:
+                        existing_dois.add(doi)
+        
+        return existing_arxiv_ids, existing_dois
+    
     # 参数相关操作
     def add_parameters(self, paper_id, parameters):
         """
@@ -391,49 +596,279 @@ class DatabaseManager:
         返回:
             int: 添加的参数数量
         """
+        added_counts = self.add_parameters_bulk({paper_id: parameters})
+        
+        if paper_id not in added_counts:
+            return 0
+        
+        return added_counts[paper_id]
+    
+    def add_parameters_bulk(self, parameters_by_paper, batch_size=1000):
+        """
+        在一个事务中批量写入多篇论文的参数
+        
+        参数行一次性构建（分类结果按名称缓存），通过executemany批量插入，
+        不再为每个参数创建ORM对象
+        
+        参数:
+            parameters_by_paper (dict): 论文ID到参数列表的映射
+            batch_size (int): 每次executemany插入的最大行数
+            
+        返回:
+            dict: 论文ID到添加的参数数量的映射，不存在的论文不包含在结果中
+        """
+        if not parameters_by_paper:
+            return {}
+        
+        now = datetime.datetime.utcnow()
+        
         with self.get_session() as session:
-            # 检查论文是否存在
-            paper = session.query(Paper).filter_by(id=paper_id).first()
+            # 一次查询检查所有论文是否存在
+            paper_ids = list(parameters_by_paper.keys())
+            existing_ids = {
+                row[0] for row in session.query(Paper.id).filter(Paper.id.in_(paper_ids)).all()
+            }
             
-            if not paper:
-                logger.warning(f"论文不存在，无法添加参数: {paper_id}")
-                return 0
+            for missing_id in set(paper_ids) - existing_ids:
+                logger.warning(f"论文不存在，无法添加参数: {missing_id}")
             
-            # 标记论文为已处理
-            paper.processed = True
-            
-            # 添加参数
-            added_count = 0
-            for param_data in parameters:
-                # 创建参数对象
-                new_param = LaserParameter(
-                    paper_id=paper_id,
-                    parameter_name=param_data.get('parameter_name', ''),
-                    value=param_data.get('value', ''),
-                    unit=param_data.get('unit', ''),
-                    context=param_data.get('context', ''),
-                    confidence_score=float(param_data.get('confidence_score', 0)) if param_data.get('confidence_score') else None,
-                    category=self._categorize_parameter(param_data.get('parameter_name', ''))
-                )
+            # 构建参数行和处理记录
+            rows = []
+            records = []
+            added_counts = {}
+            
+            for paper_id in paper_ids:
+                if paper_id not in existing_ids:
+                    continue
+                
+                paper_rows = self._build_parameter_rows(paper_id, parameters_by_paper[paper_id] or [], now)
+                rows.extend(paper_rows)
+                added_counts[paper_id] = len(paper_rows)
                 
-                session.add(new_param)
-                added_count += 1
+                records.append({
+                    'paper_id': paper_id,
+                    'process_type': "parameter_extraction",
+                    'status': "success",
+                    'message': f"成功提取 {len(paper_rows)} 个参数",
+                    'result_count': len(paper_rows),
+                    'created_at': now,
+                    'updated_at': now
+                })
             
-            # 记录处理状态
-            processing_record = ProcessingRecord(
-                paper_id=paper_id,
-                process_type="parameter_extraction",
-                status="success",
-                message=f"成功提取 {added_count} 个参数",
-                result_count=added_count,
-                updated_at=datetime.datetime.utcnow()
+            if not added_counts:
+                return {}
+            
+            # 批量插入参数
+            for start in range(0, len(rows), batch_size):
+                session.execute(insert(LaserParameter.__table__), rows[start:start + batch_size])
+            
+            # 标记论文为已处理
+            session.query(Paper).filter(Paper.id.in_(list(added_counts.keys()))).update(
+                {Paper.processed: True}, synchronize_session=False
             )
             
-            session.add(processing_record)
+            # 记录处理状态
+            session.execute(insert(ProcessingRecord.__table__), records)
+            
+            # 在同一事务中更新参数统计
+            self._apply_statistics_delta(session, count_parameter_statistics(rows))
             session.commit()
+        
+        self._invalidate_statistics_cache()
+        logger.info(f"批量添加参数完成: {len(added_counts)} 篇论文，共 {len(rows)} 个参数")
+        return added_counts
+    
+    def insert_parameters(self, paper_id, parameters):
+        """
+        写入参数并返回新参数的ID，不标记论文为已处理、不添加处理记录
+        
+        用于流式提取时分批写入，提取完成后由调用方标记论文状态，失败时可按返回的ID删除
+        
+        参数:
+            paper_id (int): 论文ID
+            parameters (list): 参数列表
             
-            logger.info(f"成功为论文 {paper_id} 添加 {added_count} 个参数")
-            return added_count
+        返回:
+            list: 新参数的ID列表
+        """
+        rows = self._build_parameter_rows(paper_id, parameters or [], datetime.datetime.utcnow())
+        if not rows:
+            return []
+        
+        with self.get_session() as session:
+            # 逐行插入以获取自增ID（每批只有少量参数）
+            ids = [
+                session.execute(insert(LaserParameter.__table__).values(**row)).inserted_primary_key[0]
+                for row in rows
+            ]
+            self._apply_statistics_delta(session, count_parameter_statistics(rows))
+            session.commit()
+        
+        self._invalidate_statistics_cache()
+        return ids
+    
+    def _build_parameter_rows(self, paper_id, parameters, created_at):
+        """
+        将参数字典转换为可直接插入laser_parameters表的行
+        
+        参数:
+            paper_id (int): 论文ID
+            parameters (list): 参数列表
+            created_at (datetime): 创建时间
+            
+        返回:
+            list: 行字典列表
+        """
+        rows = []
+        for param_data in parameters:
+            parameter_name = param_data.get('parameter_name', '')
+            value = param_data.get('value', '')
+            unit = param_data.get('unit', '')
+            value_numeric, unit_canonical = normalize_quantity(value, unit)
+            rows.append({
+                'paper_id': paper_id,
+                'parameter_name': parameter_name,
+                'value': value,
+                'unit': unit,
+                'context': param_data.get('context', ''),
+                'confidence_score': float(param_data.get('confidence_score', 0)) if param_data.get('confidence_score') else None,
+                'category': categorize_parameter_name(parameter_name),
+                'value_numeric': value_numeric,
+                'unit_canonical': unit_canonical,
+                'created_at': created_at
+            })
+        return rows
+    
+    def backfill_normalized_values(self, batch_size=1000, recompute=False):
+        """
+        为已有参数计算归一化数值（value_numeric、unit_canonical）
+        
+        按id分批读取和更新，可以在服务运行时执行，中断后重新执行会从未处理的行继续
+        
+        参数:
+            batch_size (int): 每批处理的行数
+            recompute (bool): 是否重新计算已有归一化数值的行（如单位换算规则更新后）
+            
+        返回:
+            dict: 处理的行数和成功解析的行数
+        """
+        from sqlalchemy import update, bindparam
+        
+        table = LaserParameter.__table__
+        stmt = update(table).where(table.c.id == bindparam('row_id')).values(
+            value_numeric=bindparam('value_numeric'),
+            unit_canonical=bindparam('unit_canonical')
+        )
+        
+        processed = 0
+        normalized = 0
+        last_id = 0
+        
+        while True:
+            with self.get_session() as session:
+                q = session.query(LaserParameter.id, LaserParameter.value, LaserParameter.unit).filter(
+                    LaserParameter.id > last_id
+                )
+                if not recompute:
+                    q = q.filter(LaserParameter.unit_canonical.is_(None))
+                rows = q.order_by(LaserParameter.id).limit(batch_size).all()
+                
+                if not rows:
+                    break
+                
+                updates = []
+                for row in rows:
+                    value_numeric, unit_canonical = normalize_quantity(row.value, row.unit)
+                    if value_numeric is not None:
+                        normalized += 1
+                    updates.append({
+                        'row_id': row.id,
+                        'value_numeric': value_numeric,
+                        'unit_canonical': unit_canonical
+                    })
+                
+                session.connection().execute(stmt, updates)
+                session.commit()
+                
+                processed += len(rows)
+                last_id = rows[-1].id
+                logger.info(f"已归一化 {processed} 个参数（成功解析 {normalized} 个）")
+        
+        return {'processed': processed, 'normalized': normalized}
+    
+    def get_parameters_in_range(self, min_value=None, max_value=None, unit=None, parameter_name=None,
+                                category=None, limit=100, offset=0):
+        """
+        按数值范围查询参数，如 get_parameters_in_range(1e17, 1e19, 'cm^-3', parameter_name='density')
+        
+        范围边界按给定单位换算为国际单位制后与value_numeric比较，查询在数据库中完成并使用(unit_canonical, value_numeric)索引
+        
+        参数:
+            min_value (float|str, optional): 下限（包含）
+            max_value (float|str, optional): 上限（包含）
+            unit (str, optional): 边界值的单位，只返回量纲相同的参数
+            parameter_name (str, optional): 参数名称关键词
+            category (str, optional): 参数类别
+            limit (int): 最大返回数量
+            offset (int): 结果偏移量
+            
+        返回:
+            list: 参数列表，按数值从小到大排序，附带value_numeric和unit_canonical
+        """
+        unit_canonical = None
+        bounds = []
+        for bound in (min_value, max_value):
+            if bound is None:
+                bounds.append(None)
+                continue
+            value_numeric, unit_canonical = normalize_quantity(bound, unit)
+            if value_numeric is None:
+                raise ValueError(f"无法解析数值范围: {bound} {unit or ''}")
+            bounds.append(value_numeric)
+        
+        if unit_canonical is None and unit is not None:
+            _, unit_canonical = normalize_quantity(1, unit)
+            if unit_canonical is None:
+                raise ValueError(f"无法识别的单位: {unit}")
+        
+        with self.get_session() as session:
+            q = session.query(
+                LaserParameter.id,
+                LaserParameter.paper_id,
+                LaserParameter.parameter_name,
+                LaserParameter.value,
+                LaserParameter.unit,
+                LaserParameter.category,
+                LaserParameter.value_numeric,
+                LaserParameter.unit_canonical,
+                Paper.title.label('paper_title')
+            ).outerjoin(Paper, Paper.id == LaserParameter.paper_id)
+            
+            q = q.filter(LaserParameter.value_numeric.isnot(None))
+            if unit_canonical is not None:
+                q = q.filter(LaserParameter.unit_canonical == unit_canonical)
+            if bounds[0] is not None:
+                q = q.filter(LaserParameter.value_numeric >= bounds[0])
+            if bounds[1] is not None:
+                q = q.filter(LaserParameter.value_numeric <= bounds[1])
+            if parameter_name:
+                q = q.filter(self.parameter_name_filter(parameter_name))
+            if category:
+                q = q.filter(LaserParameter.category == category)
+            
+            rows = q.order_by(LaserParameter.value_numeric, LaserParameter.id).offset(offset).limit(limit).all()
+            
+            return [{
+                'id': row.id,
+                'paper_id': row.paper_id,
+                'parameter_name': row.parameter_name,
+                'value': row.value,
+                'unit': row.unit,
+                'category': row.category,
+                'value_numeric': row.value_numeric,
+                'unit_canonical': row.unit_canonical,
+                'paper_title': row.paper_title
+            } for row in rows]
     
     def get_parameters_by_paper(self, paper_id):
         """
@@ -480,7 +915,21 @@ class DatabaseManager:
             list: 参数列表
         """
         with self.get_session() as session:
-            q = session.query(LaserParameter)
+            # 只查询需要的列并连接论文标题，一次查询返回整页结果，不构造ORM对象
+            q = session.query(
+                LaserParameter.id,
+                LaserParameter.paper_id,
+                LaserParameter.parameter_name,
+                LaserParameter.value,
+                LaserParameter.unit,
+                LaserParameter.context,
+                LaserParameter.confidence_score,
+                LaserParameter.category,
+                LaserParameter.created_at,
+                Paper.id.label('joined_paper_id'),
+                Paper.title.label('paper_title')
+            ).outerjoin(Paper, Paper.id == LaserParameter.paper_id)
+            ranked = None
             
             # 添加搜索条件
             if field and value:
@@ -492,18 +941,25 @@ class DatabaseManager:
                 if hasattr(LaserParameter, field):
                     q = q.filter(getattr(LaserParameter, field).like(f'%{query}%'))
             elif query:
-                # 搜索多个字段
-                from sqlalchemy import or_
-                q = q.filter(or_(
-                    LaserParameter.parameter_name.like(f'%{query}%'),
-                    LaserParameter.value.like(f'%{query}%'),
-                    LaserParameter.unit.like(f'%{query}%'),
-                    LaserParameter.context.like(f'%{query}%'),
-                    LaserParameter.category.like(f'%{query}%')
-                ))
-            
-            # 应用分页
-            q = q.offset(offset).limit(limit)
+                ranked = self._fulltext_ranked_select('laser_parameters', query, limit, offset)
+                
+                if ranked is not None:
+                    # 全文检索，按相关度排序
+                    q = q.join(ranked, ranked.c.id == LaserParameter.id).order_by(ranked.c.rank)
+                else:
+                    # 搜索多个字段
+                    from sqlalchemy import or_
+                    q = q.filter(or_(
+                        LaserParameter.parameter_name.like(f'%{query}%'),
+                        LaserParameter.value.like(f'%{query}%'),
+                        LaserParameter.unit.like(f'%{query}%'),
+                        LaserParameter.context.like(f'%{query}%'),
+                        LaserParameter.category.like(f'%{query}%')
+                    ))
+            
+            # 应用分页（全文检索的子查询已经分页）
+            if ranked is None:
+                q = q.offset(offset).limit(limit)
             
             # 执行查询
             parameters = q.all()
@@ -511,13 +967,6 @@ class DatabaseManager:
             # 转换为字典列表
             result = []
             for param in parameters:
-                # 获取相关联的论文信息
-                paper = None
-                try:
-                    paper = session.query(Paper).filter_by(id=param.paper_id).first()
-                except:
-                    pass
-                
                 param_dict = {
                     'id': param.id,
                     'paper_id': param.paper_id,
@@ -529,54 +978,256 @@ class DatabaseManager:
                     'category': param.category,
                     'created_at': param.created_at,
                     'paper': {
-                        'title': paper.title if paper else None
-                    } if paper else None
+                        'title': param.paper_title
+                    } if param.joined_paper_id is not None else None
                 }
                 result.append(param_dict)
             
             return result
     
+    def _fulltext_ranked_select(self, table, query, limit, offset):
+        """
+        构造全文检索的分页子查询
+        
+        返回:
+            Subquery: 包含id和rank列的子查询；未启用全文索引或查询词为空时返回None，由调用方回退到LIKE查询
+        """
+        if not self.fulltext_enabled:
+            return None
+        
+        ranked = ranked_ids_select(self.engine.dialect.name, table, query, limit=limit, offset=offset)
+        return ranked.subquery() if ranked is not None else None
+    
+    def parameter_name_filter(self, query):
+        """
+        构造按参数名称搜索的过滤条件，启用全文索引时只在parameter_name字段中匹配
+        
+        参数:
+            query (str): 搜索关键词
+            
+        返回:
+            过滤条件，可直接传给Query.filter()
+        """
+        if self.fulltext_enabled:
+            subquery = match_ids_select(self.engine.dialect.name, 'laser_parameters', query,
+                                        columns=['parameter_name'])
+            if subquery is not None:
+                return LaserParameter.id.in_(subquery)
+        
+        return LaserParameter.parameter_name.like(f"%{query}%")
+    
+    def delete_parameters(self, paper_id=None, parameter_ids=None):
+        """
+        删除参数并同步更新参数统计
+        
+        参数:
+            paper_id (int, optional): 删除该论文的所有参数
+            parameter_ids (list, optional): 删除指定ID的参数
+            
+        返回:
+            int: 删除的参数数量
+        """
+        if paper_id is None and not parameter_ids:
+            return 0
+        
+        with self.get_session() as session:
+            q = session.query(
+                LaserParameter.id,
+                LaserParameter.category,
+                LaserParameter.unit,
+                LaserParameter.parameter_name
+            )
+            if paper_id is not None:
+                q = q.filter(LaserParameter.paper_id == paper_id)
+            if parameter_ids:
+                q = q.filter(LaserParameter.id.in_(list(parameter_ids)))
+            rows = q.all()
+            
+            if not rows:
+                return 0
+            
+            ids = [row.id for row in rows]
+            for start in range(0, len(ids), 500):
+                session.query(LaserParameter).filter(
+                    LaserParameter.id.in_(ids[start:start + 500])
+                ).delete(synchronize_session=False)
+            
+            delta = count_parameter_statistics(rows)
+            self._apply_statistics_delta(session, Counter({key: -count for key, count in delta.items()}))
+            session.commit()
+        
+        self._invalidate_statistics_cache()
+        logger.info(f"已删除 {len(rows)} 个参数")
+        return len(rows)
+    
+    def _apply_statistics_delta(self, session, delta):
+        """
+        在当前事务中把数量变化累加到参数统计表
+        
+        SQLite和PostgreSQL使用INSERT ... ON CONFLICT原子累加，多个进程同时写入也不会丢失更新
+        
+        参数:
+            session: 数据库会话
+            delta (Counter): (维度, 取值) 到数量变化的映射
+        """
+        rows = [
+            {'dimension': dimension, 'key': key, 'count': count}
+            for (dimension, key), count in delta.items() if count
+        ]
+        if not rows:
+            return
+        
+        table = ParameterStatistic.__table__
+        dialect = self.engine.dialect.name
+        
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert as upsert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as upsert
+            
+            stmt = upsert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.dimension, table.c.key],
+                set_={'count': table.c.count + stmt.excluded.count}
+            )
+            session.execute(stmt, rows)
+        else:
+            for row in rows:
+                updated = session.query(ParameterStatistic).filter_by(
+                    dimension=row['dimension'], key=row['key']
+                ).update({ParameterStatistic.count: ParameterStatistic.count + row['count']},
+                         synchronize_session=False)
+                if not updated:
+                    session.execute(insert(table), [row])
+        
+        # 数量减为0的取值不再保留
+        session.query(ParameterStatistic).filter(ParameterStatistic.count <= 0).filter(
+            ParameterStatistic.dimension != 'total'
+        ).delete(synchronize_session=False)
+    
+    def rebuild_parameter_statistics(self):
+        """
+        根据laser_parameters表全量重建参数统计（只在首次创建统计表或数据被外部修改后需要）
+        
+        返回:
+            int: 参数总数
+        """
+        with self.get_session() as session:
+            if self.engine.dialect.name == 'postgresql':
+                # 同时运行的重建按事务级咨询锁排队，避免两次统计都累加到表中
+                session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': STATISTICS_REBUILD_LOCK_KEY})
+            
+            session.query(ParameterStatistic).delete(synchronize_session=False)
+            
+            total = session.query(func.count(LaserParameter.id)).scalar() or 0
+            delta = Counter({('total', ''): total})
+            
+            for dimension in STATISTICS_DIMENSIONS:
+                column = getattr(LaserParameter, dimension)
+                for key, count in session.query(column, func.count(LaserParameter.id)).group_by(column).all():
+                    delta[(dimension, (key or '')[:100])] += count
+            
+            self._apply_statistics_delta(session, delta)
+            session.commit()
+        
+        self._invalidate_statistics_cache()
+        logger.info(f"参数统计重建完成，共 {total} 个参数")
+        return total
+    
+    def parameter_statistics_missing(self):
+        """
+        统计表为空而参数表有数据时（如从旧版本升级）返回True，需要运行迁移脚本重建统计
+        
+        返回:
+            bool: 是否需要重建参数统计
+        """
+        with self.get_session() as session:
+            has_statistics = session.query(ParameterStatistic.dimension).filter_by(dimension='total').first()
+            has_parameters = session.query(LaserParameter.id).first()
+        return bool(has_parameters and not has_statistics)
+    
+    def _check_parameter_statistics(self):
+        """只检查统计是否缺失，重建由迁移脚本执行（多个进程同时启动时在这里重建会重复累加）"""
+        try:
+            if self.parameter_statistics_missing():
+                logger.warning("参数统计尚未建立，仪表盘统计不准确；运行 python database/migrate_db.py 重建参数统计")
+        except Exception as e:
+            logger.warning(f"检查参数统计失败: {str(e)}")
+    
+    def _invalidate_statistics_cache(self):
+        with self._stats_lock:
+            self._stats_cache = None
+    
     def get_parameter_statistics(self):
         """
         获取参数统计信息
         
+        从增量维护的参数统计表读取，并在进程内缓存STATS_CACHE_TTL秒
+        
         返回:
             dict: 统计信息
         """
+        with self._stats_lock:
+            if self._stats_cache is not None and time.monotonic() - self._stats_cache_time < self.stats_cache_ttl:
+                return self._stats_cache
+        
         with self.get_session() as session:
-            # 总参数数量
-            total_params = session.query(LaserParameter).count()
-            
-            # 按类别统计
-            from sqlalchemy import func
-            category_counts = session.query(
-                LaserParameter.category, 
-                func.count(LaserParameter.id)
-            ).group_by(LaserParameter.category).all()
-            
-            # 按单位统计
-            unit_counts = session.query(
-                LaserParameter.unit, 
-                func.count(LaserParameter.id)
-            ).group_by(LaserParameter.unit).all()
+            rows = session.query(
+                ParameterStatistic.dimension,
+                ParameterStatistic.key,
+                ParameterStatistic.count
+            ).filter(ParameterStatistic.dimension.in_(['total', 'category', 'unit'])).order_by(
+                ParameterStatistic.dimension, ParameterStatistic.key
+            ).all()
             
             # 最常见的参数名称
             common_params = session.query(
-                LaserParameter.parameter_name, 
-                func.count(LaserParameter.id)
-            ).group_by(LaserParameter.parameter_name).order_by(
-                func.count(LaserParameter.id).desc()
+                ParameterStatistic.key,
+                ParameterStatistic.count
+            ).filter(ParameterStatistic.dimension == 'parameter_name').order_by(
+                ParameterStatistic.count.desc()
             ).limit(10).all()
+        
+        # 构建统计结果（空值保存为空字符串，读取时还原为None）
+        stats = {
+            'total_parameters': 0,
+            'by_category': {},
+            'by_unit': {},
+            'common_parameters': {key or None: count for key, count in common_params}
+        }
+        for dimension, key, count in rows:
+            if dimension == 'total':
+                stats['total_parameters'] = count
+            else:
+                stats[f'by_{dimension}'][key or None] = count
+        
+        with self._stats_lock:
+            self._stats_cache = stats
+            self._stats_cache_time = time.monotonic()
+        
+        return stats
+    
+    def get_parameter_name_counts(self, limit=None):
+        """
+        从参数统计表读取各参数名称的数量
+        
+        参数:
+            limit (int, optional): 只返回数量最多的前N个
             
-            # 构建统计结果
-            stats = {
-                'total_parameters': total_params,
-                'by_category': {cat: count for cat, count in category_counts},
-                'by_unit': {unit: count for unit, count in unit_counts},
-                'common_parameters': {name: count for name, count in common_params}
-            }
-            
-            return stats
+        返回:
+            list: (parameter_name, count) 元组列表，按数量从多到少排序
+        """
+        with self.get_session() as session:
+            q = session.query(
+                ParameterStatistic.key.label('parameter_name'),
+                ParameterStatistic.count.label('count')
+            ).filter(ParameterStatistic.dimension == 'parameter_name').order_by(
+                ParameterStatistic.count.desc(), ParameterStatistic.key
+            )
+            if limit:
+                q = q.limit(limit)
+            return q.all()
     
     def export_parameters_to_csv(self, output_file, filter_criteria=None):
         """
@@ -726,30 +1377,7 @@ class DatabaseManager:
         返回:
             str: 参数类别
         """
-        parameter_name = parameter_name.lower()
-        
-        # 激光参数
-        if any(term in parameter_name for term in ['laser', 'wavelength', 'pulse', 'intensity', 'power', 'energy', 'contrast', 'focal']):
-            return 'laser'
-        
-        # 等离子体参数
-        elif any(term in parameter_name for term in ['plasma', 'density', 'gas', 'ionization', 'temp']):
-            return 'plasma'
-        
-        # 电子束参数
-        elif any(term in parameter_name for term in ['electron', 'beam', 'charge', 'emittance', 'divergence', 'energy']):
-            return 'electron_beam'
-        
-        # 加速场参数
-        elif any(term in parameter_name for term in ['field', 'gradient', 'acceleration', 'electric']):
-            return 'acceleration_field'
-        
-        # 实验装置参数
-        elif any(term in parameter_name for term in ['setup', 'diagnostic', 'detector', 'camera', 'spectrometer']):
-            return 'experimental_setup'
-        
-        # 默认分类
-        return 'other'
+        return categorize_parameter_name(parameter_name)
 
 
 # 主函数
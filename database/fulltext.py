@@ -0,0 +1,287 @@
+"""
+全文检索模块
+
+为论文和参数表建立全文索引，替代跨多个字段的 LIKE '%q%' 扫描：
+- SQLite: FTS5外部内容虚拟表，通过触发器与原表保持同步，按bm25排序
+- PostgreSQL: tsvector生成列 + GIN索引，按ts_rank排序
+
+其他数据库不支持时返回False，调用方应回退到LIKE查询
+"""
+
+import re
+import logging
+
+from sqlalchemy import text, column, bindparam
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# 需要建立全文索引的表及字段
+# weights: SQLite bm25的字段权重；pg_weights: PostgreSQL setweight的权重标签（A最高）
+FULLTEXT_TABLES = {
+    'papers': {
+        'columns': ['title', 'abstract', 'authors', 'categories'],
+        'weights': [10.0, 1.0, 2.0, 1.0],
+        'pg_weights': ['A', 'C', 'B', 'D'],
+    },
+    'laser_parameters': {
+        'columns': ['parameter_name', 'value', 'unit', 'context', 'category'],
+        'weights': [5.0, 2.0, 2.0, 1.0, 1.0],
+        'pg_weights': ['A', 'B', 'B', 'D', 'C'],
+    },
+}
+
+# PostgreSQL中保存tsvector的生成列名
+PG_VECTOR_COLUMN = 'search_vector'
+
+# 查询词：只保留字母数字，避免用户输入中的引号、括号等被解释为查询语法
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# 单次查询最多使用的词数
+MAX_QUERY_TOKENS = 16
+
+
+def tokenize_query(query):
+    """
+    将用户输入拆分为查询词
+
+    参数:
+        query (str): 用户输入的搜索关键词
+
+    返回:
+        list: 查询词列表（小写）
+    """
+    if not query:
+        return []
+    return [token.lower() for token in _TOKEN_RE.findall(query)][:MAX_QUERY_TOKENS]
+
+
+def _fts_table(table):
+    return f"{table}_fts"
+
+
+def _sqlite_match_expression(tokens, columns=None):
+    # 每个词都做前缀匹配，多个词之间为AND关系
+    expression = " AND ".join(f'"{token}"*' for token in tokens)
+    if columns:
+        expression = "{%s} : (%s)" % (" ".join(columns), expression)
+    return expression
+
+
+def _pg_tsquery(tokens, weights=None):
+    # 前缀匹配，可通过权重标签限制在指定字段
+    suffix = ":*" + "".join(sorted(set(weights))) if weights else ":*"
+    return " & ".join(f"{token}{suffix}" for token in tokens)
+
+
+def _pg_weights_for(table, columns):
+    config = FULLTEXT_TABLES[table]
+    return [config['pg_weights'][config['columns'].index(name)] for name in columns]
+
+
+def _sqlite_has_table(conn, name):
+    return conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": name}
+    ).first() is not None
+
+
+def _setup_sqlite(engine):
+    with engine.begin() as conn:
+        for table, config in FULLTEXT_TABLES.items():
+            if not _sqlite_has_table(conn, table):
+                continue
+
+            fts = _fts_table(table)
+            columns = ", ".join(config['columns'])
+            new_values = ", ".join(f"new.{name}" for name in config['columns'])
+            old_values = ", ".join(f"old.{name}" for name in config['columns'])
+            created = not _sqlite_has_table(conn, fts)
+
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                f"{columns}, content='{table}', content_rowid='id')"
+            ))
+
+            # 外部内容表需要通过触发器同步，删除时要提供旧值
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+            ))
+            # 只在被索引的字段变化时更新（处理状态、文件路径等更新不触发重建）
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {columns} ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+                f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+            ))
+
+            if created:
+                # 新建索引时导入已有数据
+                conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+                logger.info(f"已创建全文索引: {fts}")
+
+
+def _setup_postgresql(engine):
+    with engine.begin() as conn:
+        for table, config in FULLTEXT_TABLES.items():
+            vector = " || ".join(
+                f"setweight(to_tsvector('simple', coalesce({name}, '')), '{weight}')"
+                for name, weight in zip(config['columns'], config['pg_weights'])
+            )
+            # 生成列由数据库自动维护，插入和更新时无需额外处理（需要PostgreSQL 12+）
+            conn.execute(text(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {PG_VECTOR_COLUMN} tsvector "
+                f"GENERATED ALWAYS AS ({vector}) STORED"
+            ))
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_{PG_VECTOR_COLUMN} ON {table} USING GIN ({PG_VECTOR_COLUMN})"
+            ))
+
+
+def setup_fulltext(engine):
+    """
+    创建全文索引（幂等，已存在时不做任何修改）
+
+    PostgreSQL上添加生成列会重写表并持有排他锁，SQLite上新建索引会导入全部已有数据，
+    因此只在迁移脚本（database/migrate_db.py）中调用，应用进程启动时使用has_fulltext检查
+
+    参数:
+        engine: SQLAlchemy引擎
+
+    返回:
+        bool: 当前数据库是否可以使用全文检索
+    """
+    dialect = engine.dialect.name
+
+    try:
+        if dialect == 'sqlite':
+            _setup_sqlite(engine)
+        elif dialect == 'postgresql':
+            _setup_postgresql(engine)
+        else:
+            logger.info(f"{dialect}不支持全文索引，搜索将使用LIKE查询")
+            return False
+    except Exception as e:
+        logger.warning(f"创建全文索引失败，搜索将使用LIKE查询: {str(e)}")
+        return False
+
+    return True
+
+
+def has_fulltext(engine):
+    """
+    检查全文索引是否已经创建（只读查询，不执行DDL，可以在每个进程启动时调用）
+
+    参数:
+        engine: SQLAlchemy引擎
+
+    返回:
+        bool: 所有需要全文索引的表都已建立索引时为True
+    """
+    dialect = engine.dialect.name
+
+    try:
+        with engine.connect() as conn:
+            if dialect == 'sqlite':
+                return all(_sqlite_has_table(conn, _fts_table(table)) for table in FULLTEXT_TABLES)
+            if dialect == 'postgresql':
+                found = conn.execute(text(
+                    "SELECT count(*) FROM information_schema.columns "
+                    "WHERE table_schema = current_schema() AND column_name = :column AND table_name IN :tables"
+                ).bindparams(bindparam('tables', expanding=True)),
+                    {"column": PG_VECTOR_COLUMN, "tables": list(FULLTEXT_TABLES)}).scalar()
+                return found == len(FULLTEXT_TABLES)
+    except Exception as e:
+        logger.warning(f"检查全文索引失败，搜索将使用LIKE查询: {str(e)}")
+    return False
+
+
+def rebuild_fulltext(engine):
+    """
+    根据原表重建SQLite全文索引（PostgreSQL的生成列无需重建）
+
+    参数:
+        engine: SQLAlchemy引擎
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    with engine.begin() as conn:
+        for table in FULLTEXT_TABLES:
+            fts = _fts_table(table)
+            if _sqlite_has_table(conn, fts):
+                conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+                logger.info(f"已重建全文索引: {fts}")
+
+
+def match_ids_select(dialect, table, query, columns=None):
+    """
+    构造返回匹配行id的子查询，可用于 Model.id.in_(...)
+
+    参数:
+        dialect (str): 数据库方言名称
+        table (str): 表名，必须在FULLTEXT_TABLES中
+        query (str): 搜索关键词
+        columns (list, optional): 只在指定字段中匹配
+
+    返回:
+        TextualSelect: 子查询；查询词为空时返回None
+    """
+    tokens = tokenize_query(query)
+    if not tokens:
+        return None
+
+    if dialect == 'sqlite':
+        fts = _fts_table(table)
+        sql = text(f"SELECT rowid AS id FROM {fts} WHERE {fts} MATCH :fts_query")
+        sql = sql.bindparams(fts_query=_sqlite_match_expression(tokens, columns))
+    else:
+        weights = _pg_weights_for(table, columns) if columns else None
+        sql = text(f"SELECT id FROM {table} WHERE {PG_VECTOR_COLUMN} @@ to_tsquery('simple', :fts_query)")
+        sql = sql.bindparams(fts_query=_pg_tsquery(tokens, weights))
+
+    return sql.columns(column('id'))
+
+
+def ranked_ids_select(dialect, table, query, limit=100, offset=0):
+    """
+    构造按相关度取一页匹配行的子查询，返回id和rank两列（rank越小越相关）
+
+    可以与原表连接后按rank排序，在一次查询中完成检索和加载
+
+    参数:
+        dialect (str): 数据库方言名称
+        table (str): 表名，必须在FULLTEXT_TABLES中
+        query (str): 搜索关键词
+        limit (int): 最大返回数量
+        offset (int): 结果偏移量
+
+    返回:
+        TextualSelect: 子查询；查询词为空时返回None
+    """
+    tokens = tokenize_query(query)
+    if not tokens:
+        return None
+
+    if dialect == 'sqlite':
+        fts = _fts_table(table)
+        weights = ", ".join(str(weight) for weight in FULLTEXT_TABLES[table]['weights'])
+        sql = text(
+            f"SELECT rowid AS id, bm25({fts}, {weights}) AS rank FROM {fts} "
+            f"WHERE {fts} MATCH :fts_query ORDER BY rank LIMIT :fts_limit OFFSET :fts_offset"
+        )
+        fts_query = _sqlite_match_expression(tokens)
+    else:
+        sql = text(
+            f"SELECT id, -ts_rank({PG_VECTOR_COLUMN}, to_tsquery('simple', :fts_query)) AS rank FROM {table} "
+            f"WHERE {PG_VECTOR_COLUMN} @@ to_tsquery('simple', :fts_query) "
+            f"ORDER BY rank, id LIMIT :fts_limit OFFSET :fts_offset"
+        )
+        fts_query = _pg_tsquery(tokens)
+
+    sql = sql.bindparams(fts_query=fts_query, fts_limit=limit, fts_offset=offset)
+    return sql.columns(column('id'), column('rank'))
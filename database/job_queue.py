@@ -0,0 +1,434 @@
+"""
+持久化任务队列
+
+任务保存在数据库的jobs表中，由独立的worker进程领取执行（见worker/run_worker.py）：
+- 领取任务时设置租约，worker执行期间定期续约（心跳）
+- worker异常退出后租约过期，任务自动重新排队或标记为失败
+- 失败的任务按指数退避重试，超过最大次数后标记为失败并同步更新关联的处理记录
+
+任务至少执行一次：worker在任务完成前退出时，任务会被其他worker重新执行
+"""
+
+import os
+import json
+import logging
+import datetime
+
+from sqlalchemy import and_, exists
+
+from .models import Job, ProcessingRecord
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# 任务状态
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+
+ACTIVE_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+# 重试退避的最长等待时间（秒）
+MAX_RETRY_DELAY = 300
+
+
+class JobCancelled(Exception):
+    """任务已被取消或租约已被其他worker接管"""
+    pass
+
+
+class JobQueue:
+    """
+    基于数据库的任务队列
+    """
+
+    def __init__(self, db_manager, lease_seconds=None):
+        """
+        初始化任务队列
+
+        参数:
+            db_manager (DatabaseManager): 数据库管理器
+            lease_seconds (float, optional): 任务租约时长（秒），默认读取环境变量JOB_LEASE_SECONDS
+        """
+        self.db_manager = db_manager
+        self.lease_seconds = lease_seconds or float(os.environ.get('JOB_LEASE_SECONDS', 120))
+
+    def enqueue(self, job_type, payload=None, paper_id=None, record_id=None, priority=0, max_attempts=3):
+        """
+        添加任务
+
+        参数:
+            job_type (str): 任务类型
+            payload (dict, optional): 任务参数，必须可以序列化为JSON
+            paper_id (int, optional): 关联的论文ID
+            record_id (int, optional): 关联的处理记录ID，任务最终失败时该记录会被标记为失败
+            priority (int): 优先级，数值越大越先执行
+            max_attempts (int): 最大执行次数
+
+        返回:
+            int: 任务ID
+        """
+        with self.db_manager.get_session() as session:
+            job = Job(
+                job_type=job_type,
+                payload=json.dumps(payload or {}, ensure_ascii=False),
+                status=JOB_QUEUED,
+                priority=priority,
+                paper_id=paper_id,
+                record_id=record_id,
+                attempts=0,
+                max_attempts=max_attempts,
+                created_at=datetime.datetime.utcnow()
+            )
+            session.add(job)
+            session.commit()
+            job_id = job.id
+
+        logger.info(f"[任务队列] 已添加任务 {job_id}: {job_type}")
+        return job_id
+
+    def claim(self, worker_id, job_types=None):
+        """
+        领取一个可执行的任务
+
+        参数:
+            worker_id (str): worker标识，作为租约持有者
+            job_types (list, optional): 只领取指定类型的任务
+
+        返回:
+            dict: 任务信息（包含解析后的payload），没有可执行的任务时返回None
+        """
+        dialect = self.db_manager.engine.dialect.name
+
+        # 其他worker同时领取到同一个任务时重试几次
+        for _ in range(3):
+            now = datetime.datetime.utcnow()
+
+            with self.db_manager.get_session() as session:
+                q = session.query(Job.id).filter(
+                    Job.status == JOB_QUEUED,
+                    (Job.run_after.is_(None)) | (Job.run_after <= now)
+                )
+                if job_types:
+                    q = q.filter(Job.job_type.in_(list(job_types)))
+                q = q.order_by(Job.priority.desc(), Job.id)
+
+                if dialect == 'postgresql':
+                    # 跳过其他worker正在领取的行，避免相互等待
+                    q = q.with_for_update(skip_locked=True)
+
+                row = q.first()
+                if not row:
+                    return None
+
+                # 条件更新保证同一个任务只会被一个worker领取
+                claimed = session.query(Job).filter(
+                    Job.id == row.id, Job.status == JOB_QUEUED
+                ).update({
+                    Job.status: JOB_RUNNING,
+                    Job.lease_owner: worker_id,
+                    Job.lease_expires_at: now + datetime.timedelta(seconds=self.lease_seconds),
+                    Job.heartbeat_at: now,
+                    Job.started_at: now,
+                    Job.attempts: Job.attempts + 1
+                }, synchronize_session=False)
+                session.commit()
+
+                if claimed:
+                    return self.get_job(row.id)
+
+        return None
+
+    def heartbeat(self, job_id, worker_id):
+        """
+        续约任务
+
+        参数:
+            job_id (int): 任务ID
+            worker_id (str): worker标识
+
+        返回:
+            bool: 是否续约成功；任务已被取消或被其他worker接管时返回False
+        """
+        now = datetime.datetime.utcnow()
+        with self.db_manager.get_session() as session:
+            updated = session.query(Job).filter(
+                Job.id == job_id, Job.status == JOB_RUNNING, Job.lease_owner == worker_id
+            ).update({
+                Job.heartbeat_at: now,
+                Job.lease_expires_at: now + datetime.timedelta(seconds=self.lease_seconds)
+            }, synchronize_session=False)
+            session.commit()
+        return bool(updated)
+
+    def update_progress(self, job_id, worker_id, progress):
+        """
+        保存执行中任务的进度（写入result字段，任务完成时被最终结果覆盖）
+
+        参数:
+            job_id (int): 任务ID
+            worker_id (str): worker标识
+            progress (dict): 进度信息
+
+        返回:
+            bool: 是否更新成功
+        """
+        with self.db_manager.get_session() as session:
+            updated = session.query(Job).filter(
+                Job.id == job_id, Job.status == JOB_RUNNING, Job.lease_owner == worker_id
+            ).update({
+                Job.result: json.dumps(progress, ensure_ascii=False)
+            }, synchronize_session=False)
+            session.commit()
+        return bool(updated)
+
+    def complete(self, job_id, worker_id, result=None):
+        """
+        标记任务成功
+
+        参数:
+            job_id (int): 任务ID
+            worker_id (str): worker标识
+            result (dict, optional): 任务结果
+
+        返回:
+            bool: 是否更新成功；租约已失效时返回False
+        """
+        with self.db_manager.get_session() as session:
+            updated = session.query(Job).filter(
+                Job.id == job_id, Job.status == JOB_RUNNING, Job.lease_owner == worker_id
+            ).update({
+                Job.status: JOB_SUCCEEDED,
+                Job.result: json.dumps(result, ensure_ascii=False) if result is not None else None,
+                Job.error: None,
+                Job.lease_owner: None,
+                Job.lease_expires_at: None,
+                Job.finished_at: datetime.datetime.utcnow()
+            }, synchronize_session=False)
+            session.commit()
+        return bool(updated)
+
+    def fail(self, job_id, worker_id, error, retry=True):
+        """
+        标记任务失败，未超过最大执行次数时按指数退避重新排队
+
+        参数:
+            job_id (int): 任务ID
+            worker_id (str): worker标识
+            error (str): 错误信息
+            retry (bool): 是否允许重试
+
+        返回:
+            str: 任务的新状态；租约已失效时返回None
+        """
+        now = datetime.datetime.utcnow()
+        with self.db_manager.get_session() as session:
+            job = session.query(Job).filter(
+                Job.id == job_id, Job.status == JOB_RUNNING, Job.lease_owner == worker_id
+            ).first()
+            if not job:
+                return None
+
+            job.error = str(error)
+            job.lease_owner = None
+            job.lease_expires_at = None
+
+            if retry and (job.attempts or 0) < (job.max_attempts or 1):
+                job.status = JOB_QUEUED
+                job.run_after = now + datetime.timedelta(seconds=self._retry_delay(job.attempts))
+                logger.warning(f"[任务队列] 任务 {job_id} 第 {job.attempts} 次执行失败，稍后重试: {error}")
+            else:
+                job.status = JOB_FAILED
+                job.finished_at = now
+                self._fail_record(session, job.record_id, f"任务执行失败: {error}")
+                logger.error(f"[任务队列] 任务 {job_id} 执行失败: {error}")
+
+            status = job.status
+            session.commit()
+        return status
+
+    def cancel(self, job_id=None, record_id=None, paper_id=None):
+        """
+        取消排队中或执行中的任务（执行中的任务会在下次心跳时停止）
+
+        参数:
+            job_id (int, optional): 任务ID
+            record_id (int, optional): 取消关联该处理记录的任务
+            paper_id (int, optional): 取消关联该论文的任务
+
+        返回:
+            int: 取消的任务数量
+        """
+        if job_id is None and record_id is None and paper_id is None:
+            return 0
+
+        with self.db_manager.get_session() as session:
+            q = session.query(Job).filter(Job.status.in_(ACTIVE_STATUSES))
+            if job_id is not None:
+                q = q.filter(Job.id == job_id)
+            if record_id is not None:
+                q = q.filter(Job.record_id == record_id)
+            if paper_id is not None:
+                q = q.filter(Job.paper_id == paper_id)
+
+            cancelled = q.update({
+                Job.status: JOB_CANCELLED,
+                Job.lease_owner: None,
+                Job.lease_expires_at: None,
+                Job.finished_at: datetime.datetime.utcnow()
+            }, synchronize_session=False)
+            session.commit()
+
+        if cancelled:
+            logger.info(f"[任务队列] 已取消 {cancelled} 个任务")
+        return cancelled
+
+    def requeue_expired(self):
+        """
+        处理租约过期的任务（worker已退出）：未超过最大执行次数的重新排队，否则标记为失败
+
+        返回:
+            tuple: (重新排队的任务数, 标记为失败的任务数)
+        """
+        now = datetime.datetime.utcnow()
+        requeued = 0
+        failed = 0
+
+        with self.db_manager.get_session() as session:
+            jobs = session.query(Job).filter(
+                Job.status == JOB_RUNNING, Job.lease_expires_at < now
+            ).with_for_update().all()
+
+            for job in jobs:
+                logger.warning(f"[任务队列] 任务 {job.id} 的租约已过期（worker: {job.lease_owner}）")
+                job.lease_owner = None
+                job.lease_expires_at = None
+
+                if (job.attempts or 0) < (job.max_attempts or 1):
+                    job.status = JOB_QUEUED
+                    requeued += 1
+                else:
+                    job.status = JOB_FAILED
+                    job.error = "worker中断，超过最大执行次数"
+                    job.finished_at = now
+                    self._fail_record(session, job.record_id, "任务中断: worker退出且超过最大执行次数")
+                    failed += 1
+
+            session.commit()
+
+        return requeued, failed
+
+    def fail_orphaned_records(self, grace_seconds=None):
+        """
+        将没有对应活动任务的pending参数提取记录标记为失败（如旧版本的后台线程被中断后遗留的记录）
+
+        参数:
+            grace_seconds (float, optional): 只处理创建时间早于该秒数的记录，默认为租约时长的两倍
+
+        返回:
+            int: 标记为失败的记录数
+        """
+        grace_seconds = grace_seconds if grace_seconds is not None else self.lease_seconds * 2
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=grace_seconds)
+
+        active_job = exists().where(and_(
+            Job.record_id == ProcessingRecord.id,
+            Job.status.in_(ACTIVE_STATUSES)
+        ))
+
+        with self.db_manager.get_session() as session:
+            orphaned = session.query(ProcessingRecord).filter(
+                ProcessingRecord.process_type == "parameter_extraction",
+                ProcessingRecord.status == "pending",
+                ProcessingRecord.created_at < cutoff,
+                ~active_job
+            ).update({
+                ProcessingRecord.status: "failed",
+                ProcessingRecord.message: "任务中断，请重新提取",
+                ProcessingRecord.updated_at: datetime.datetime.utcnow()
+            }, synchronize_session=False)
+            session.commit()
+
+        if orphaned:
+            logger.warning(f"[任务队列] 已将 {orphaned} 个中断的处理记录标记为失败")
+        return orphaned
+
+    def get_job(self, job_id):
+        """
+        获取任务信息
+
+        参数:
+            job_id (int): 任务ID
+
+        返回:
+            dict: 任务信息，不存在时返回None
+        """
+        with self.db_manager.get_session() as session:
+            job = session.query(Job).filter_by(id=job_id).first()
+            if not job:
+                return None
+
+            return {
+                'id': job.id,
+                'job_type': job.job_type,
+                'payload': json.loads(job.payload) if job.payload else {},
+                'status': job.status,
+                'priority': job.priority,
+                'paper_id': job.paper_id,
+                'record_id': job.record_id,
+                'attempts': job.attempts,
+                'max_attempts': job.max_attempts,
+                'lease_owner': job.lease_owner,
+                'lease_expires_at': job.lease_expires_at,
+                'result': json.loads(job.result) if job.result else None,
+                'error': job.error,
+                'created_at': job.created_at,
+                'started_at': job.started_at,
+                'finished_at': job.finished_at
+            }
+
+    def get_latest_job(self, job_type):
+        """
+        获取指定类型最近添加的任务
+
+        参数:
+            job_type (str): 任务类型
+
+        返回:
+            dict: 任务信息，不存在时返回None
+        """
+        with self.db_manager.get_session() as session:
+            row = session.query(Job.id).filter(Job.job_type == job_type).order_by(Job.id.desc()).first()
+        return self.get_job(row.id) if row else None
+
+    def count_by_status(self):
+        """
+        统计各状态的任务数量
+
+        返回:
+            dict: 状态到数量的映射
+        """
+        from sqlalchemy import func
+
+        with self.db_manager.get_session() as session:
+            rows = session.query(Job.status, func.count(Job.id)).group_by(Job.status).all()
+        return {status: count for status, count in rows}
+
+    def _retry_delay(self, attempts):
+        return min(MAX_RETRY_DELAY, 10 * 2 ** max(0, (attempts or 1) - 1))
+
+    def _fail_record(self, session, record_id, message):
+        """任务最终失败时，将仍处于pending状态的关联处理记录标记为失败"""
+        if record_id is None:
+            return
+
+        session.query(ProcessingRecord).filter(
+            ProcessingRecord.id == record_id, ProcessingRecord.status == "pending"
+        ).update({
+            ProcessingRecord.status: "failed",
+            ProcessingRecord.message: message,
+            ProcessingRecord.updated_at: datetime.datetime.utcnow()
+        }, synchronize_session=False)
@@ -149,6 +149,202 @@ def migrate_papers_add_doi():
         logger.error(f"迁移失败: {str(e)}")
         return False
 
+def get_default_db_url():
+    """
+    获取默认的数据库URL：优先使用环境变量DB_URL，否则使用项目根目录下的laser_papers.db
+    """
+    db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../laser_papers.db')
+    return os.environ.get('DB_URL', f"sqlite:///{os.path.abspath(db_path)}")
+
+def migrate_laser_parameters_add_numeric(db_url=None):
+    """
+    迁移laser_parameters表，添加归一化数值字段value_numeric和unit_canonical
+    
+    参数:
+        db_url (str, optional): 数据库URL，默认使用get_default_db_url()
+        
+    返回:
+        bool: 迁移是否成功
+    """
+    from sqlalchemy import create_engine, inspect, text
+    
+    db_url = db_url or get_default_db_url()
+    
+    try:
+        engine = create_engine(db_url)
+        inspector = inspect(engine)
+        
+        if not inspector.has_table('laser_parameters'):
+            logger.warning("laser_parameters表不存在，无需迁移")
+            engine.dispose()
+            return True
+        
+        columns = {column['name'] for column in inspector.get_columns('laser_parameters')}
+        float_type = "DOUBLE PRECISION" if engine.dialect.name == 'postgresql' else "FLOAT"
+        
+        with engine.begin() as conn:
+            for name, column_type in (('value_numeric', float_type), ('unit_canonical', 'VARCHAR(50)')):
+                if name in columns:
+                    logger.info(f"{name}字段已存在，无需迁移")
+                    continue
+                
+                logger.info(f"开始添加{name}字段到laser_parameters表...")
+                conn.execute(text(f"ALTER TABLE laser_parameters ADD COLUMN {name} {column_type}"))
+        
+        engine.dispose()
+        logger.info("laser_parameters表添加归一化数值字段完成")
+        return True
+        
+    except Exception as e:
+        logger.error(f"迁移失败: {str(e)}")
+        return False
+
+def migrate_backfill_normalized_values(db_url=None):
+    """
+    为已有参数计算归一化数值，需要在migrate_laser_parameters_add_numeric之后执行
+    
+    参数:
+        db_url (str, optional): 数据库URL，默认使用get_default_db_url()
+        
+    返回:
+        bool: 迁移是否成功
+    """
+    from database.db_utils import DatabaseManager
+    
+    try:
+        result = DatabaseManager(db_url or get_default_db_url()).backfill_normalized_values()
+        logger.info(f"归一化数值回填完成: 处理 {result['processed']} 个参数，成功解析 {result['normalized']} 个")
+        return True
+        
+    except Exception as e:
+        logger.error(f"归一化数值回填失败: {str(e)}")
+        return False
+
+def migrate_add_indexes(db_url=None):
+    """
+    为已有数据库创建模型中声明的二级索引
+    
+    只创建缺失的索引。PostgreSQL上使用CREATE INDEX CONCURRENTLY，建索引期间不阻塞读写；
+    SQLite上建索引只短暂持有写锁，读操作不受影响
+    
+    参数:
+        db_url (str, optional): 数据库URL，默认使用get_default_db_url()
+        
+    返回:
+        bool: 迁移是否成功
+    """
+    from sqlalchemy import create_engine, inspect, text
+    from database.models import Base
+    
+    db_url = db_url or get_default_db_url()
+    
+    try:
+        engine = create_engine(db_url)
+        inspector = inspect(engine)
+        dialect = engine.dialect.name
+        success = True
+        
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                logger.info(f"{table.name}表不存在，跳过索引创建")
+                continue
+            
+            existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            
+            for index in table.indexes:
+                if index.name in existing_indexes:
+                    logger.info(f"索引已存在，无需创建: {index.name}")
+                    continue
+                
+                columns = ", ".join(column.name for column in index.columns)
+                logger.info(f"开始创建索引 {index.name} ON {table.name} ({columns})...")
+                
+                try:
+                    if dialect == 'postgresql':
+                        # CONCURRENTLY不能在事务中执行，需要自动提交模式
+                        sql = f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index.name} ON {table.name} ({columns})"
+                        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                            conn.execute(text(sql))
+                    else:
+                        if_not_exists = "IF NOT EXISTS " if dialect == 'sqlite' else ""
+                        sql = f"CREATE INDEX {if_not_exists}{index.name} ON {table.name} ({columns})"
+                        with engine.begin() as conn:
+                            conn.execute(text(sql))
+                    
+                    logger.info(f"索引创建完成: {index.name}")
+                except Exception as e:
+                    success = False
+                    logger.error(f"创建索引 {index.name} 失败: {str(e)}")
+        
+        engine.dispose()
+        return success
+        
+    except Exception as e:
+        logger.error(f"索引迁移失败: {str(e)}")
+        return False
+
+def migrate_add_fulltext(db_url=None, rebuild=False):
+    """
+    为已有数据库创建全文索引（SQLite FTS5 / PostgreSQL tsvector）
+    
+    新建的FTS5索引会自动导入已有数据；PostgreSQL添加生成列时会重写表，数据量大时耗时较长
+    
+    参数:
+        db_url (str, optional): 数据库URL，默认使用get_default_db_url()
+        rebuild (bool): 是否根据原表重建已有的SQLite全文索引
+        
+    返回:
+        bool: 迁移是否成功
+    """
+    from sqlalchemy import create_engine
+    from database.fulltext import setup_fulltext, rebuild_fulltext
+    
+    db_url = db_url or get_default_db_url()
+    
+    try:
+        engine = create_engine(db_url)
+        success = setup_fulltext(engine)
+        if success and rebuild:
+            rebuild_fulltext(engine)
+        engine.dispose()
+        
+        if success:
+            logger.info("全文索引迁移完成")
+        return success
+        
+    except Exception as e:
+        logger.error(f"全文索引迁移失败: {str(e)}")
+        return False
+
+def migrate_rebuild_parameter_statistics(db_url=None, force=False):
+    """
+    为已有数据建立参数统计
+    
+    统计表在写入参数时增量更新，只有从旧版本升级（统计表为空而参数表有数据）或数据被外部修改后才需要重建
+    
+    参数:
+        db_url (str, optional): 数据库URL，默认使用get_default_db_url()
+        force (bool): 统计已存在时是否也重建
+        
+    返回:
+        bool: 迁移是否成功
+    """
+    from database.db_utils import DatabaseManager
+    
+    try:
+        db_manager = DatabaseManager(db_url or get_default_db_url())
+        if not force and not db_manager.parameter_statistics_missing():
+            logger.info("参数统计已存在，无需重建")
+            return True
+        
+        total = db_manager.rebuild_parameter_statistics()
+        logger.info(f"参数统计重建完成: {total} 个参数")
+        return True
+        
+    except Exception as e:
+        logger.error(f"参数统计重建失败: {str(e)}")
+        return False
+
 if __name__ == "__main__":
     # 运行迁移
     print("开始执行数据库迁移...")
@@ -159,7 +355,23 @@ if __name__ == "__main__":
     # 迁移papers表添加doi字段
     papers_doi_success = migrate_papers_add_doi()
     
-    if processing_records_success and papers_doi_success:
+    # 迁移laser_parameters表添加归一化数值字段
+    numeric_success = migrate_laser_parameters_add_numeric()
+    
+    # 创建二级索引
+    indexes_success = migrate_add_indexes()
+    
+    # 回填归一化数值
+    backfill_success = numeric_success and migrate_backfill_normalized_values()
+    
+    # 从旧版本升级时建立参数统计
+    statistics_success = migrate_rebuild_parameter_statistics()
+    
+    # 创建全文索引
+    fulltext_success = migrate_add_fulltext()
+    
+    if (processing_records_success and papers_doi_success and numeric_success and indexes_success
+            and backfill_success and statistics_success and fulltext_success):
         print("迁移成功完成")
     else:
         print("迁移失败，请检查日志") 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import create_engine, Column, Integer, String, Float, Text, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
 import datetime
@@ -31,6 +31,12 @@ class Paper(Base):
     # 关系
     parameters = relationship("LaserParameter", back_populates="paper", cascade="all, delete-orphan")
     
+    # 索引：查重时按DOI查询；批量提取时按id顺序扫描未处理的论文
+    __table_args__ = (
+        Index('ix_papers_doi', 'doi'),
+        Index('ix_papers_processed_id', 'processed', 'id'),
+    )
+    
     def __repr__(self):
         return f"<Paper(arxiv_id='{self.arxiv_id}', title='{self.title[:30]}...')>"
 
@@ -56,12 +62,23 @@ class LaserParameter(Base):
     # 分类信息
     category = Column(String(50))  # 如激光参数、等离子体参数、电子束参数等
     
+    # 归一化数值：value换算为国际单位制后的数值和规范单位（如 1e18 cm^-3 -> 1e24, "m^-3"），无法解析时为空
+    value_numeric = Column(Float)
+    unit_canonical = Column(String(50))
+    
     # 元数据
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     
     # 关系
     paper = relationship("Paper", back_populates="parameters")
     
+    # 索引：按论文获取参数、按类别和参数名称筛选统计、按单位和数值范围查询
+    __table_args__ = (
+        Index('ix_laser_parameters_paper_id', 'paper_id'),
+        Index('ix_laser_parameters_category_name', 'category', 'parameter_name'),
+        Index('ix_laser_parameters_unit_value', 'unit_canonical', 'value_numeric'),
+    )
+    
     def __repr__(self):
         return f"<LaserParameter(name='{self.parameter_name}', value='{self.value}', unit='{self.unit}')>"
 
@@ -106,10 +123,81 @@ class ProcessingRecord(Base):
     created_at = Column(DateTime, default=datetime.datetime.utcnow)  # 从started_at改为created_at
     updated_at = Column(DateTime)  # 从completed_at改为updated_at
     
+    # 索引：查询论文某类处理任务的状态（如pending的参数提取）
+    __table_args__ = (
+        Index('ix_processing_records_paper_type_status', 'paper_id', 'process_type', 'status'),
+    )
+    
     def __repr__(self):
         return f"<ProcessingRecord(paper_id={self.paper_id}, type='{self.process_type}', status='{self.status}')>"
 
 
+class Job(Base):
+    """
+    后台任务队列表，保存参数提取、论文爬取和导入等任务，由独立的worker进程领取执行
+    """
+    __tablename__ = 'jobs'
+    
+    id = Column(Integer, primary_key=True)
+    job_type = Column(String(50), nullable=False)  # 如"parameter_extraction"、"crawl"、"import"
+    payload = Column(Text)  # JSON格式的任务参数
+    status = Column(String(20), nullable=False, default='queued')  # queued、running、succeeded、failed、cancelled
+    priority = Column(Integer, default=0)  # 数值越大越先执行
+    
+    # 关联的论文和处理记录（可为空），用于取消任务和清理中断的处理记录
+    paper_id = Column(Integer, ForeignKey('papers.id'))
+    record_id = Column(Integer, ForeignKey('processing_records.id'))
+    
+    # 重试
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    run_after = Column(DateTime)  # 重试退避期间不会被领取
+    
+    # 租约：worker领取任务后定期续约，租约过期说明worker已退出，任务会被重新排队
+    lease_owner = Column(String(100))
+    lease_expires_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)
+    
+    # 结果
+    result = Column(Text)
+    error = Column(Text)
+    
+    # 时间信息
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    
+    # 索引：按状态和优先级领取任务、查找租约过期的任务、按处理记录查找任务
+    __table_args__ = (
+        Index('ix_jobs_status_priority', 'status', 'priority', 'id'),
+        Index('ix_jobs_status_lease', 'status', 'lease_expires_at'),
+        Index('ix_jobs_record_id', 'record_id'),
+    )
+    
+    def __repr__(self):
+        return f"<Job(id={self.id}, type='{self.job_type}', status='{self.status}')>"
+
+
+class ParameterStatistic(Base):
+    """
+    参数统计表，按维度（总数、类别、单位、参数名称）保存参数数量，
+    写入和删除参数时增量更新，仪表盘读取时无需扫描laser_parameters表
+    """
+    __tablename__ = 'parameter_statistics'
+    
+    dimension = Column(String(20), primary_key=True)  # 如"total"、"category"、"unit"、"parameter_name"
+    key = Column(String(100), primary_key=True)  # 维度取值，空值保存为空字符串
+    count = Column(Integer, nullable=False, default=0)
+    
+    # 索引：按维度取数量最多的前N项
+    __table_args__ = (
+        Index('ix_parameter_statistics_dimension_count', 'dimension', 'count'),
+    )
+    
+    def __repr__(self):
+        return f"<ParameterStatistic(dimension='{self.dimension}', key='{self.key}', count={self.count})>"
+
+
 # 创建数据库引擎和会话工厂
 def get_engine(db_url='sqlite:///laser_papers.db'):
     """
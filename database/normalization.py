@@ -0,0 +1,276 @@
+"""
+参数数值归一化模块
+
+将LLM提取的字符串数值（如"1e18"、"10^19"、"2×10^18"、"~5-10"）解析为浮点数，
+并将自由书写的单位（如"cm⁻³"、"cm^-3"、"mJ/cm2"、"MeV"）换算为国际单位制基本单位，
+使参数可以在数据库中按数值筛选和排序
+"""
+
+import re
+import math
+from functools import lru_cache
+
+# 国际单位制词头
+SI_PREFIXES = {
+    'Y': 1e24, 'Z': 1e21, 'E': 1e18, 'P': 1e15, 'T': 1e12, 'G': 1e9, 'M': 1e6, 'k': 1e3,
+    'h': 1e2, 'd': 1e-1, 'c': 1e-2, 'm': 1e-3, 'u': 1e-6, 'n': 1e-9, 'p': 1e-12,
+    'f': 1e-15, 'a': 1e-18, 'z': 1e-21, 'y': 1e-24,
+}
+
+# 规范单位中基本单位的排列顺序（rad单独作为一个量纲，避免角度和无量纲比值混在一起）
+BASE_UNITS = ['kg', 'm', 's', 'A', 'K', 'mol', 'cd', 'rad']
+
+_ELEMENTARY_CHARGE = 1.602176634e-19
+
+# 单位符号 -> (换算到基本单位的系数, {基本单位: 指数})
+UNITS = {
+    'm': (1.0, {'m': 1}),
+    'g': (1e-3, {'kg': 1}),
+    's': (1.0, {'s': 1}),
+    'A': (1.0, {'A': 1}),
+    'K': (1.0, {'K': 1}),
+    'mol': (1.0, {'mol': 1}),
+    'cd': (1.0, {'cd': 1}),
+    'rad': (1.0, {'rad': 1}),
+    'deg': (math.pi / 180, {'rad': 1}),
+    '°': (math.pi / 180, {'rad': 1}),
+    'Hz': (1.0, {'s': -1}),
+    'N': (1.0, {'kg': 1, 'm': 1, 's': -2}),
+    'Pa': (1.0, {'kg': 1, 'm': -1, 's': -2}),
+    'bar': (1e5, {'kg': 1, 'm': -1, 's': -2}),
+    'Torr': (101325 / 760, {'kg': 1, 'm': -1, 's': -2}),
+    'atm': (101325.0, {'kg': 1, 'm': -1, 's': -2}),
+    'J': (1.0, {'kg': 1, 'm': 2, 's': -2}),
+    'eV': (_ELEMENTARY_CHARGE, {'kg': 1, 'm': 2, 's': -2}),
+    'W': (1.0, {'kg': 1, 'm': 2, 's': -3}),
+    'C': (1.0, {'A': 1, 's': 1}),
+    'V': (1.0, {'kg': 1, 'm': 2, 's': -3, 'A': -1}),
+    'T': (1.0, {'kg': 1, 's': -2, 'A': -1}),
+    'Ω': (1.0, {'kg': 1, 'm': 2, 's': -3, 'A': -2}),
+    'ohm': (1.0, {'kg': 1, 'm': 2, 's': -3, 'A': -2}),
+    'L': (1e-3, {'m': 3}),
+    'l': (1e-3, {'m': 3}),
+    'Å': (1e-10, {'m': 1}),
+    'min': (60.0, {'s': 1}),
+    'h': (3600.0, {'s': 1}),
+    '%': (1e-2, {}),
+}
+
+# 不加词头的单位（避免"min"被解析为"毫in"之类的误判）
+_UNPREFIXED_UNITS = {'deg', '°', 'min', 'h', '%', 'atm', 'Torr', 'Å', 'mol', 'cd'}
+
+# 常见写法的别名
+_UNIT_ALIASES = {
+    'sec': 's', 'secs': 's', 'degree': 'deg', 'degrees': 'deg', 'ohms': 'ohm',
+    'ev': 'eV', 'kev': 'keV', 'mev': 'MeV', 'gev': 'GeV', 'tev': 'TeV',
+    'torr': 'Torr', 'hz': 'Hz', 'khz': 'kHz', 'mhz': 'MHz', 'ghz': 'GHz', 'thz': 'THz',
+}
+
+_SUPERSCRIPTS = str.maketrans('⁰¹²³⁴⁵⁶⁷⁸⁹⁻⁺', '0123456789-+')
+
+# 单位中的一个因子：符号 + 可选指数（cm^-3、cm-3、cm3、cm**-3、cm^{-3}）
+_UNIT_FACTOR_RE = re.compile(
+    r"\s*([A-Za-zÅΩ°%]+)\s*(?:(?:\^|\*\*)\s*\{?\s*([+-]?\d+)\s*\}?|([+-]?\d+))?\s*"
+)
+
+# 数值：尾数 + 可选的 ×10^n
+_NUMBER_RE = re.compile(
+    r"(?P<mantissa>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)"
+    r"(?:\s*[x×*·]\s*10\s*(?:\^|\*\*)\s*\{?\s*(?P<exponent>[-+]?\d+)\s*\}?)?"
+)
+
+# 直接以10的幂表示的数值：10^19
+_POWER_OF_TEN_RE = re.compile(r"([-+]?)10\s*(?:\^|\*\*)\s*\{?\s*([-+]?\d+)\s*\}?")
+
+# 数值范围的连接符：1-2、1–2、1 to 2、1~2
+_RANGE_SEPARATOR_RE = re.compile(r"\s*(?:-|–|—|~|to)\s*")
+
+# 数值前的近似或比较符号
+_APPROX_PREFIX_RE = re.compile(r"^(?:~|∼|≈|≃|<|>|≤|≥|<=|>=|about|approx\.?|approximately|up to|over)\s*", re.IGNORECASE)
+
+
+def _round_significant(value, digits=12):
+    """去掉换算产生的浮点误差，如 0.01 ** -3 = 999999.9999999999"""
+    return float(f"{value:.{digits}g}")
+
+
+def _normalize_symbols(text):
+    """统一Unicode符号写法"""
+    text = text.replace('−', '-').replace('µ', 'u').replace('μ', 'u').replace('⋅', '·')
+    # 上标指数前补上^，如 cm⁻³ -> cm^-3、10¹⁸ -> 10^18
+    text = re.sub(r"[⁰¹²³⁴⁵⁶⁷⁸⁹⁻⁺]+", lambda m: '^' + m.group(0).translate(_SUPERSCRIPTS), text)
+    return text
+
+
+def _match_number(text, pos):
+    """从指定位置解析一个数值，返回 (数值, 结束位置)，无法解析时返回 (None, pos)"""
+    match = _POWER_OF_TEN_RE.match(text, pos)
+    if match:
+        value = 10.0 ** int(match.group(2))
+        return (-value if match.group(1) == '-' else value), match.end()
+
+    match = _NUMBER_RE.match(text, pos)
+    if not match:
+        return None, pos
+
+    value = float(match.group('mantissa'))
+    if match.group('exponent'):
+        value *= 10.0 ** int(match.group('exponent'))
+    return value, match.end()
+
+
+def parse_numeric_value(value):
+    """
+    解析字符串数值
+
+    支持科学计数法（1e18、2×10^18、10^19、10¹⁸）、近似符号（~5）、千分位（1,000）、
+    数值范围（1e18-1e19，取中点）和误差（800 ± 10，取中心值）
+
+    参数:
+        value (str): 数值字符串
+
+    返回:
+        tuple: (数值, 数值之后的剩余文本)；无法解析时数值为None
+    """
+    if value is None:
+        return None, ''
+    if isinstance(value, (int, float)):
+        return float(value), ''
+
+    text = _normalize_symbols(str(value)).strip()
+    text = _APPROX_PREFIX_RE.sub('', text)
+    # 去掉数字之间的千分位逗号
+    text = re.sub(r"(?<=\d),(?=\d{3}\b)", '', text)
+
+    number, end = _match_number(text, 0)
+    if number is None:
+        return None, text
+
+    # 数值范围取中点
+    separator = _RANGE_SEPARATOR_RE.match(text, end)
+    if separator:
+        upper, upper_end = _match_number(text, separator.end())
+        if upper is not None:
+            number = (number + upper) / 2
+            end = upper_end
+
+    # 误差部分不参与计算
+    error = re.match(r"\s*(?:±|\+/-|\+-)\s*", text[end:])
+    if error:
+        _, error_end = _match_number(text, end + error.end())
+        if error_end > end + error.end():
+            end = error_end
+
+    if math.isnan(number) or math.isinf(number):
+        return None, text
+    return number, text[end:].strip()
+
+
+def _parse_unit_symbol(symbol):
+    """解析单个单位符号（可带词头），返回 (系数, 量纲) 或 None"""
+    symbol = _UNIT_ALIASES.get(symbol, symbol)
+
+    if symbol in UNITS:
+        return UNITS[symbol]
+
+    # 词头 + 单位，如 cm、MeV、fs、mJ
+    prefix, base = symbol[0], symbol[1:]
+    if prefix in SI_PREFIXES and base in UNITS and base not in _UNPREFIXED_UNITS:
+        scale, dimensions = UNITS[base]
+        return SI_PREFIXES[prefix] * scale, dimensions
+
+    return None
+
+
+def format_dimensions(dimensions):
+    """
+    将量纲字典格式化为规范单位字符串，如 {'m': -3} -> "m^-3"
+
+    参数:
+        dimensions (dict): {基本单位: 指数}
+
+    返回:
+        str: 规范单位，无量纲时为空字符串
+    """
+    parts = []
+    for base in BASE_UNITS:
+        exponent = dimensions.get(base, 0)
+        if exponent == 1:
+            parts.append(base)
+        elif exponent:
+            parts.append(f"{base}^{exponent}")
+    return " ".join(parts)
+
+
+@lru_cache(maxsize=4096)
+def normalize_unit(unit):
+    """
+    将单位换算为国际单位制基本单位
+
+    "/"之后的因子都视为分母（如 mJ/cm^2、W/cm2、V/m）
+
+    参数:
+        unit (str): 单位字符串
+
+    返回:
+        tuple: (换算系数, 规范单位字符串)；无法识别时返回 (None, None)
+    """
+    text = _normalize_symbols(unit or '').strip()
+    if not text:
+        return 1.0, ''
+
+    scale = 1.0
+    dimensions = {}
+    sign = 1
+
+    for part in re.split(r"(/)", text):
+        if part == '/':
+            sign = -1
+            continue
+
+        for factor in re.split(r"[·*×]|\s+(?=[A-Za-zÅΩ°%])", part):
+            if not factor.strip():
+                continue
+
+            match = _UNIT_FACTOR_RE.fullmatch(factor)
+            if not match:
+                return None, None
+
+            parsed = _parse_unit_symbol(match.group(1))
+            if parsed is None:
+                return None, None
+
+            factor_scale, factor_dimensions = parsed
+            exponent = sign * int(match.group(2) or match.group(3) or 1)
+            scale *= factor_scale ** exponent
+            for base, power in factor_dimensions.items():
+                dimensions[base] = dimensions.get(base, 0) + power * exponent
+
+    return _round_significant(scale), format_dimensions(dimensions)
+
+
+def normalize_quantity(value, unit=None):
+    """
+    将数值和单位换算为国际单位制数值和规范单位
+
+    单位为空时会尝试使用数值后面的文本作为单位（如 "800 nm"）
+
+    参数:
+        value (str|float): 数值
+        unit (str, optional): 单位
+
+    返回:
+        tuple: (国际单位制数值, 规范单位字符串)；无法解析时返回 (None, None)
+    """
+    number, rest = parse_numeric_value(value)
+    if number is None:
+        return None, None
+
+    if not (unit or '').strip() and rest:
+        unit = rest
+
+    scale, canonical_unit = normalize_unit((unit or '').strip())
+    if scale is None:
+        return None, None
+
+    return _round_significant(number * scale), canonical_unit
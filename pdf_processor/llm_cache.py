@@ -0,0 +1,209 @@
+"""
+LLM响应缓存模块
+
+按 (模型, 提示模板, 文本块) 的内容哈希缓存解析后的参数列表，存储在本地SQLite文件中，
+支持按条目数和存活时间淘汰，并统计命中/未命中次数
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# 默认缓存文件位置（项目根目录下的cache目录）
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'llm_responses.db'
+)
+
+
+def make_cache_key(model, prompt_template, text):
+    """
+    计算缓存键
+
+    参数:
+        model (str): 模型名称
+        prompt_template (str): 提示模板（可包含论文元数据等所有非正文部分）
+        text (str): 文本块内容
+
+    返回:
+        str: SHA-256十六进制摘要
+    """
+    digest = hashlib.sha256()
+    for part in (model, prompt_template, text):
+        data = (part or "").encode('utf-8')
+        # 写入长度前缀，避免不同字段拼接后产生相同的输入
+        digest.update(len(data).to_bytes(8, 'big'))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class LLMResponseCache:
+    """
+    基于SQLite的LLM参数提取结果缓存
+    """
+
+    def __init__(self, db_path=None, max_entries=None, max_age=None):
+        """
+        初始化缓存
+
+        参数:
+            db_path (str, optional): 缓存文件路径，默认读取环境变量LLM_CACHE_PATH
+            max_entries (int, optional): 最大缓存条目数，默认读取LLM_CACHE_MAX_ENTRIES，0表示不限制
+            max_age (float, optional): 条目最长存活时间（秒），默认读取LLM_CACHE_MAX_AGE，0表示永不过期
+        """
+        self.db_path = db_path or os.environ.get('LLM_CACHE_PATH', DEFAULT_CACHE_PATH)
+        if max_entries is None:
+            max_entries = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', 10000))
+        if max_age is None:
+            max_age = float(os.environ.get('LLM_CACHE_MAX_AGE', 30 * 24 * 3600))
+        self.max_entries = max_entries
+        self.max_age = max_age
+
+        # 命中统计（进程内）
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        cache_dir = os.path.dirname(self.db_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT,
+                parameters TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL,
+                hit_count INTEGER DEFAULT 0
+            )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_responses_last_accessed ON llm_responses (last_accessed)")
+
+        logger.info(f"LLM响应缓存已启用: {self.db_path}")
+
+    @contextmanager
+    def _connect(self):
+        # 每次操作使用独立连接，便于多个提取线程共享同一个缓存对象
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, cache_key):
+        """
+        读取缓存的参数列表
+
+        参数:
+            cache_key (str): 缓存键
+
+        返回:
+            list: 缓存的参数列表，未命中或已过期时返回None
+        """
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT parameters, created_at FROM llm_responses WHERE cache_key = ?", (cache_key,)
+                ).fetchone()
+
+                if row and self.max_age and now - row[1] > self.max_age:
+                    conn.execute("DELETE FROM llm_responses WHERE cache_key = ?", (cache_key,))
+                    row = None
+
+                if row:
+                    conn.execute(
+                        "UPDATE llm_responses SET last_accessed = ?, hit_count = hit_count + 1 WHERE cache_key = ?",
+                        (now, cache_key)
+                    )
+        except sqlite3.Error as e:
+            logger.warning(f"[LLM缓存] 读取缓存失败: {str(e)}")
+            row = None
+
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        return json.loads(row[0]) if row else None
+
+    def set(self, cache_key, parameters, model=None):
+        """
+        写入缓存并按需淘汰旧条目
+
+        参数:
+            cache_key (str): 缓存键
+            parameters (list): 解析后的参数列表
+            model (str, optional): 模型名称，仅用于记录
+        """
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses (cache_key, model, parameters, created_at, last_accessed, hit_count) "
+                    "VALUES (?, ?, ?, ?, ?, 0)",
+                    (cache_key, model, json.dumps(parameters, ensure_ascii=False), now, now)
+                )
+                self._evict(conn, now)
+        except sqlite3.Error as e:
+            logger.warning(f"[LLM缓存] 写入缓存失败: {str(e)}")
+
+    def _evict(self, conn, now):
+        """删除过期条目，并在超出容量时按最近访问时间淘汰"""
+        if self.max_age:
+            conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - self.max_age,))
+
+        if self.max_entries:
+            count = conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM llm_responses WHERE cache_key IN "
+                    "(SELECT cache_key FROM llm_responses ORDER BY last_accessed LIMIT ?)",
+                    (overflow,)
+                )
+                logger.info(f"[LLM缓存] 超出容量，淘汰 {overflow} 个条目")
+
+    def clear(self):
+        """清空缓存"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM llm_responses")
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        获取缓存统计信息
+
+        返回:
+            dict: 条目数、命中数、未命中数和命中率
+        """
+        try:
+            with self._connect() as conn:
+                entries = conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+
+        with self._lock:
+            hits, misses = self.hits, self.misses
+
+        total = hits + misses
+        return {
+            'entries': entries,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total else 0.0
+        }
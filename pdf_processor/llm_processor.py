@@ -1,28 +1,50 @@
 import os
+import re
 import csv
+import time
 import logging
 import json
-from openai import OpenAI
-from .prompt_engineering import build_full_prompt, get_extraction_prompt
-from .pdf_extractor import extract_text_from_pdf
+import threading
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from openai import OpenAI, APITimeoutError
+from .prompt_engineering import build_full_prompt, build_section_text, get_extraction_prompt, DEFAULT_SECTION_BUDGETS
+from .pdf_extractor import iter_pdf_pages, SectionCollector
+from .llm_cache import LLMResponseCache, make_cache_key
+from .rate_limiter import get_rate_limiter, call_with_retry, classify_error, backoff_delay
+from .response_parser import IncrementalCSVParser
+from .tokenizer import count_tokens, split_by_tokens
 import datetime
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+SYSTEM_MESSAGE = "You are a helpful assistant"
+
+# 句子边界：句末标点后的空白（分组保留原有空白，切分后可以还原文本）
+_SENTENCE_BOUNDARY = re.compile(r'((?<=[.!?])\s+|(?<=[。！？]))')
+
+# 文本块的最小token数（上下文窗口配置过小时仍保证每块有足够的内容）
+MIN_CHUNK_TOKENS = 256
+
 class LLMProcessor:
     """
     使用DeepSeek LLM API从论文中提取参数的处理器
     """
     
-    def __init__(self, api_key=None, base_url="https://api.deepseek.com"):
+    def __init__(self, api_key=None, base_url="https://api.deepseek.com", max_concurrency=None, cache=None, use_cache=None):
         """
         初始化LLM处理器
         
         参数:
             api_key (str, optional): DeepSeek API密钥，如果未提供，将尝试从环境变量获取
             base_url (str, optional): DeepSeek API基础URL
+            max_concurrency (int, optional): 分块提取时同时进行的最大API请求数，
+                默认读取环境变量LLM_MAX_CONCURRENCY，未设置时为4；设为1则按顺序处理
+            cache (LLMResponseCache, optional): 响应缓存对象，未提供时按默认配置创建
+            use_cache (bool, optional): 是否启用响应缓存，默认读取环境变量LLM_CACHE_ENABLED（默认启用）
         """
         # 获取API密钥
         self.api_key = api_key or os.environ.get("DEEPSEEK_API_KEY")
@@ -35,9 +57,9 @@ class LLMProcessor:
         if not self.api_key.startswith("sk-"):
             logger.warning(f"DeepSeek API密钥格式可能不正确: {self.api_key[:5]}***")
         
-        # 初始化DeepSeek客户端
+        # 初始化DeepSeek客户端（重试由call_with_retry统一处理，关闭SDK自带的重试）
         try:
-            self.client = OpenAI(api_key=self.api_key, base_url=base_url)
+            self.client = OpenAI(api_key=self.api_key, base_url=base_url, max_retries=0)
             logger.info(f"成功初始化DeepSeek客户端，API基础URL: {base_url}")
         except Exception as e:
             logger.error(f"初始化DeepSeek客户端失败: {str(e)}")
@@ -46,12 +68,143 @@ class LLMProcessor:
         # 默认使用的模型
         self.model = "deepseek-chat"
         
-        # 设置最大文本长度
-        self.max_text_length = 10000
+        # 上下文窗口与输出长度（token）：一次请求可发送的论文文本 = 上下文窗口 - 输出上限 - 提示模板
+        self.context_window = int(os.environ.get("LLM_CONTEXT_WINDOW", 65536))
+        self.max_output_tokens = int(os.environ.get("LLM_MAX_OUTPUT_TOKENS", 4096))
+        # 每块文本的token上限，0表示按上下文窗口计算（可以调小以减少单次请求的用量）
+        self.max_chunk_tokens = int(os.environ.get("LLM_MAX_CHUNK_TOKENS", 0))
+        # 相邻文本块重叠的token数，避免参数和它的上下文被切到两个块中
+        self.chunk_overlap_tokens = int(os.environ.get("LLM_CHUNK_OVERLAP_TOKENS", 200))
+        
+        # 文本选取方式："full"截取开头部分，"sections"按章节预算选取摘要、方法、实验装置和结果
+        self.extraction_mode = os.environ.get("LLM_EXTRACTION_MODE", "full")
+        self.section_budgets = None  # None表示使用默认的章节预算
+        
+        # 分块并发请求数上限
+        if max_concurrency is None:
+            max_concurrency = int(os.environ.get("LLM_MAX_CONCURRENCY", 4))
+        self.max_concurrency = max(1, max_concurrency)
+        
+        # 响应缓存：相同模型、提示模板和文本的请求直接返回缓存结果
+        if use_cache is None:
+            use_cache = os.environ.get("LLM_CACHE_ENABLED", "True").lower() == "true"
+        self.cache = None
+        if use_cache:
+            try:
+                self.cache = cache or LLMResponseCache()
+            except Exception as e:
+                logger.warning(f"初始化LLM响应缓存失败，将不使用缓存: {str(e)}")
+        
+        # 限流与重试：同一进程内访问同一API的处理器共享限流器
+        self.rate_limiter = get_rate_limiter(base_url)
+        self.request_timeout = float(os.environ.get("LLM_REQUEST_TIMEOUT", 60))
+        self.max_retries = int(os.environ.get("LLM_MAX_RETRIES", 5))
+        self.retry_max_delay = float(os.environ.get("LLM_RETRY_MAX_DELAY", 60))
+        # 流式响应：边接收边解析参数，缩短首个参数的返回时间
+        self.streaming = os.environ.get("LLM_STREAMING", "False").lower() == "true"
+        
+        # 预估单次响应的token数，用于请求前的token限流（响应后按实际用量修正）
+        self.expected_completion_tokens = 1000
+        
+        # token用量统计（进程内累计，命中缓存的请求不计入）
+        self.token_usage = {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        self._usage_lock = threading.Lock()
         
         logger.info("LLM处理器初始化完成")
     
-    def extract_parameters(self, text, paper_info=None, topic=None):
+    def get_token_usage(self):
+        """
+        获取累计的token用量
+        
+        返回:
+            dict: 请求数、提示token数、生成token数和总token数
+        """
+        with self._usage_lock:
+            return dict(self.token_usage)
+    
+    def _record_usage(self, response):
+        """累计一次API响应的token用量"""
+        usage = getattr(response, "usage", None)
+        with self._usage_lock:
+            self.token_usage["requests"] += 1
+            if usage is None:
+                return
+            for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+                self.token_usage[key] += getattr(usage, key, 0) or 0
+    
+    def create_chat_completion(self, messages, **kwargs):
+        """
+        发送对话请求，经过限流器，遇到限流、服务端错误和超时时自动重试
+        
+        参数:
+            messages (list): 对话消息
+            **kwargs: 传给chat.completions.create的其他参数
+            
+        返回:
+            API响应；重试用完后抛出最后一次的异常
+        """
+        kwargs.setdefault("timeout", self.request_timeout)
+        kwargs.setdefault("max_tokens", self.max_output_tokens)
+        
+        # 流式响应返回时还没有用量，读取完毕后由_parse_stream修正限流器的token桶并记录用量
+        stream = kwargs.get("stream")
+        response = call_with_retry(
+            lambda: self.client.chat.completions.create(model=self.model, messages=messages, **kwargs),
+            limiter=self.rate_limiter,
+            estimated_tokens=self._estimate_tokens(messages),
+            max_retries=self.max_retries,
+            max_delay=self.retry_max_delay,
+            get_tokens=None if stream else (lambda r: r.usage.total_tokens)
+        )
+        if not stream:
+            self._record_usage(response)
+        return response
+    
+    def _estimate_tokens(self, messages):
+        """请求前预估的token数（提示的本地估算加预计的响应长度），用于限流"""
+        return sum(count_tokens(m.get("content") or "") for m in messages) + self.expected_completion_tokens
+    
+    def build_prompt(self, text, paper_info=None, topic=None):
+        """
+        构建参数提取的完整提示
+        
+        参数:
+            text (str): 论文文本内容
+            paper_info (dict, optional): 论文元数据
+            topic (str, optional): 论文主题，用于选择适当的提示
+            
+        返回:
+            str: 完整提示
+        """
+        return build_full_prompt(
+            text, paper_info, topic,
+            mode=self.extraction_mode,
+            section_budgets=self.section_budgets,
+            max_text_tokens=self.text_token_budget(paper_info, topic)
+        )
+    
+    def text_token_budget(self, paper_info=None, topic=None):
+        """
+        计算一次请求中论文文本可以使用的token数
+        
+        上下文窗口减去输出上限、系统消息和提示模板（含论文元数据）占用的token数，并留出10%的余量
+        抵消本地估算的误差；设置了max_chunk_tokens时不超过该值
+        
+        参数:
+            paper_info (dict, optional): 论文元数据
+            topic (str, optional): 论文主题
+            
+        返回:
+            int: 论文文本的token预算
+        """
+        template_tokens = count_tokens(build_full_prompt("", paper_info, topic)) + count_tokens(SYSTEM_MESSAGE)
+        budget = int((self.context_window - self.max_output_tokens - template_tokens) * 0.9)
+        if self.max_chunk_tokens > 0:
+            budget = min(budget, self.max_chunk_tokens)
+        return max(MIN_CHUNK_TOKENS, budget)
+    
+    def extract_parameters(self, text, paper_info=None, topic=None, use_cache=True, on_parameter=None, stream=None,
+                           raise_errors=False):
         """
         从文本中提取参数
         
@@ -59,54 +212,109 @@ class LLMProcessor:
             text (str): 论文文本内容
             paper_info (dict, optional): 论文元数据
             topic (str, optional): 论文主题，用于选择适当的提示
+            use_cache (bool): 是否读取和写入响应缓存，默认为True
+            on_parameter (callable, optional): 每解析出一个参数时调用，参数为该参数字典
+            stream (bool, optional): 是否使用流式响应，默认读取环境变量LLM_STREAMING
+            raise_errors (bool): API调用失败时抛出异常，而不是返回空列表，见extract_parameters_from_prompt
             
         返回:
             list: 提取的参数列表，每个参数是一个字典
         """
         # 构建完整提示
-        prompt = build_full_prompt(text, paper_info, topic)
+        prompt = self.build_prompt(text, paper_info, topic)
+        logger.info(f"[DeepSeek API] 论文文本长度: {len(text)} 字符")
+        
+        return self.extract_parameters_from_prompt(prompt, paper_info, topic, use_cache, on_parameter, stream,
+                                                   raise_errors)
+    
+    def extract_parameters_from_prompt(self, prompt, paper_info=None, topic=None, use_cache=True,
+                                       on_parameter=None, stream=None, raise_errors=False):
+        """
+        使用已构建的提示调用API提取参数
+        
+        流式模式下按行解析响应，每解析出一行参数就调用on_parameter，不必等待完整响应；
+        非流式模式和命中缓存时，在得到全部参数后依次调用on_parameter。流式响应在读取过程中
+        连接中断或超时时，如果还没有参数传给on_parameter，会重新发送整个请求
+        
+        参数:
+            prompt (str): build_prompt构建的完整提示
+            paper_info (dict, optional): 论文元数据，仅用于日志
+            topic (str, optional): 构建提示时使用的主题，用于计算缓存键
+            use_cache (bool): 是否读取和写入响应缓存，默认为True
+            on_parameter (callable, optional): 每解析出一个参数时调用，参数为该参数字典；
+                其抛出的异常会中止提取并传给调用方
+            stream (bool, optional): 是否使用流式响应，默认读取环境变量LLM_STREAMING
+            raise_errors (bool): 重试后API调用仍然失败（包括流式响应中途中断）时抛出最后一次的异常，
+                而不是返回空列表，调用方可以区分"调用失败"和"没有参数"（如交给任务队列重试）
+            
+        返回:
+            list: 提取的参数列表，每个参数是一个字典
+        """
+        if stream is None:
+            stream = self.streaming
+        
+        # on_parameter抛出的异常（如任务已取消）直接传给调用方，并中止读取流式响应
+        callback_errors = []
+        if on_parameter:
+            user_callback = on_parameter
+            
+            def on_parameter(parameter):
+                try:
+                    user_callback(parameter)
+                except Exception as e:
+                    callback_errors.append(e)
+                    raise
+        
+        # 查询响应缓存（完整提示已包含提示模板、论文元数据和文本块）
+        cache_key = None
+        if self.cache and use_cache:
+            cache_key = make_cache_key(self.model, get_extraction_prompt(topic), prompt)
+            cached_parameters = self.cache.get(cache_key)
+            if cached_parameters is not None:
+                logger.info(f"[LLM缓存] 命中缓存，直接返回 {len(cached_parameters)} 个参数")
+                if on_parameter:
+                    for parameter in cached_parameters:
+                        on_parameter(parameter)
+                return cached_parameters
         
         try:
             logger.info("=== [DeepSeek API] 开始参数提取 ===")
             logger.info(f"[DeepSeek API] 使用模型: {self.model}")
-            logger.info(f"[DeepSeek API] 论文标题: {paper_info.get('title', 'Unknown')}")
+            logger.info(f"[DeepSeek API] 论文标题: {(paper_info or {}).get('title', 'Unknown')}")
             logger.info(f"[DeepSeek API] 提示类型: {topic or '通用激光物理'}")
             logger.info(f"[DeepSeek API] 提示长度: {len(prompt)} 字符")
-            logger.info(f"[DeepSeek API] 论文文本长度: {len(text)} 字符")
             
             # 记录API请求详情
-            logger.info("[DeepSeek API] 发送请求...")
+            logger.info(f"[DeepSeek API] 发送请求{'（流式）' if stream else ''}...")
             request_start_time = datetime.datetime.now()
             
+            messages = [
+                {"role": "system", "content": SYSTEM_MESSAGE},
+                {"role": "user", "content": prompt}
+            ]
+            
             try:
-                # 调用DeepSeek API，添加超时处理
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": "You are a helpful assistant"},
-                        {"role": "user", "content": prompt}
-                    ],
-                    stream=False,
-                    timeout=60  # 添加60秒超时
-                )
+                # 调用DeepSeek API（限流、超时和重试见create_chat_completion）
+                if stream:
+                    parameters, response_length = self._stream_with_retry(messages, on_parameter, request_start_time)
+                else:
+                    response = self.create_chat_completion(messages, stream=False)
+                    response_text = response.choices[0].message.content
+                    response_length = len(response_text)
+                    logger.debug(f"[DeepSeek API] 响应内容: \n{response_text}")
+                    parameters = self.parse_csv_response(response_text)
+                    if on_parameter:
+                        for parameter in parameters:
+                            on_parameter(parameter)
                 
                 # 记录响应时间
                 request_end_time = datetime.datetime.now()
                 elapsed_time = (request_end_time - request_start_time).total_seconds()
                 logger.info(f"[DeepSeek API] 响应时间: {elapsed_time:.2f} 秒")
                 
-                # 获取响应文本
-                response_text = response.choices[0].message.content
-                
-                # 记录响应状态
+                # 记录响应状态（完整响应只在DEBUG级别记录）
                 logger.info(f"[DeepSeek API] 响应状态: 成功")
-                logger.info(f"[DeepSeek API] 响应长度: {len(response_text)} 字符")
-                
-                # 记录完整响应，不再只是预览
-                logger.info(f"[DeepSeek API] 响应内容: \n{response_text}")
-                
-                # 处理响应
-                parameters = self.parse_csv_response(response_text)
+                logger.info(f"[DeepSeek API] 响应长度: {response_length} 字符")
                 
                 logger.info(f"[DeepSeek API] 参数提取完成，共提取 {len(parameters)} 个参数")
                 
@@ -118,26 +326,128 @@ class LLMProcessor:
                 
                 logger.info("=== [DeepSeek API] 参数提取结束 ===")
                 
+                # 只缓存成功解析出参数的响应，失败的请求下次仍会重试
+                if cache_key and parameters:
+                    self.cache.set(cache_key, parameters, model=self.model)
+                
                 return parameters
                 
-            except TimeoutError:
-                logger.error("[DeepSeek API] 请求超时，60秒内未收到响应")
+            except (TimeoutError, APITimeoutError):
+                logger.error(f"[DeepSeek API] 请求超时，重试 {self.max_retries} 次后仍未收到响应")
                 logger.error("=== [DeepSeek API] 参数提取异常终止 - 超时 ===")
+                if raise_errors:
+                    raise
                 return []
                 
             except Exception as api_error:
+                if callback_errors or raise_errors:
+                    raise
                 logger.error(f"[DeepSeek API] API调用错误: {str(api_error)}")
                 logger.error(f"[DeepSeek API] 错误类型: {type(api_error).__name__}")
                 logger.error("=== [DeepSeek API] 参数提取异常终止 - API错误 ===")
                 return []
             
         except Exception as e:
+            if callback_errors or raise_errors:
+                raise
             logger.error(f"[DeepSeek API] 参数提取失败: {str(e)}")
             logger.error(f"[DeepSeek API] 错误类型: {type(e).__name__}")
             logger.error(f"[DeepSeek API] 错误详情: {str(e)}")
             logger.error("=== [DeepSeek API] 参数提取异常终止 ===")
             return []
     
+    def _stream_with_retry(self, messages, on_parameter=None, request_start_time=None):
+        """
+        发送流式请求并解析响应
+        
+        create_chat_completion只重试建立连接，读取响应的过程中连接中断或读取超时时，
+        如果还没有参数传给on_parameter，在这里按指数退避重新发送整个请求；已经传出参数时
+        不能重来（调用方可能已经写入），直接抛出异常
+        
+        返回:
+            tuple: (参数列表, 响应长度)
+        """
+        for attempt in range(self.max_retries + 1):
+            emitted = []
+            
+            def forward(parameter):
+                emitted.append(parameter)
+                if on_parameter:
+                    on_parameter(parameter)
+            
+            response = self.create_chat_completion(messages, stream=True, stream_options={"include_usage": True})
+            try:
+                return self._parse_stream(response, forward, request_start_time, self._estimate_tokens(messages))
+            except Exception as e:
+                retryable, _, _ = classify_error(e)
+                if not retryable or (emitted and on_parameter) or attempt >= self.max_retries:
+                    raise
+                
+                delay = backoff_delay(attempt, max_delay=self.retry_max_delay)
+                logger.warning(f"[API重试] 流式响应中断 {type(e).__name__}: {str(e)[:200]}，"
+                               f"{delay:.1f} 秒后第 {attempt + 1}/{self.max_retries} 次重新请求")
+                time.sleep(delay)
+    
+    def _parse_stream(self, response, on_parameter=None, request_start_time=None, estimated_tokens=0):
+        """
+        逐块读取流式响应并增量解析参数，不保存完整的响应文本（DEBUG级别除外）
+        
+        参数:
+            response: 流式API响应
+            on_parameter (callable, optional): 每解析出一个参数时调用
+            request_start_time (datetime, optional): 请求开始时间，用于记录首个参数的延迟
+            estimated_tokens (int): 发送请求时限流器按预估扣除的token数，读取到实际用量后修正
+            
+        返回:
+            tuple: (参数列表, 响应长度)
+        """
+        parser = IncrementalCSVParser()
+        parameters = []
+        response_length = 0
+        usage_chunk = None
+        debug_parts = [] if logger.isEnabledFor(logging.DEBUG) else None
+        
+        def handle_rows(rows):
+            for row in rows:
+                parameter = self._row_to_parameter(row, parser.fieldnames)
+                if parameter is None:
+                    continue
+                if not parameters and request_start_time:
+                    elapsed = (datetime.datetime.now() - request_start_time).total_seconds()
+                    logger.info(f"[DeepSeek API] 首个参数返回时间: {elapsed:.2f} 秒")
+                parameters.append(parameter)
+                if on_parameter:
+                    on_parameter(parameter)
+        
+        try:
+            for chunk in response:
+                if getattr(chunk, "usage", None):
+                    usage_chunk = chunk
+                if not chunk.choices:
+                    continue
+                
+                content = chunk.choices[0].delta.content
+                if not content:
+                    continue
+                
+                response_length += len(content)
+                if debug_parts is not None:
+                    debug_parts.append(content)
+                handle_rows(parser.feed(content))
+            
+            handle_rows(parser.close())
+        finally:
+            # 流式响应的token用量在最后一个数据块中返回（中途中断时没有用量，限流器保留预估值）
+            self._record_usage(usage_chunk)
+            usage = getattr(usage_chunk, "usage", None)
+            if usage is not None:
+                self.rate_limiter.record_usage(estimated_tokens, usage.total_tokens)
+        
+        if debug_parts is not None:
+            logger.debug(f"[DeepSeek API] 响应内容: \n{''.join(debug_parts)}")
+        logger.info(f"[参数解析] 流式解析完成，共 {parser.row_count} 行，成功 {len(parameters)} 个参数")
+        return parameters, response_length
+    
     def parse_csv_response(self, response_text):
         """
         解析API返回的CSV格式响应
@@ -153,94 +463,23 @@ class LLMProcessor:
         logger.info("[参数解析] 开始解析CSV格式响应")
         
         try:
-            # 检查响应是否包含CSV格式数据
-            if "```csv" in response_text or "```CSV" in response_text:
-                logger.info("[参数解析] 检测到CSV格式数据块")
-                
-                # 提取CSV部分
-                csv_parts = []
-                in_csv_block = False
-                for line in response_text.split("\n"):
-                    if line.strip().startswith("```csv") or line.strip().startswith("```CSV"):
-                        in_csv_block = True
-                        continue
-                    elif line.strip() == "```" and in_csv_block:
-                        in_csv_block = False
-                        continue
-                    elif in_csv_block:
-                        csv_parts.append(line)
-                
-                if csv_parts:
-                    csv_text = "\n".join(csv_parts)
-                    logger.info(f"[参数解析] 提取到CSV数据，长度: {len(csv_text)} 字符")
-                else:
-                    logger.warning("[参数解析] 找到CSV标记但无内容")
-                    return parameters
-            else:
-                logger.info("[参数解析] 未检测到CSV标记，尝试直接解析为CSV")
-                # 直接尝试将响应解析为CSV
-                csv_text = response_text.strip()
-            
-            # 使用CSV模块解析
-            import csv
-            from io import StringIO
-            
-            # 确保第一行是标题行
-            lines = csv_text.split('\n')
-            if len(lines) > 0 and 'parameter_name' in lines[0].lower():
-                logger.info("[参数解析] 找到CSV标题行")
-            else:
-                logger.warning("[参数解析] 未找到标准CSV标题行，这可能导致解析错误")
+            parser = IncrementalCSVParser()
+            rows = parser.feed(response_text)
+            rows.extend(parser.close())
             
-            csv_file = StringIO(csv_text)
-            csv_reader = csv.DictReader(csv_file)
-            
-            # 检查表头
-            fieldnames = csv_reader.fieldnames
-            if fieldnames:
-                logger.info(f"[参数解析] CSV表头: {', '.join(fieldnames)}")
+            if parser.seen_block:
+                logger.info("[参数解析] 检测到CSV格式数据块")
+            if parser.fieldnames:
+                logger.info(f"[参数解析] CSV表头: {', '.join(parser.fieldnames)}")
             else:
-                logger.warning("[参数解析] CSV没有表头")
+                logger.warning("[参数解析] 未找到标准CSV标题行")
             
-            # 解析每一行
-            row_count = 0
-            error_count = 0
-            confidence_field = next((f for f in fieldnames if 'confidence' in f.lower()), None) if fieldnames else None
-            
-            for row in csv_reader:
-                row_count += 1
-                try:
-                    # 确定置信度字段名
-                    confidence_value = None
-                    if confidence_field and confidence_field in row:
-                        try:
-                            confidence_value = float(row[confidence_field])
-                        except (ValueError, TypeError):
-                            confidence_value = 0.8  # 默认值
-                    
-                    # 进行适当的列映射，更灵活地适应字段名
-                    parameter = {
-                        "parameter_name": self._get_field_value(row, ["parameter_name", "parameter name", "name", "参数名称", "参数名"]),
-                        "value": self._get_field_value(row, ["value", "val", "值"]),
-                        "unit": self._get_field_value(row, ["unit", "units", "单位"]),
-                        "context": self._get_field_value(row, ["context", "source", "来源", "出处"]),
-                        "confidence_score": confidence_value or 0.8,
-                        "category": self._categorize_parameter(self._get_field_value(row, ["parameter_name", "name", "参数名称"]))
-                    }
-                    
-                    # 验证参数有效性
-                    if parameter["parameter_name"] and parameter["value"]:
-                        parameters.append(parameter)
-                        if row_count <= 5 or row_count % 10 == 0:  # 记录前5个和每10个参数的日志
-                            logger.info(f"[参数解析] 解析参数 #{row_count}: {parameter['parameter_name']} = {parameter['value']} {parameter['unit']}")
-                    else:
-                        error_count += 1
-                        logger.warning(f"[参数解析] 跳过无效参数 #{row_count}: 缺少参数名称或值: {row}")
-                except Exception as e:
-                    error_count += 1
-                    logger.error(f"[参数解析] 解析行 #{row_count} 出错: {str(e)}, 行数据: {row}")
+            for row in rows:
+                parameter = self._row_to_parameter(row, parser.fieldnames)
+                if parameter is not None:
+                    parameters.append(parameter)
             
-            logger.info(f"[参数解析] CSV解析完成，共 {row_count} 行，成功 {len(parameters)} 个参数，失败 {error_count} 个")
+            logger.info(f"[参数解析] CSV解析完成，共 {parser.row_count} 行，成功 {len(parameters)} 个参数，失败 {parser.row_count - len(parameters)} 个")
             
         except Exception as e:
             logger.error(f"[参数解析] 解析异常: {str(e)}")
@@ -249,6 +488,49 @@ class LLMProcessor:
         logger.info(f"[参数解析] 最终解析结果: {len(parameters)} 个参数")
         return parameters
     
+    def _row_to_parameter(self, row, fieldnames):
+        """
+        将CSV数据行转换为参数字典
+        
+        参数:
+            row (dict): CSV数据行
+            fieldnames (list): 表头字段
+            
+        返回:
+            dict: 参数字典；缺少参数名称或值时返回None
+        """
+        try:
+            # 确定置信度字段名
+            confidence_field = next((f for f in fieldnames if 'confidence' in f.lower()), None) if fieldnames else None
+            confidence_value = None
+            if confidence_field and confidence_field in row:
+                try:
+                    confidence_value = float(row[confidence_field])
+                except (ValueError, TypeError):
+                    confidence_value = 0.8  # 默认值
+            
+            # 进行适当的列映射，更灵活地适应字段名
+            parameter = {
+                "parameter_name": self._get_field_value(row, ["parameter_name", "parameter name", "name", "参数名称", "参数名"]),
+                "value": self._get_field_value(row, ["value", "val", "值"]),
+                "unit": self._get_field_value(row, ["unit", "units", "单位"]),
+                "context": self._get_field_value(row, ["context", "source", "来源", "出处"]),
+                "confidence_score": confidence_value or 0.8,
+                "category": self._categorize_parameter(self._get_field_value(row, ["parameter_name", "name", "参数名称"]))
+            }
+        except Exception as e:
+            logger.error(f"[参数解析] 解析行出错: {str(e)}, 行数据: {row}")
+            return None
+        
+        # 验证参数有效性
+        if not (parameter["parameter_name"] and parameter["value"]):
+            logger.warning(f"[参数解析] 跳过无效参数: 缺少参数名称或值: {row}")
+            return None
+        
+        logger.debug(f"[参数解析] 解析参数: {parameter['parameter_name']} = {parameter['value']} {parameter['unit']}")
+        return parameter
+    
+
     def _get_field_value(self, row, possible_names):
         """获取字段值，尝试多个可能的字段名"""
         for name in possible_names:
@@ -459,18 +741,77 @@ class LLMProcessor:
             if force_extract:
                 logger.info("[文件提取] 强制重新提取参数")
             
-            # 提取文本
+            # 逐页读取PDF文本，分块和章节识别按页增量进行，不保留全文
             logger.info("[文件提取] 开始提取PDF文本内容")
-            text = extract_text_from_pdf(pdf_path)
-            text_length = len(text)
+            token_budget = self.text_token_budget(paper_info)
+            logger.info(f"[文件提取] 单次请求的文本预算为 {token_budget} 个token")
+            
+            text_stats = {"pages": 0, "length": 0}
             
-            logger.info(f"[文件提取] PDF文本提取完成，提取了 {text_length} 个字符")
+            def pages():
+                # 每次逐页读取重新统计，章节模式退回分块处理时不会重复计数
+                text_stats.update(pages=0, length=0)
+                for _, page_text in iter_pdf_pages(pdf_path):
+                    text_stats["pages"] += 1
+                    if page_text:
+                        text_stats["length"] += len(page_text) + 2
+                    yield page_text
+            
+            section_text = ""
+            if self.extraction_mode == "sections":
+                # 章节模式需要读完全文才能确定是否识别到章节：第一遍只把页面交给SectionCollector，不保留文本块；
+                # 未识别到章节时再逐页读取一遍分块处理（第一遍已写入文本缓存，通常无需重新解析PDF）
+                section_budgets = self.section_budgets or DEFAULT_SECTION_BUDGETS
+                # 每个章节最多保留全部预算之和（多1个字符用于判断是否需要截断）
+                collector = SectionCollector(section_budgets.keys(), max_chars=sum(section_budgets.values()) + 1)
+                for page_text in pages():
+                    collector.feed(page_text)
+                section_text = build_section_text(None, section_budgets, sections=collector.close())
+                if not section_text and text_stats["length"]:
+                    logger.info("[文件提取] 未识别到章节，退回分块处理")
+            
+            if section_text:
+                logger.info(f"[文件提取] 使用章节模式，从摘要、方法、实验装置和结果章节中提取参数")
+                prompt = build_full_prompt(section_text, paper_info, max_text_tokens=token_budget)
+                parameters = self.extract_parameters_from_prompt(prompt, paper_info=paper_info)
+                logger.info(f"[文件提取] 提取了 {len(parameters)} 个参数")
+            else:
+                chunks = self.iter_text_chunks(pages(), token_budget)
+                # 读取前两块即可判断是否需要分块
+                first_chunks = list(itertools.islice(chunks, 2))
+                chunks = itertools.chain(first_chunks, chunks)
+                
+                if not first_chunks:
+                    logger.warning("[文件提取] 未提取到文本内容，跳过参数提取")
+                    parameters = []
+                elif len(first_chunks) > 1:
+                    logger.info(f"[文件提取] 文本超过token预算 ({token_budget})，将进行分块处理")
+                    
+                    # 对每个部分提取参数（按块顺序合并结果，边读取PDF边发送请求）
+                    all_parameters = []
+                    chunk_count = 0
+                    for part_params in self._extract_chunks(chunks, paper_info):
+                        all_parameters.extend(part_params)
+                        chunk_count += 1
+                    logger.info(f"[文件提取] 文本已分割为 {chunk_count} 个部分")
+                    
+                    # 合并结果并删除重复项
+                    parameters = self._deduplicate_parameters(all_parameters)
+                    logger.info(f"[文件提取] 合并后共有 {len(parameters)} 个去重参数 (原始: {len(all_parameters)})")
+                else:
+                    text = first_chunks[0]
+                    logger.info(f"[文件提取] 文本长度适中 ({len(text)} 字符，约 {count_tokens(text)} 个token)，一次性处理")
+                    parameters = self.extract_parameters(text, paper_info=paper_info)
+                    logger.info(f"[文件提取] 提取了 {len(parameters)} 个参数")
+            
+            text_length = text_stats["length"]
+            logger.info(f"[文件提取] PDF文本提取完成，共 {text_stats['pages']} 页，{text_length} 个字符")
             if text_length < 100:
                 logger.warning(f"[文件提取] 提取的文本内容过短 ({text_length} 字符)，可能无法正确解析")
             
             # 准备元数据
             metadata = {
-                "extracted_date": datetime.now().isoformat(),
+                "extracted_date": datetime.datetime.now().isoformat(),
                 "pdf_path": pdf_path,
                 "text_length": text_length
             }
@@ -489,28 +830,6 @@ class LLMProcessor:
             else:
                 logger.info("[文件提取] 未提供论文信息，将仅使用PDF内容")
             
-            # 分割长文本
-            if text_length > self.max_text_length:
-                logger.info(f"[文件提取] 文本超过最大长度 ({text_length} > {self.max_text_length})，将进行分块处理")
-                texts = self._split_text(text)
-                logger.info(f"[文件提取] 文本已分割为 {len(texts)} 个部分")
-                
-                # 对每个部分提取参数
-                all_parameters = []
-                for i, part_text in enumerate(texts):
-                    logger.info(f"[文件提取] 处理第 {i+1}/{len(texts)} 部分 ({len(part_text)} 字符)")
-                    part_params = self.extract_parameters(part_text, paper_info=paper_info)
-                    logger.info(f"[文件提取] 第 {i+1} 部分提取了 {len(part_params)} 个参数")
-                    all_parameters.extend(part_params)
-                
-                # 合并结果并删除重复项
-                parameters = self._deduplicate_parameters(all_parameters)
-                logger.info(f"[文件提取] 合并后共有 {len(parameters)} 个去重参数 (原始: {len(all_parameters)})")
-            else:
-                logger.info(f"[文件提取] 文本长度适中 ({text_length} 字符)，一次性处理")
-                parameters = self.extract_parameters(text, paper_info=paper_info)
-                logger.info(f"[文件提取] 提取了 {len(parameters)} 个参数")
-            
             # 保存结果
             result = {
                 "parameters": parameters,
@@ -532,69 +851,149 @@ class LLMProcessor:
             logger.error(f"[文件提取] 错误详情: {traceback.format_exc()}")
             return {"parameters": [], "metadata": {"error": str(e)}}
 
-    def _split_text(self, text):
+    def _extract_chunks(self, texts, paper_info=None):
+        """
+        对多个文本块提取参数，最多同时发送max_concurrency个请求
+        
+        texts可以是生成器：文本块按需读取，已读取但未返回结果的块不超过并发数的两倍
+        
+        参数:
+            texts (iterable): 文本块
+            paper_info (dict, optional): 论文元数据
+            
+        返回:
+            generator: 按texts顺序返回每个文本块提取的参数列表
+        """
+        def extract_part(index, part_text):
+            logger.info(f"[文件提取] 处理第 {index+1} 部分 ({len(part_text)} 字符，约 {count_tokens(part_text)} 个token)")
+            part_params = self.extract_parameters(part_text, paper_info=paper_info)
+            logger.info(f"[文件提取] 第 {index+1} 部分提取了 {len(part_params)} 个参数")
+            return part_params
+        
+        workers = self.max_concurrency
+        if workers <= 1:
+            for index, part_text in enumerate(texts):
+                yield extract_part(index, part_text)
+            return
+        
+        logger.info(f"[文件提取] 并发处理文本块，最大并发数: {workers}")
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-chunk") as executor:
+            # 按提交顺序取结果，保证合并顺序与分块顺序一致
+            pending = deque()
+            for index, part_text in enumerate(texts):
+                pending.append(executor.submit(extract_part, index, part_text))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _split_text(self, text, max_tokens=None, overlap_tokens=None):
         """
-        将长文本分割成多个部分，每部分不超过最大长度
+        将长文本按token预算分割成多个部分
         
         参数:
             text (str): 需要分割的文本
+            max_tokens (int, optional): 每块的最大token数，默认为text_token_budget()
+            overlap_tokens (int, optional): 相邻块重叠的token数，默认为chunk_overlap_tokens
             
         返回:
             list: 分割后的文本列表
         """
         logger.info(f"[文本分割] 开始分割文本，总长度: {len(text)} 字符")
+        parts = list(self.iter_text_chunks([text], max_tokens, overlap_tokens))
+        logger.info(f"[文本分割] 分割完成，共生成 {len(parts)} 个文本块")
+        return parts
+    
+    def iter_text_chunks(self, pages, max_tokens=None, overlap_tokens=None):
+        """
+        按token预算将逐页输入的文本分割成多个部分，读满一块就返回一块
         
-        # 简单的按字符数分割
-        parts = []
-        chunk_size = self.max_text_length
+        在句子边界切分（页与页、段落之间保留空行），超长句子（如公式、表格）按token数硬切分。
+        除第一块外，每块开头重复上一块末尾约overlap_tokens个token的句子，重叠部分提取出的
+        重复参数由_deduplicate_parameters合并
         
-        # 尝试按段落分割
-        paragraphs = text.split('\n\n')
-        logger.info(f"[文本分割] 文本包含 {len(paragraphs)} 个段落")
+        参数:
+            pages (iterable): 页面文本（如iter_pdf_pages返回的页面文本），也可以只包含全文一个元素
+            max_tokens (int, optional): 每块的最大token数，默认为text_token_budget()
+            overlap_tokens (int, optional): 相邻块重叠的token数，默认为chunk_overlap_tokens
+            
+        返回:
+            generator: 文本块
+        """
+        if max_tokens is None:
+            max_tokens = self.text_token_budget()
+        if overlap_tokens is None:
+            overlap_tokens = self.chunk_overlap_tokens
+        # 重叠部分不超过块大小的1/4，保证每块都有足够的新内容
+        overlap_tokens = max(0, min(overlap_tokens, max_tokens // 4))
         
-        current_chunk = ""
+        current = []
+        current_tokens = 0
+        new_units = 0  # 当前块中不属于重叠部分的片段数
+        chunk_count = 0
         
-        for para in paragraphs:
-            # 如果单个段落就超过了最大长度，需要进一步拆分
-            if len(para) > chunk_size:
-                logger.warning(f"[文本分割] 发现超长段落 ({len(para)} 字符)，将按句子拆分")
-                # 如果当前块不为空，先保存
-                if current_chunk:
-                    parts.append(current_chunk)
-                    current_chunk = ""
+        for unit in self._iter_text_units(pages, max_tokens):
+            unit_tokens = unit[2] + (1 if unit[0] else 0)
+            if new_units and current_tokens + unit_tokens > max_tokens:
+                chunk = self._join_units(current)
+                chunk_count += 1
+                logger.debug(f"[文本分割] 块 {chunk_count}: {len(chunk)} 字符，约 {current_tokens} 个token")
+                yield chunk
                 
-                # 按句子拆分长段落
-                sentences = para.split('. ')
-                temp_chunk = ""
+                # 下一块以当前块末尾不超过overlap_tokens的片段开头
+                overlap = []
+                overlap_total = 0
+                for previous in reversed(current):
+                    previous_tokens = previous[2] + 1
+                    if overlap_total + previous_tokens > overlap_tokens:
+                        break
+                    overlap.insert(0, previous)
+                    overlap_total += previous_tokens
+                if overlap_total + unit_tokens > max_tokens:
+                    overlap, overlap_total = [], 0
                 
-                for sentence in sentences:
-                    if len(temp_chunk) + len(sentence) + 2 <= chunk_size:  # +2 for '. '
-                        temp_chunk += sentence + '. '
-                    else:
-                        if temp_chunk:
-                            parts.append(temp_chunk)
-                        temp_chunk = sentence + '. '
-                
-                if temp_chunk:
-                    parts.append(temp_chunk)
-            else:
-                # 正常段落，检查是否加入会超出限制
-                if len(current_chunk) + len(para) + 2 <= chunk_size:  # +2 for '\n\n'
-                    current_chunk += para + '\n\n'
-                else:
-                    # 当前块已满，保存并创建新块
-                    parts.append(current_chunk)
-                    current_chunk = para + '\n\n'
-        
-        # 添加最后一个块
-        if current_chunk:
-            parts.append(current_chunk)
+                current, current_tokens, new_units = overlap, overlap_total, 0
+            
+            current.append(unit)
+            current_tokens += unit_tokens
+            new_units += 1
         
-        logger.info(f"[文本分割] 分割完成，共生成 {len(parts)} 个文本块")
-        for i, part in enumerate(parts):
-            logger.debug(f"[文本分割] 块 {i+1}: {len(part)} 字符")
+        if new_units:
+            chunk = self._join_units(current)
+            logger.debug(f"[文本分割] 块 {chunk_count + 1}: {len(chunk)} 字符，约 {current_tokens} 个token")
+            yield chunk
+    
+    @staticmethod
+    def _iter_text_units(pages, max_tokens):
+        """
+        将文本切分为(分隔符, 片段, token数)：片段是句子或硬切分的一段，分隔符是它与前一片段之间的原始空白
         
-        return parts
+        按句子（而不是整段）切分，重叠部分才能精确到句子
+        """
+        for page_text in pages:
+            for para in page_text.split('\n\n'):
+                if not para.strip():
+                    continue
+                
+                pieces = _SENTENCE_BOUNDARY.split(para)
+                separators = ['\n\n'] + pieces[1::2]
+                for separator, sentence in zip(separators, pieces[0::2]):
+                    if not sentence:
+                        continue
+                    sentence_tokens = count_tokens(sentence)
+                    if sentence_tokens <= max_tokens:
+                        yield separator, sentence, sentence_tokens
+                        continue
+                    
+                    parts = split_by_tokens(sentence, max_tokens)
+                    yield separator, parts[0], count_tokens(parts[0])
+                    for part in parts[1:]:
+                        yield '', part, count_tokens(part)
+    
+    @staticmethod
+    def _join_units(units):
+        """拼接文本片段，块开头的分隔符省略"""
+        return units[0][1] + ''.join(separator + text for separator, text, _ in units[1:])
     
     def _deduplicate_parameters(self, parameters):
         """
@@ -692,10 +1091,9 @@ def test_parameter_extraction(api_key, text=None):
         # 使用示例提示
         prompt = get_example_prompt()
     
-    response = processor.client.chat.completions.create(
-        model=processor.model,
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant"},
+    response = processor.create_chat_completion(
+        [
+            {"role": "system", "content": SYSTEM_MESSAGE},
             {"role": "user", "content": prompt}
         ],
         stream=False
@@ -0,0 +1,175 @@
+"""
+PDF文本提取后端
+
+支持以下后端，按速度从快到慢排列：
+- pymupdf: PyMuPDF（MuPDF的Python绑定，pip install pymupdf）
+- pypdfium2: pdfium的Python绑定（pip install pypdfium2）
+- pypdf2: 纯Python实现，项目的必需依赖，始终可用
+
+默认（auto）使用已安装的最快后端。可以通过环境变量PDF_BACKEND或调用参数指定后端，
+指定的后端未安装时自动退回auto
+"""
+
+import os
+import logging
+import threading
+import contextlib
+
+import PyPDF2
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class PDFBackend:
+    """
+    PDF文本提取后端基类
+
+    open(pdf_path)返回上下文管理器，得到(页数, page_text)，page_text(页序号)返回该页的文本（从0开始）
+    """
+
+    name = ""
+
+    def is_available(self):
+        """后端依赖是否已安装"""
+        raise NotImplementedError
+
+    def open(self, pdf_path):
+        raise NotImplementedError
+
+
+class PyPDF2Backend(PDFBackend):
+    name = "pypdf2"
+
+    def is_available(self):
+        return True
+
+    @contextlib.contextmanager
+    def open(self, pdf_path):
+        with open(pdf_path, 'rb') as file:
+            reader = PyPDF2.PdfReader(file)
+            yield len(reader.pages), lambda index: reader.pages[index].extract_text() or ""
+
+
+class PyMuPDFBackend(PDFBackend):
+    name = "pymupdf"
+
+    # MuPDF不支持多线程同时调用，同一进程内的调用逐个执行（按页加锁，不会在两页之间占用锁）
+    _lock = threading.Lock()
+
+    def _module(self):
+        try:
+            import pymupdf
+        except ImportError:
+            # 1.24之前的版本只提供fitz模块
+            import fitz as pymupdf
+        return pymupdf
+
+    def is_available(self):
+        try:
+            self._module()
+            return True
+        except ImportError:
+            return False
+
+    @contextlib.contextmanager
+    def open(self, pdf_path):
+        pymupdf = self._module()
+
+        with self._lock:
+            document = pymupdf.open(pdf_path)
+        try:
+            def page_text(index):
+                with self._lock:
+                    return document[index].get_text()
+
+            yield document.page_count, page_text
+        finally:
+            with self._lock:
+                document.close()
+
+
+class PdfiumBackend(PDFBackend):
+    name = "pypdfium2"
+
+    # pdfium不是线程安全的，同一进程内的调用逐个执行
+    _lock = threading.Lock()
+
+    def is_available(self):
+        try:
+            import pypdfium2  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    @contextlib.contextmanager
+    def open(self, pdf_path):
+        import pypdfium2
+
+        with self._lock:
+            document = pypdfium2.PdfDocument(pdf_path)
+        try:
+            def page_text(index):
+                with self._lock:
+                    page = document[index]
+                    try:
+                        textpage = page.get_textpage()
+                        try:
+                            # pdfium按Windows换行符输出
+                            return textpage.get_text_range().replace("\r\n", "\n")
+                        finally:
+                            textpage.close()
+                    finally:
+                        page.close()
+
+            yield len(document), page_text
+        finally:
+            with self._lock:
+                document.close()
+
+
+BACKENDS = {backend.name: backend for backend in (PyMuPDFBackend(), PdfiumBackend(), PyPDF2Backend())}
+
+# auto模式下的选择顺序
+AUTO_ORDER = ("pymupdf", "pypdfium2", "pypdf2")
+
+_warned = set()
+
+
+def available_backends():
+    """
+    返回已安装的后端名称列表（按auto模式的选择顺序）
+    """
+    return [name for name in AUTO_ORDER if BACKENDS[name].is_available()]
+
+
+def get_backend(name=None):
+    """
+    获取PDF文本提取后端
+
+    参数:
+        name (str, optional): 后端名称（auto、pymupdf、pypdfium2、pypdf2），默认读取环境变量PDF_BACKEND，
+            未设置时为auto
+
+    返回:
+        PDFBackend: 后端对象；指定的后端未安装时返回auto模式选择的后端
+
+    异常:
+        ValueError: 未知的后端名称
+    """
+    name = (name or os.environ.get("PDF_BACKEND") or "auto").lower()
+
+    if name != "auto":
+        backend = BACKENDS.get(name)
+        if backend is None:
+            raise ValueError(f"未知的PDF后端: {name}，可选: auto, {', '.join(AUTO_ORDER)}")
+        if backend.is_available():
+            return backend
+        if name not in _warned:
+            _warned.add(name)
+            logger.warning(f"PDF后端 {name} 未安装，将自动选择可用的后端")
+
+    for candidate in AUTO_ORDER:
+        if BACKENDS[candidate].is_available():
+            return BACKENDS[candidate]
@@ -1,47 +1,426 @@
 import os
-import PyPDF2
+import re
+import atexit
 import logging
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .text_cache import file_sha256, get_default_cache
+from .pdf_backends import get_backend
+from .pdf_sandbox import PDFExtractionError, iter_pages_sandboxed, REASON_ERROR, REASON_NOT_FOUND
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def extract_text_from_pdf(pdf_path):
+# 页数达到该值的PDF按页分段在多个进程中并行提取
+PARALLEL_MIN_PAGES = int(os.environ.get("PDF_PARALLEL_MIN_PAGES", 100))
+
+def _extract_page_range(pdf_path, start, end, backend_name=None):
+    """
+    提取指定页范围的文本（在工作进程中执行，每个进程独立打开PDF文件）
+    
+    参数:
+        pdf_path (str): PDF文件路径
+        start (int): 起始页（含）
+        end (int): 结束页（不含）
+        backend_name (str, optional): PDF后端名称
+        
+    返回:
+        list: 每页的文本
+    """
+    with get_backend(backend_name).open(pdf_path) as (_, page_text):
+        return [page_text(page_num) for page_num in range(start, end)]
+
+def _extract_page_range_args(args):
+    return _extract_page_range(*args)
+
+def _resolve_processes(processes, num_pages):
+    """按页数和当前进程确定并行提取的进程数，返回1表示在当前进程中顺序提取"""
+    if processes is None:
+        processes = int(os.environ.get("PDF_EXTRACT_PROCESSES", 1))
+    if processes == 0:
+        processes = os.cpu_count() or 1
+    
+    if processes <= 1 or num_pages < max(PARALLEL_MIN_PAGES, 2):
+        return 1
+    
+    # 守护进程（如multiprocessing.Pool的工作进程）不能再创建子进程
+    if multiprocessing.current_process().daemon:
+        return 1
+    
+    return min(processes, num_pages)
+
+# 进程内共享的页并行提取进程池：同一进程中的多个线程（如批量流水线的PDF线程）共用一个池，
+# 进程数不随调用方的数量增加
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool(processes):
+    """
+    获取共享进程池（首次调用时按processes创建，之后的调用复用同一个池）
+    
+    工作进程通过forkserver（不支持时为spawn）启动，不从已经运行心跳、LLM请求等线程的当前进程fork，
+    避免子进程继承被其他线程持有的锁
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _pool = context.Pool(processes=processes)
+            atexit.register(_shutdown_pool)
+        return _pool
+
+def _shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.terminate()
+            _pool.join()
+            _pool = None
+
+def _use_sandbox(sandbox):
+    if sandbox is None:
+        return os.environ.get("PDF_SANDBOX", "False").lower() == "true"
+    return sandbox
+
+def _iter_page_texts(pdf_path, processes=None, backend=None, sandbox=False):
+    """
+    按页序逐页返回PDF的文本（空页返回空字符串），大文件按页分段并行提取
+    
+    参数:
+        pdf_path (str): PDF文件路径
+        processes (int, optional): 并行提取的进程数，见extract_text_with_offsets
+        backend (PDFBackend, optional): PDF后端，默认按环境变量PDF_BACKEND选择
+        sandbox (bool): 是否在沙箱子进程中提取（不按页并行）
+        
+    返回:
+        generator: 每页的文本
+    """
+    backend = backend or get_backend()
+    
+    if sandbox:
+        yield from iter_pages_sandboxed(pdf_path, backend.name)
+        return
+    
+    with backend.open(pdf_path) as (num_pages, page_text):
+        processes = _resolve_processes(processes, num_pages)
+        
+        logger.info(f"开始提取PDF文本，共 {num_pages} 页（{backend.name}）: {pdf_path}")
+        
+        if processes == 1:
+            for page_num in range(num_pages):
+                yield page_text(page_num)
+    
+    if processes > 1:
+        # 每个进程分到多段连续的页，页的复杂程度不同时仍能均衡负载
+        step = max(1, -(-num_pages // (processes * 4)))
+        ranges = [(pdf_path, start, min(start + step, num_pages), backend.name)
+                  for start in range(0, num_pages, step)]
+        logger.info(f"按页并行提取: {len(ranges)} 段，{processes} 个进程")
+        
+        # imap按提交顺序返回，保证页序不变
+        for texts in _get_pool(processes).imap(_extract_page_range_args, ranges):
+            yield from texts
+    
+    logger.info(f"PDF文本提取完成: {pdf_path}")
+
+def _text_cache_key(pdf_path, backend):
+    """文本缓存的键：PDF内容的SHA-256加后端名称（不同后端提取的文本不同）"""
+    return f"{file_sha256(pdf_path)}-{backend.name}"
+
+def extract_text_with_offsets(pdf_path, use_cache=True, processes=None, backend=None, sandbox=None,
+                              raise_errors=False):
+    """
+    从PDF文件中提取文本，并返回每页的起始偏移量
+    
+    以PDF内容的SHA-256和后端名称为键查询文本缓存，命中时无需重新解析PDF。页数不少于PDF_PARALLEL_MIN_PAGES的
+    大文件按页分段，在多个进程中并行提取
+    
+    参数:
+        pdf_path (str): PDF文件的路径
+        use_cache (bool): 是否使用文本缓存，默认为True
+        processes (int, optional): 大文件并行提取的进程数，默认读取环境变量PDF_EXTRACT_PROCESSES，
+            未设置时为1（顺序提取）；0表示使用全部CPU核心。并行提取使用进程内共享的进程池，
+            池的大小由第一次并行提取时的进程数决定
+        backend (str, optional): PDF后端名称（见pdf_backends），默认读取环境变量PDF_BACKEND，
+            未设置时使用已安装的最快后端
+        sandbox (bool, optional): 是否在有超时和内存限制的子进程中解析（见pdf_sandbox），
+            默认读取环境变量PDF_SANDBOX（默认False）
+        raise_errors (bool): 失败时抛出带失败原因的PDFExtractionError，而不是返回空结果
+        
+    返回:
+        tuple: (提取的文本内容, 每页文本在全文中的起始字符偏移量列表)，失败时返回("", [])
+    """
+    if not os.path.exists(pdf_path):
+        logger.error(f"PDF文件不存在: {pdf_path}")
+        if raise_errors:
+            raise PDFExtractionError(REASON_NOT_FOUND, "PDF文件不存在")
+        return "", []
+    
+    backend = get_backend(backend)
+    cache = get_default_cache() if use_cache else None
+    cache_key = None
+    
+    if cache:
+        try:
+            cache_key = _text_cache_key(pdf_path, backend)
+            entry = cache.get(cache_key)
+            if entry is not None:
+                logger.info(f"[文本缓存] 命中缓存，跳过PDF解析: {pdf_path}")
+                return entry["text"], entry["page_offsets"]
+        except OSError as e:
+            logger.warning(f"[文本缓存] 计算文件哈希失败: {pdf_path}: {str(e)}")
+            cache_key = None
+    
+    try:
+        parts = []
+        page_offsets = []
+        offset = 0
+        for page_text in _iter_page_texts(pdf_path, processes, backend, _use_sandbox(sandbox)):
+            page_offsets.append(offset)
+            if page_text:
+                parts.append(page_text + "\n\n")
+                offset += len(page_text) + 2
+        
+        text = "".join(parts)
+        
+        if cache_key:
+            cache.set(cache_key, text, page_offsets)
+        
+        return text, page_offsets
+    except Exception as e:
+        logger.error(f"PDF文本提取失败 {pdf_path}: {str(e)}")
+        if raise_errors:
+            if isinstance(e, PDFExtractionError):
+                raise
+            raise PDFExtractionError(REASON_ERROR, f"{type(e).__name__}: {str(e)}") from e
+        return "", []
+
+def extract_text_from_pdf(pdf_path, use_cache=True, processes=None, backend=None, sandbox=None, raise_errors=False):
     """
     从PDF文件中提取文本
     
     参数:
         pdf_path (str): PDF文件的路径
+        use_cache (bool): 是否使用文本缓存，默认为True
+        processes (int, optional): 大文件按页并行提取的进程数，见extract_text_with_offsets
+        backend (str, optional): PDF后端名称，见extract_text_with_offsets
+        sandbox (bool, optional): 是否在沙箱子进程中解析，见extract_text_with_offsets
+        raise_errors (bool): 失败时抛出PDFExtractionError，见extract_text_with_offsets
         
     返回:
         str: 提取的文本内容
     """
+    text, _ = extract_text_with_offsets(pdf_path, use_cache=use_cache, processes=processes, backend=backend,
+                                        sandbox=sandbox, raise_errors=raise_errors)
+    return text
+
+def iter_pdf_pages(pdf_path, use_cache=True, processes=None, backend=None, sandbox=None):
+    """
+    逐页返回PDF文本，不拼接全文
+    
+    适合按页增量处理的调用方（如SectionCollector和LLMProcessor.iter_text_chunks）。命中文本缓存时
+    按缓存的页偏移量切分全文；未命中时边解析边返回，全部页返回后写入文本缓存，之后再读取同一文件
+    无需重新解析。不使用缓存时内存占用只与正在处理的几页有关
+    
+    参数:
+        pdf_path (str): PDF文件的路径
+        use_cache (bool): 是否读取和写入文本缓存，默认为True
+        processes (int, optional): 大文件按页并行提取的进程数，见extract_text_with_offsets
+        backend (str, optional): PDF后端名称，见extract_text_with_offsets
+        sandbox (bool, optional): 是否在沙箱子进程中解析，见extract_text_with_offsets
+        
+    返回:
+        generator: (页码, 页面文本)，页码从1开始，空页的文本为空字符串；文件不存在时不返回任何页，
+        解析失败时抛出PDFExtractionError（调用方不会把不完整的文本当作全文处理）
+    """
     if not os.path.exists(pdf_path):
         logger.error(f"PDF文件不存在: {pdf_path}")
-        return ""
+        return
+    
+    backend = get_backend(backend)
+    cache = get_default_cache() if use_cache else None
+    cache_key = None
+    
+    if cache:
+        entry = None
+        try:
+            cache_key = _text_cache_key(pdf_path, backend)
+            entry = cache.get(cache_key)
+        except OSError as e:
+            logger.warning(f"[文本缓存] 计算文件哈希失败: {pdf_path}: {str(e)}")
+        
+        if entry is not None:
+            logger.info(f"[文本缓存] 命中缓存，跳过PDF解析: {pdf_path}")
+            text, page_offsets = entry["text"], entry["page_offsets"]
+            ends = page_offsets[1:] + [len(text)]
+            for page_num, (start, end) in enumerate(zip(page_offsets, ends), 1):
+                # 去掉页尾的分隔空行
+                yield page_num, text[start:max(start, end - 2)]
+            return
+    
+    # 写入缓存时保留各页文本和偏移量（格式与extract_text_with_offsets相同），全部页返回后再拼接写入
+    parts = [] if cache_key else None
+    page_offsets = []
+    offset = 0
     
     try:
-        text = ""
-        with open(pdf_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            num_pages = len(reader.pages)
-            
-            logger.info(f"开始提取PDF文本，共 {num_pages} 页: {pdf_path}")
-            
-            # 遍历所有页面并提取文本
-            for page_num in range(num_pages):
-                page = reader.pages[page_num]
-                page_text = page.extract_text()
-                
+        for page_num, page_text in enumerate(_iter_page_texts(pdf_path, processes, backend, _use_sandbox(sandbox)), 1):
+            if parts is not None:
+                page_offsets.append(offset)
                 if page_text:
-                    text += page_text + "\n\n"
-                    
-            logger.info(f"PDF文本提取完成: {pdf_path}")
-            
-        return text
+                    parts.append(page_text)
+                    offset += len(page_text) + 2
+            yield page_num, page_text
+    except PDFExtractionError as e:
+        logger.error(f"PDF文本提取失败 {pdf_path}: {str(e)}")
+        raise
     except Exception as e:
         logger.error(f"PDF文本提取失败 {pdf_path}: {str(e)}")
-        return ""
+        raise PDFExtractionError(REASON_ERROR, f"{type(e).__name__}: {str(e)}") from e
+    
+    # 调用方提前停止读取时不会执行到这里，不完整的文本不会写入缓存
+    if parts is not None:
+        cache.set(cache_key, "".join(page + "\n\n" for page in parts), page_offsets)
+
+# 常见章节标题关键词（编号前缀如 "1."、"II." 由标题正则统一处理）
+SECTION_KEYWORDS = {
+    "abstract": ["abstract"],
+    "introduction": ["introduction"],
+    "methods": ["methods", "methodology", "experimental method"],
+    "experimental_setup": ["experimental setup", "setup", "apparatus", "experimental details"],
+    "results": ["results", "measurements", "experimental results"],
+    "discussion": ["discussion"],
+    "conclusion": ["conclusion", "conclusions", "summary"]
+}
+
+# 标题关键词到章节名称的映射
+_KEYWORD_TO_SECTION = {
+    keyword: section_name
+    for section_name, keywords in SECTION_KEYWORDS.items()
+    for keyword in keywords
+}
+
+# 匹配章节标题行：可选的阿拉伯/罗马数字编号，后接关键词，关键词后为行尾或冒号
+_HEADING_RE = re.compile(
+    r"^[ \t]*(?:(?:\d+(?:\.\d+)*|[ivxlc]+)\.?[ \t]+)?"
+    r"(?P<title>" + "|".join(
+        re.escape(k).replace(r"\ ", r"[ \t]+") for k in sorted(_KEYWORD_TO_SECTION, key=len, reverse=True)
+    ) + r")[ \t]*(?::|\r?$)",
+    re.IGNORECASE | re.MULTILINE
+)
+
+def find_section_spans(text):
+    """
+    单次扫描文本，找出所有章节标题及其内容范围
+    
+    参数:
+        text (str): 论文文本
+        
+    返回:
+        list: 按出现顺序排列的章节列表，每项包含 name（章节名称）、heading（标题行文本）、
+              heading_start（标题起始偏移量）、start 和 end（章节内容的字符范围，text[start:end]）；
+              同名章节重复出现时全部保留
+    """
+    spans = []
+    
+    for match in _HEADING_RE.finditer(text):
+        title = " ".join(match.group("title").lower().split())
+        
+        # 上一个章节在本标题处结束
+        if spans:
+            spans[-1]["end"] = match.start()
+        
+        spans.append({
+            "name": _KEYWORD_TO_SECTION[title],
+            "heading": match.group(0).strip(),
+            "heading_start": match.start(),
+            "start": match.end(),
+            "end": len(text)
+        })
+    
+    return spans
+
+class SectionCollector:
+    """
+    增量识别章节：按页输入文本，只保留各章节的内容，不保留全文
+    
+    章节标题按行匹配，不会跨页，因此逐页识别与对全文调用find_section_spans的结果相同
+    """
+    
+    def __init__(self, section_names=None, max_chars=None):
+        """
+        初始化
+        
+        参数:
+            section_names (iterable, optional): 只收集这些章节，默认收集全部章节
+            max_chars (int, optional): 每个章节最多保留的字符数，超出部分丢弃，默认不限制
+        """
+        self.section_names = set(section_names) if section_names else None
+        self.max_chars = max_chars
+        self._contents = {}
+        self._lengths = {}
+        self._current = None
+        self._parts = []
+    
+    def feed(self, text):
+        """
+        输入一页（或一段以完整行结尾的）文本，页与页之间按空行分隔
+        
+        参数:
+            text (str): 页面文本
+        """
+        spans = find_section_spans(text)
+        
+        # 第一个标题之前的文本属于上一页延续下来的章节
+        self._append(text[:spans[0]["heading_start"]] if spans else text)
+        
+        for span in spans:
+            self._finish_section()
+            self._current = span["name"]
+            self._append(text[span["start"]:span["end"]])
+        
+        self._append("\n\n")
+    
+    def close(self):
+        """
+        输入结束
+        
+        返回:
+            dict: 与extract_sections相同的章节字典，full_text为空字符串
+        """
+        self._finish_section()
+        
+        sections = {name: "" for name in SECTION_KEYWORDS}
+        for section_name, contents in self._contents.items():
+            sections[section_name] = "\n\n".join(contents)
+        sections["full_text"] = ""
+        return sections
+    
+    def _append(self, piece):
+        name = self._current
+        if name is None or (self.section_names is not None and name not in self.section_names):
+            return
+        
+        if not self._parts:
+            piece = piece.lstrip()
+        if self.max_chars is not None:
+            piece = piece[:max(0, self.max_chars - self._lengths.get(name, 0))]
+        
+        if piece:
+            self._parts.append(piece)
+            self._lengths[name] = self._lengths.get(name, 0) + len(piece)
+    
+    def _finish_section(self):
+        if self._current is not None:
+            content = "".join(self._parts).strip()
+            if content:
+                self._contents.setdefault(self._current, []).append(content)
+                # 同名章节之间的分隔
+                self._lengths[self._current] = self._lengths.get(self._current, 0) + 2
+        self._parts = []
 
 def extract_sections(text):
     """
@@ -51,106 +430,114 @@ def extract_sections(text):
         text (str): 论文文本
         
     返回:
-        dict: 包含不同章节的字典，如摘要、引言、方法、结果、讨论等
-    """
-    sections = {
-        "abstract": "",
-        "introduction": "",
-        "methods": "",
-        "experimental_setup": "",
-        "results": "",
-        "discussion": "",
-        "conclusion": "",
-        "full_text": text  # 始终包含完整文本
-    }
+        dict: 包含不同章节的字典，如摘要、引言、方法、结果、讨论等；
+              同名章节出现多次时按出现顺序合并
+    """
+    collector = SectionCollector()
+    collector.feed(text)
+    sections = collector.close()
+    sections["full_text"] = text  # 始终包含完整文本
+    return sections
+
+def _process_pdf_file(pdf_path, sandbox=False):
+    """
+    处理单个PDF文件：提取文本和章节（可在工作进程中执行）
     
-    # 查找常见章节标题
-    section_keywords = {
-        "abstract": ["abstract"],
-        "introduction": ["introduction", "1. introduction", "i. introduction"],
-        "methods": ["methods", "methodology", "experimental method", "2. methods", "ii. methods"],
-        "experimental_setup": ["experimental setup", "setup", "apparatus", "experimental details"],
-        "results": ["results", "3. results", "iii. results", "measurements", "experimental results"],
-        "discussion": ["discussion", "4. discussion", "iv. discussion"],
-        "conclusion": ["conclusion", "conclusions", "summary", "5. conclusion", "v. conclusion"]
-    }
+    参数:
+        pdf_path (str): PDF文件路径
+        sandbox (bool): 是否在沙箱子进程中解析
+        
+    返回:
+        dict: 文本内容和元数据，提取失败时返回None（失败原因记录在日志中）
+    """
+    # 提取文本
+    text = extract_text_from_pdf(pdf_path, sandbox=sandbox)
     
-    # 尝试查找章节并提取
-    lines = text.split('\n')
-    current_section = None
-    
-    for i, line in enumerate(lines):
-        # 检查当前行是否是章节标题
-        line_lower = line.lower().strip()
-        
-        for section_name, keywords in section_keywords.items():
-            if any(keyword == line_lower or line_lower.startswith(f"{keyword}:") for keyword in keywords):
-                current_section = section_name
-                break
-        
-        # 如果找到章节标题，提取该章节内容
-        if current_section and i < len(lines) - 1:
-            # 从当前行开始，到下一个章节标题之前
-            section_text = []
-            j = i + 1
-            while j < len(lines):
-                next_line_lower = lines[j].lower().strip()
-                is_next_section = False
-                
-                for keywords in section_keywords.values():
-                    if any(keyword == next_line_lower or next_line_lower.startswith(f"{keyword}:") for keyword in keywords):
-                        is_next_section = True
-                        break
-                
-                if is_next_section:
-                    break
-                
-                section_text.append(lines[j])
-                j += 1
-            
-            # 将提取的内容添加到相应章节
-            sections[current_section] = "\n".join(section_text).strip()
+    if not text:
+        return None
     
-    return sections
+    # 提取章节
+    sections = extract_sections(text)
+    
+    return {
+        "filename": os.path.basename(pdf_path),
+        "path": pdf_path,
+        "sections": sections,
+        "text_length": len(text)
+    }
 
-def batch_process_pdfs(pdf_dir):
+def iter_process_pdfs(pdf_dir, processes=1, chunksize=None, sandbox=None):
     """
-    批量处理指定目录中的所有PDF文件
+    逐个返回目录中PDF文件的处理结果，每完成一个文件就立即产出
     
     参数:
         pdf_dir (str): 包含PDF文件的目录
+        processes (int, optional): 工作进程数，1表示在当前进程中顺序处理，None表示使用全部CPU核心
+        chunksize (int, optional): 每次分派给工作进程的文件数，默认按文件数和进程数自动计算
+        sandbox (bool, optional): 是否在沙箱子进程中解析（每个文件一个子进程，超时或超出内存上限的文件
+            被跳过，不会阻塞其他文件），默认读取环境变量PDF_SANDBOX
         
     返回:
-        list: 每个PDF文件的文本内容和元数据的列表
+        generator: 每个成功处理的PDF文件的结果字典（多进程时按完成顺序）
     """
     if not os.path.exists(pdf_dir):
         logger.error(f"目录不存在: {pdf_dir}")
-        return []
+        return
     
-    results = []
-    pdf_files = [f for f in os.listdir(pdf_dir) if f.lower().endswith('.pdf')]
+    pdf_files = sorted(f for f in os.listdir(pdf_dir) if f.lower().endswith('.pdf'))
+    pdf_paths = [os.path.join(pdf_dir, f) for f in pdf_files]
     
-    logger.info(f"开始批量处理 {len(pdf_files)} 个PDF文件")
+    processes = processes or os.cpu_count() or 1
+    processes = min(processes, len(pdf_paths)) or 1
     
-    for pdf_file in pdf_files:
-        pdf_path = os.path.join(pdf_dir, pdf_file)
-        
-        # 提取文本
-        text = extract_text_from_pdf(pdf_path)
+    sandbox = _use_sandbox(sandbox)
+    
+    logger.info(f"开始批量处理 {len(pdf_paths)} 个PDF文件，工作进程数: {processes}")
+    
+    if processes == 1:
+        for pdf_path in pdf_paths:
+            result = _process_pdf_file(pdf_path, sandbox)
+            if result:
+                yield result
+        return
+    
+    if sandbox:
+        # 沙箱模式下解析已在子进程中进行，用线程调度即可（进程池的工作进程不能再创建子进程）
+        with ThreadPoolExecutor(max_workers=processes, thread_name_prefix="pdf-sandbox") as executor:
+            futures = [executor.submit(_process_pdf_file, pdf_path, True) for pdf_path in pdf_paths]
+            for future in as_completed(futures):
+                result = future.result()
+                if result:
+                    yield result
+        return
+    
+    # 分块调度：每个进程一次领取多个文件，减少进程间通信开销，同时保留负载均衡
+    if chunksize is None:
+        chunksize = max(1, len(pdf_paths) // (processes * 4))
+    
+    with multiprocessing.Pool(processes=processes) as pool:
+        for result in pool.imap_unordered(_process_pdf_file, pdf_paths, chunksize=chunksize):
+            if result:
+                yield result
+
+def batch_process_pdfs(pdf_dir, processes=1, chunksize=None, sandbox=None):
+    """
+    批量处理指定目录中的所有PDF文件
+    
+    参数:
+        pdf_dir (str): 包含PDF文件的目录
+        processes (int, optional): 工作进程数，1表示顺序处理，None表示使用全部CPU核心
+        chunksize (int, optional): 每次分派给工作进程的文件数
         
-        if text:
-            # 提取章节
-            sections = extract_sections(text)
-            
-            # 收集结果
-            result = {
-                "filename": pdf_file,
-                "path": pdf_path,
-                "sections": sections,
-                "text_length": len(text)
-            }
-            
-            results.append(result)
+    返回:
+        list: 每个PDF文件的文本内容和元数据的列表，按文件名排序
+    """
+    if not os.path.exists(pdf_dir):
+        logger.error(f"目录不存在: {pdf_dir}")
+        return []
+    
+    results = list(iter_process_pdfs(pdf_dir, processes=processes, chunksize=chunksize, sandbox=sandbox))
+    results.sort(key=lambda r: r["filename"])
     
     logger.info(f"批量处理完成，成功处理 {len(results)} 个PDF文件")
     return results
@@ -159,11 +546,15 @@ if __name__ == "__main__":
     # 测试
     import sys
     
-    if len(sys.argv) > 1:
+    if len(sys.argv) > 1 and os.path.isdir(sys.argv[1]):
+        # 目录：使用全部CPU核心批量处理
+        for result in iter_process_pdfs(sys.argv[1], processes=None):
+            print(f"{result['filename']}: {result['text_length']} 字符")
+    elif len(sys.argv) > 1:
         pdf_path = sys.argv[1]
         text = extract_text_from_pdf(pdf_path)
         print(f"提取的文本长度: {len(text)} 字符")
         print("文本前500个字符:")
         print(text[:500] + "...")
     else:
-        print("请提供PDF文件路径作为参数") 
\ No newline at end of file
+        print("请提供PDF文件或目录路径作为参数") 
\ No newline at end of file
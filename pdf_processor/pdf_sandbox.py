@@ -0,0 +1,213 @@
+"""
+沙箱中的PDF文本提取
+
+损坏或恶意构造的PDF可能让解析器无限循环或耗尽内存。沙箱模式在独立的子进程中解析PDF，
+逐页把文本传回父进程，父进程限制：
+- 每页的等待时间（打开文件也计入第一页）
+- 整个文件的等待时间
+- 子进程的内存上限（RLIMIT_AS，仅Unix）
+
+超出限制时结束子进程并抛出PDFExtractionError，异常中记录失败原因，不会一直占用worker
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import threading
+import subprocess
+
+try:
+    from .pdf_backends import BACKENDS, get_backend
+except ImportError:  # 作为子进程入口运行（python -m pdf_processor.pdf_sandbox）
+    from pdf_processor.pdf_backends import BACKENDS, get_backend
+
+try:
+    import resource
+except ImportError:  # Windows没有resource模块，不限制内存
+    resource = None
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# 失败原因
+REASON_DOCUMENT_TIMEOUT = "document_timeout"
+REASON_PAGE_TIMEOUT = "page_timeout"
+REASON_MEMORY_LIMIT = "memory_limit"
+REASON_CRASHED = "crashed"
+REASON_ERROR = "error"
+REASON_NOT_FOUND = "not_found"
+
+
+class PDFExtractionError(Exception):
+    """
+    PDF文本提取失败
+
+    属性:
+        reason (str): 失败原因（REASON_*常量）
+    """
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+def _limits_from_env():
+    return (
+        float(os.environ.get("PDF_SANDBOX_DOCUMENT_TIMEOUT", 300)),
+        float(os.environ.get("PDF_SANDBOX_PAGE_TIMEOUT", 30)),
+        int(os.environ.get("PDF_SANDBOX_MEMORY_MB", 2048)),
+    )
+
+
+# 项目根目录，子进程通过python -m pdf_processor.pdf_sandbox启动
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _sandbox_main(pdf_path, backend_name, memory_limit_mb):
+    """
+    子进程入口：逐页提取文本，每条消息以一行JSON写到标准输出
+
+    消息: {"pages": 页数}、{"page": 页序号, "text": 文本}、{"done": true}、{"error": 原因, "message": 说明}
+    """
+    # 消息使用原来的标准输出，标准输出本身重定向到标准错误，避免解析库的输出混入消息
+    output = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    def send(message):
+        output.write(json.dumps(message) + "\n")
+        output.flush()
+
+    try:
+        if resource is not None and memory_limit_mb:
+            limit = memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+        # 父进程已选定后端，子进程不能再用get_backend回退到其他后端（父进程按后端名称缓存文本）
+        backend = BACKENDS[backend_name]
+        with backend.open(pdf_path) as (num_pages, page_text):
+            send({"pages": num_pages})
+            for page_num in range(num_pages):
+                send({"page": page_num, "text": page_text(page_num)})
+        send({"done": True})
+    except MemoryError:
+        send({"error": REASON_MEMORY_LIMIT, "message": f"内存超过上限 {memory_limit_mb} MB"})
+    except ImportError as e:
+        # 在内存上限下加载扩展模块可能因无法映射共享库而失败
+        out_of_memory = memory_limit_mb and "cannot allocate memory" in str(e).lower()
+        send({
+            "error": REASON_MEMORY_LIMIT if out_of_memory else REASON_ERROR,
+            "message": f"无法加载PDF后端 {backend_name}: {str(e)[:500]}"
+        })
+    except Exception as e:
+        send({"error": REASON_ERROR, "message": f"{type(e).__name__}: {str(e)[:500]}"})
+    finally:
+        output.close()
+
+
+def _start_process(pdf_path, backend_name, memory_limit_mb):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [PROJECT_ROOT, env.get("PYTHONPATH")]))
+    return subprocess.Popen(
+        [sys.executable, "-m", "pdf_processor.pdf_sandbox", pdf_path, backend_name, str(memory_limit_mb)],
+        stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, env=env
+    )
+
+
+def _read_lines(stream, lines):
+    for line in stream:
+        lines.put(line)
+    lines.put(None)
+
+
+def iter_pages_sandboxed(pdf_path, backend=None, document_timeout=None, page_timeout=None, memory_limit_mb=None):
+    """
+    在子进程中逐页提取PDF文本
+
+    子进程是新启动的解释器，不继承父进程的线程和锁。超时只计算父进程等待子进程的时间：
+    调用方处理每页文本（如发送LLM请求）所用的时间不计入
+
+    参数:
+        pdf_path (str): PDF文件路径
+        backend (str, optional): PDF后端名称，见pdf_backends.get_backend
+        document_timeout (float, optional): 整个文件的等待时间上限（秒），默认读取环境变量
+            PDF_SANDBOX_DOCUMENT_TIMEOUT（300）
+        page_timeout (float, optional): 每页的等待时间上限（秒），默认读取环境变量PDF_SANDBOX_PAGE_TIMEOUT（30）
+        memory_limit_mb (int, optional): 子进程的内存上限（MB），默认读取环境变量PDF_SANDBOX_MEMORY_MB（2048），
+            0表示不限制
+
+    返回:
+        generator: 每页的文本（空页为空字符串）
+
+    异常:
+        PDFExtractionError: 超时、超出内存上限、子进程崩溃或解析出错
+    """
+    default_document_timeout, default_page_timeout, default_memory_limit = _limits_from_env()
+    document_timeout = document_timeout or default_document_timeout
+    page_timeout = page_timeout or default_page_timeout
+    if memory_limit_mb is None:
+        memory_limit_mb = default_memory_limit
+
+    backend_name = get_backend(backend).name
+    process = _start_process(pdf_path, backend_name, memory_limit_mb)
+
+    # 读取线程把子进程的输出逐行放入队列，主线程按剩余时间等待
+    lines = queue.Queue()
+    reader = threading.Thread(target=_read_lines, args=(process.stdout, lines), daemon=True)
+    reader.start()
+
+    waited = 0.0
+    page_num = 0
+    num_pages = None
+
+    try:
+        while True:
+            # 本次最多等待：每页的时间上限与整个文件剩余时间中较小的一个
+            wait = min(page_timeout, document_timeout - waited)
+            if wait <= 0:
+                raise PDFExtractionError(
+                    REASON_DOCUMENT_TIMEOUT, f"整个文件超过 {document_timeout:.0f} 秒未提取完成（已提取 {page_num} 页）"
+                )
+
+            start = time.monotonic()
+            try:
+                line = lines.get(timeout=wait)
+            except queue.Empty:
+                waited += time.monotonic() - start
+                if waited >= document_timeout:
+                    continue
+                location = f"第 {page_num + 1} 页" if num_pages is not None else "打开文件"
+                raise PDFExtractionError(REASON_PAGE_TIMEOUT, f"{location}超过 {page_timeout:.0f} 秒未完成")
+            waited += time.monotonic() - start
+
+            if line is None:
+                returncode = process.wait()
+                detail = f"信号 {-returncode}" if returncode < 0 else f"退出码 {returncode}"
+                raise PDFExtractionError(
+                    REASON_CRASHED, f"解析进程异常退出（{detail}），可能超出内存上限 {memory_limit_mb} MB 或PDF损坏"
+                )
+
+            message = json.loads(line)
+            if "pages" in message:
+                num_pages = message["pages"]
+                logger.info(f"开始在沙箱中提取PDF文本，共 {num_pages} 页（{backend_name}）: {pdf_path}")
+            elif "page" in message:
+                page_num = message["page"] + 1
+                yield message["text"]
+            elif "done" in message:
+                logger.info(f"PDF文本提取完成: {pdf_path}")
+                return
+            else:
+                raise PDFExtractionError(message["error"], message["message"])
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        process.stdout.close()
+
+
+if __name__ == "__main__":
+    _sandbox_main(sys.argv[1], sys.argv[2], int(sys.argv[3]))
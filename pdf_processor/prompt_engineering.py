@@ -4,6 +4,9 @@
 此模块包含用于引导LLM从激光物理论文中提取参数的专业提示模板
 """
 
+from .pdf_extractor import extract_sections
+from .tokenizer import truncate_to_tokens
+
 # 基本参数提取提示
 PARAMETER_EXTRACTION_PROMPT = """
 You are a specialized scientific assistant for laser physics papers.
@@ -133,8 +136,62 @@ def get_extraction_prompt(paper_topic=None):
     # 默认返回基本的参数提取提示
     return PARAMETER_EXTRACTION_PROMPT
 
+# 章节模式下送入LLM的章节及其字符预算（按顺序排列，合计与默认的max_text_length相同）
+DEFAULT_SECTION_BUDGETS = {
+    "abstract": 1500,
+    "methods": 2500,
+    "experimental_setup": 3000,
+    "results": 3000
+}
+
+# 章节在提示中显示的标题
+SECTION_TITLES = {
+    "abstract": "Abstract",
+    "methods": "Methods",
+    "experimental_setup": "Experimental Setup",
+    "results": "Results"
+}
+
+def build_section_text(text, section_budgets=None, sections=None):
+    """
+    从论文中选取包含参数最多的章节（摘要、方法、实验装置、结果），按章节预算截断后拼接
+    
+    某个章节缺失或较短时，未用完的预算顺延给后面的章节
+    
+    参数:
+        text (str): 论文全文
+        section_budgets (dict, optional): 章节名称到字符预算的有序映射，默认使用DEFAULT_SECTION_BUDGETS
+        sections (dict, optional): 已识别的章节（如SectionCollector逐页收集的结果），提供时不再解析text
+        
+    返回:
+        str: 拼接后的章节文本，未识别到任何目标章节时返回空字符串
+    """
+    section_budgets = section_budgets or DEFAULT_SECTION_BUDGETS
+    if sections is None:
+        sections = extract_sections(text)
+    
+    parts = []
+    carry_over = 0
+    
+    for section_name, budget in section_budgets.items():
+        budget += carry_over
+        content = sections.get(section_name, "")
+        
+        if len(content) > budget:
+            content = content[:budget] + "...[section truncated]"
+            carry_over = 0
+        else:
+            carry_over = budget - len(content)
+        
+        if content:
+            title = SECTION_TITLES.get(section_name, section_name.replace("_", " ").title())
+            parts.append(f"## {title}\n{content}")
+    
+    return "\n\n".join(parts)
+
 # 构建完整提示的函数
-def build_full_prompt(text, paper_info=None, topic=None, max_text_length=10000):
+def build_full_prompt(text, paper_info=None, topic=None, max_text_length=10000, mode="full", section_budgets=None,
+                      max_text_tokens=None):
     """
     构建完整的提示，包括论文文本和元数据
     
@@ -142,7 +199,11 @@ def build_full_prompt(text, paper_info=None, topic=None, max_text_length=10000):
         text (str): 论文文本内容
         paper_info (dict, optional): 论文元数据，包括标题、作者等
         topic (str, optional): 论文主题，用于选择提示模板
-        max_text_length (int, optional): 最大文本长度，默认10000字符
+        max_text_length (int, optional): 最大文本长度，默认10000字符（指定max_text_tokens时不使用）
+        mode (str, optional): 文本选取方式，"full"截取开头部分；"sections"按章节预算选取
+            摘要、方法、实验装置和结果，未识别到章节时退回"full"
+        section_budgets (dict, optional): "sections"模式下各章节的字符预算
+        max_text_tokens (int, optional): 论文文本的最大token数（按本地估算），优先于max_text_length
         
     返回:
         str: 完整的提示
@@ -150,8 +211,17 @@ def build_full_prompt(text, paper_info=None, topic=None, max_text_length=10000):
     # 选择提示模板
     extraction_prompt = get_extraction_prompt(topic)
     
+    # 按章节选取文本（长度已由章节预算限制）
+    section_text = build_section_text(text, section_budgets) if mode == "sections" else ""
+    if section_text:
+        text = section_text
+    
     # 截断文本以适应token限制
-    if len(text) > max_text_length:
+    elif max_text_tokens is not None:
+        truncated = truncate_to_tokens(text, max_text_tokens)
+        if len(truncated) < len(text):
+            text = truncated + "...[text truncated due to length]"
+    elif len(text) > max_text_length:
         text = text[:max_text_length] + "...[text truncated due to length]"
     
     # 构建论文元数据部分
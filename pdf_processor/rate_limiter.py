@@ -0,0 +1,333 @@
+"""
+LLM API限流与重试模块
+
+- RateLimiter: 客户端限流，同时限制每分钟请求数和每分钟token数（令牌桶）。收到429时按比例降低速率
+  并让所有线程暂停，请求成功后逐步恢复（加性增、乘性减），使并发请求在不触发限流的前提下用满配额
+- call_with_retry: 对429、5xx、超时和连接错误按指数退避（带随机抖动）重试，优先使用服务端返回的Retry-After
+
+同一进程内访问同一API的所有LLMProcessor共享一个限流器（见get_rate_limiter）。限流器不跨进程共享，
+LLM_RPM_LIMIT和LLM_TPM_LIMIT是所有进程的总配额，每个进程按LLM_RATE_LIMIT_PROCESSES平分
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+import email.utils
+
+import openai
+
+try:
+    import httpx
+    # 读取流式响应的过程中连接中断或读取超时时，SDK直接抛出httpx的传输错误
+    _TRANSPORT_ERRORS = (httpx.TransportError,)
+except ImportError:
+    _TRANSPORT_ERRORS = ()
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# 可以重试的HTTP状态码
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class _Bucket:
+    """令牌桶，rate为每秒补充量，rate<=0表示不限制"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        if self.rate > 0:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        if self.rate <= 0:
+            return 0.0
+        # 单次需求超过桶容量时等桶满即可，避免永远等待
+        deficit = min(amount, self.capacity) - self.level
+        return deficit / self.rate if deficit > 0 else 0.0
+
+    def resize(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = min(self.level, capacity)
+
+
+class RateLimiter:
+    """
+    自适应的请求数/token数限流器（线程安全）
+    """
+
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0, burst_seconds=10,
+                 min_factor=0.1, increase_step=0.05):
+        """
+        初始化限流器
+
+        参数:
+            requests_per_minute (float): 每分钟最大请求数，0表示不限制
+            tokens_per_minute (float): 每分钟最大token数，0表示不限制
+            burst_seconds (float): 令牌桶容量对应的秒数，即空闲后允许的突发量
+            min_factor (float): 收到429后速率最多降低到配置值的比例
+            increase_step (float): 每次请求成功后速率恢复的比例
+        """
+        self.requests_per_minute = requests_per_minute or 0
+        self.tokens_per_minute = tokens_per_minute or 0
+        self.burst_seconds = burst_seconds
+        self.min_factor = min_factor
+        self.increase_step = increase_step
+
+        # 当前速率相对配置值的比例
+        self.factor = 1.0
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+        self._requests = _Bucket(*self._bucket_size(self.requests_per_minute, minimum=1))
+        self._tokens = _Bucket(*self._bucket_size(self.tokens_per_minute, minimum=0))
+
+    def _bucket_size(self, per_minute, minimum):
+        rate = per_minute * self.factor / 60
+        return rate, max(minimum, rate * self.burst_seconds)
+
+    def _resize(self):
+        self._requests.resize(*self._bucket_size(self.requests_per_minute, minimum=1))
+        self._tokens.resize(*self._bucket_size(self.tokens_per_minute, minimum=0))
+
+    def acquire(self, tokens=0):
+        """
+        等待直到可以发送一个预计消耗tokens个token的请求
+
+        参数:
+            tokens (int): 预计消耗的token数
+
+        返回:
+            float: 等待的秒数
+        """
+        start = time.monotonic()
+
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._requests.refill(now)
+                self._tokens.refill(now)
+
+                wait = max(
+                    self._paused_until - now,
+                    self._requests.wait_time(1),
+                    self._tokens.wait_time(tokens)
+                )
+                if wait <= 0:
+                    self._requests.level -= 1
+                    self._tokens.level -= tokens
+                    return now - start
+
+                self._cond.wait(wait)
+
+    def record_success(self, estimated_tokens=0, actual_tokens=None):
+        """
+        请求成功：按实际用量修正token桶，并逐步恢复速率
+
+        参数:
+            estimated_tokens (int): acquire时预计的token数
+            actual_tokens (int, optional): 响应中返回的实际token数
+        """
+        with self._cond:
+            self._correct_tokens(estimated_tokens, actual_tokens)
+
+            if self.factor < 1.0:
+                self.factor = min(1.0, self.factor + self.increase_step)
+                self._resize()
+
+    def record_usage(self, estimated_tokens=0, actual_tokens=None):
+        """
+        按实际用量修正token桶，不改变速率（用于流式响应：请求成功时还不知道用量，
+        读取完最后一个数据块后才能修正）
+
+        参数:
+            estimated_tokens (int): acquire时预计的token数
+            actual_tokens (int, optional): 响应中返回的实际token数，None表示不修正
+        """
+        with self._cond:
+            self._correct_tokens(estimated_tokens, actual_tokens)
+
+    def _correct_tokens(self, estimated_tokens, actual_tokens):
+        if actual_tokens is None:
+            return
+        self._tokens.level -= actual_tokens - estimated_tokens
+        # 实际用量少于预计时归还的token可能让等待中的请求提前发送
+        if actual_tokens < estimated_tokens:
+            self._cond.notify_all()
+
+    def record_throttled(self, pause_seconds=None):
+        """
+        收到429：降低速率，并在pause_seconds内暂停所有请求
+
+        参数:
+            pause_seconds (float, optional): 暂停时长（通常来自Retry-After）
+        """
+        with self._cond:
+            self.factor = max(self.min_factor, self.factor / 2)
+            self._resize()
+            if pause_seconds:
+                self._paused_until = max(self._paused_until, time.monotonic() + pause_seconds)
+            self._cond.notify_all()
+
+        logger.warning(f"[限流] 收到限流响应，请求速率降低到配置值的 {self.factor:.0%}"
+                       + (f"，暂停 {pause_seconds:.1f} 秒" if pause_seconds else ""))
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(key, requests_per_minute=None, tokens_per_minute=None):
+    """
+    获取进程内共享的限流器（首次调用时创建）
+
+    默认配额读取环境变量LLM_RPM_LIMIT和LLM_TPM_LIMIT，并除以LLM_RATE_LIMIT_PROCESSES
+    （同时调用API的进程数），使多个进程的请求总量不超过配置的限额
+
+    参数:
+        key (str): 限流器标识，通常为API地址
+        requests_per_minute (float, optional): 本进程每分钟最大请求数
+        tokens_per_minute (float, optional): 本进程每分钟最大token数
+
+    返回:
+        RateLimiter: 限流器
+    """
+    with _limiters_lock:
+        if key not in _limiters:
+            processes = max(1, int(os.environ.get('LLM_RATE_LIMIT_PROCESSES', 1)))
+            if requests_per_minute is None:
+                requests_per_minute = float(os.environ.get('LLM_RPM_LIMIT', 0)) / processes
+            if tokens_per_minute is None:
+                tokens_per_minute = float(os.environ.get('LLM_TPM_LIMIT', 0)) / processes
+            _limiters[key] = RateLimiter(requests_per_minute, tokens_per_minute)
+        return _limiters[key]
+
+
+def parse_retry_after(headers):
+    """
+    解析响应头中的Retry-After（秒数或HTTP日期）和retry-after-ms
+
+    参数:
+        headers: 响应头
+
+    返回:
+        float: 需要等待的秒数，没有时返回None
+    """
+    if not headers:
+        return None
+
+    value = headers.get('retry-after-ms')
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+
+    value = headers.get('retry-after')
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_time = email.utils.parsedate_to_datetime(value)
+        return max(0.0, retry_time.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_error(error):
+    """
+    判断API错误是否可以重试
+
+    参数:
+        error (Exception): 调用API时抛出的异常
+
+    返回:
+        tuple: (是否可以重试, 是否为限流响应, Retry-After秒数或None)
+    """
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, TimeoutError) + _TRANSPORT_ERRORS):
+        return True, False, None
+
+    status_code = getattr(error, 'status_code', None)
+    if status_code is None:
+        return False, False, None
+
+    response = getattr(error, 'response', None)
+    retry_after = parse_retry_after(getattr(response, 'headers', None))
+    return status_code in RETRYABLE_STATUS_CODES or status_code >= 500, status_code == 429, retry_after
+
+
+def backoff_delay(attempt, base_delay=1.0, max_delay=60.0):
+    """
+    指数退避等待时间（full jitter：在0到上限之间随机取值，避免多个线程同时重试）
+
+    参数:
+        attempt (int): 已失败的次数（从0开始）
+        base_delay (float): 第一次重试的等待上限
+        max_delay (float): 最长等待时间
+
+    返回:
+        float: 等待秒数
+    """
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def call_with_retry(func, limiter=None, estimated_tokens=0, max_retries=5, base_delay=1.0, max_delay=60.0,
+                    get_tokens=None):
+    """
+    通过限流器调用func，遇到可重试的错误时按指数退避重试
+
+    参数:
+        func (callable): 发送请求的无参函数
+        limiter (RateLimiter, optional): 限流器
+        estimated_tokens (int): 预计消耗的token数
+        max_retries (int): 最大重试次数
+        base_delay (float): 退避等待的初始上限（秒）
+        max_delay (float): 最长等待时间（秒）
+        get_tokens (callable, optional): 从返回值中获取实际token数
+
+    返回:
+        func的返回值；重试次数用完或错误不可重试时抛出最后一次的异常
+    """
+    for attempt in range(max_retries + 1):
+        if limiter:
+            limiter.acquire(estimated_tokens)
+
+        try:
+            result = func()
+        except Exception as e:
+            retryable, throttled, retry_after = classify_error(e)
+            if not retryable or attempt >= max_retries:
+                raise
+
+            delay = retry_after if retry_after is not None else backoff_delay(attempt, base_delay, max_delay)
+            if throttled and limiter:
+                limiter.record_throttled(delay)
+
+            logger.warning(f"[API重试] {type(e).__name__}: {str(e)[:200]}，"
+                           f"{delay:.1f} 秒后第 {attempt + 1}/{max_retries} 次重试")
+            time.sleep(delay)
+            continue
+
+        if limiter:
+            actual_tokens = None
+            if get_tokens:
+                try:
+                    actual_tokens = get_tokens(result)
+                except Exception:
+                    actual_tokens = None
+            limiter.record_success(estimated_tokens, actual_tokens)
+        return result
@@ -0,0 +1,120 @@
+"""
+LLM响应的增量CSV解析
+
+LLM按CSV格式返回参数（可能包在```csv代码块中，前后带有说明文字）。IncrementalCSVParser按行解析，
+每收到一行完整的CSV记录就返回一行数据，流式响应不需要等到全部内容返回，也不需要保存完整的响应文本
+"""
+
+import csv
+
+# 表头中表示参数名称的字段（用于识别表头行，避免把说明文字当作表头）
+NAME_FIELDS = ("parameter_name", "parameter name", "name", "参数名称", "参数名")
+
+
+def _is_header(values):
+    return any(value.strip().strip('"').lower() in NAME_FIELDS for value in values)
+
+
+class IncrementalCSVParser:
+    """
+    增量CSV解析器
+
+    - 响应中出现```csv代码块时只解析代码块中的内容，否则把整段响应当作CSV
+    - 第一行包含参数名称字段的记录作为表头，之前的说明文字被忽略
+    - 支持引号内换行的字段，以及代码块中重复出现的表头
+    """
+
+    def __init__(self):
+        self.fieldnames = None
+        self.row_count = 0
+        self.seen_block = False
+        self._in_block = False
+        self._line = ""
+        self._record = ""
+
+    def feed(self, text):
+        """
+        输入一段响应文本
+
+        参数:
+            text (str): 新收到的文本
+
+        返回:
+            list: 本次输入后完整的数据行，每行是一个字典（字段数不足时缺少的值为None，多余的值在None键下）
+        """
+        rows = []
+        self._line += text
+        while True:
+            newline = self._line.find("\n")
+            if newline < 0:
+                break
+            line, self._line = self._line[:newline], self._line[newline + 1:]
+            rows.extend(self._process_line(line.rstrip("\r")))
+        return rows
+
+    def close(self):
+        """
+        响应结束，解析最后一行（没有换行符结尾）和未闭合引号的记录
+
+        返回:
+            list: 剩余的数据行
+        """
+        rows = []
+        if self._line:
+            line, self._line = self._line, ""
+            rows.extend(self._process_line(line.rstrip("\r")))
+        if self._record:
+            record, self._record = self._record, ""
+            rows.extend(self._process_record(record))
+        return rows
+
+    def _process_line(self, line):
+        if not self._record:
+            stripped = line.strip()
+            if stripped.startswith("```"):
+                if self._in_block:
+                    self._in_block = False
+                elif stripped[3:].strip().lower() == "csv":
+                    # 代码块中的内容有自己的表头，之前识别的表头作废
+                    self._in_block = True
+                    self.seen_block = True
+                    self.fieldnames = None
+                return []
+
+            # 出现过csv代码块后，代码块之外的文字都是说明
+            if self.seen_block and not self._in_block:
+                return []
+
+        # 引号内的换行属于同一条记录，等引号闭合后再解析
+        self._record = f"{self._record}\n{line}" if self._record else line
+        if self._record.count('"') % 2:
+            return []
+
+        record, self._record = self._record, ""
+        return self._process_record(record)
+
+    def _process_record(self, record):
+        if not record.strip():
+            return []
+
+        try:
+            values = next(csv.reader([record]))
+        except (csv.Error, StopIteration):
+            return []
+
+        if self.fieldnames is None:
+            if _is_header(values):
+                self.fieldnames = values
+            return []
+
+        if values == self.fieldnames:
+            return []
+
+        row = dict(zip(self.fieldnames, values))
+        if len(values) > len(self.fieldnames):
+            row[None] = values[len(self.fieldnames):]
+        for name in self.fieldnames[len(values):]:
+            row[name] = None
+
+        self.row_count += 1
+        return [row]
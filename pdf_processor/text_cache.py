@@ -0,0 +1,128 @@
+"""
+PDF文本缓存模块
+
+以PDF文件内容的SHA-256为键，将提取出的全文和每页的起始偏移量压缩保存到磁盘，
+相同的PDF再次提取时无需重新解析
+"""
+
+import os
+import gzip
+import json
+import hashlib
+import logging
+import threading
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# 默认缓存目录（项目根目录下的cache目录）
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'pdf_text'
+)
+
+
+def file_sha256(file_path, block_size=1024 * 1024):
+    """
+    计算文件内容的SHA-256
+
+    参数:
+        file_path (str): 文件路径
+        block_size (int): 每次读取的字节数
+
+    返回:
+        str: 十六进制摘要
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PDFTextCache:
+    """
+    基于文件系统的PDF文本缓存，每个条目是一个gzip压缩的JSON文件
+    """
+
+    def __init__(self, cache_dir=None):
+        """
+        初始化缓存
+
+        参数:
+            cache_dir (str, optional): 缓存目录，默认读取环境变量PDF_TEXT_CACHE_DIR
+        """
+        self.cache_dir = cache_dir or os.environ.get('PDF_TEXT_CACHE_DIR', DEFAULT_CACHE_DIR)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _entry_path(self, key):
+        # 按哈希前两位分目录，避免单个目录下文件过多
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json.gz")
+
+    def get(self, key):
+        """
+        读取缓存条目
+
+        参数:
+            key (str): PDF内容的SHA-256
+
+        返回:
+            dict: 包含text和page_offsets的字典，未命中时返回None
+        """
+        path = self._entry_path(key)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"[文本缓存] 读取缓存失败，将重新提取: {path}: {str(e)}")
+            return None
+
+    def set(self, key, text, page_offsets):
+        """
+        写入缓存条目（先写临时文件再重命名，并发写入时不会产生损坏的条目）
+
+        参数:
+            key (str): PDF内容的SHA-256
+            text (str): 提取的全文
+            page_offsets (list): 每页文本在全文中的起始字符偏移量
+        """
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        try:
+            with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+                json.dump({"text": text, "page_offsets": page_offsets}, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"[文本缓存] 写入缓存失败: {path}: {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """
+    获取默认的文本缓存对象
+
+    返回:
+        PDFTextCache: 缓存对象，环境变量PDF_TEXT_CACHE_ENABLED为false或缓存目录不可用时返回None
+    """
+    global _default_cache
+
+    if os.environ.get('PDF_TEXT_CACHE_ENABLED', 'True').lower() != 'true':
+        return None
+
+    if _default_cache is None:
+        try:
+            _default_cache = PDFTextCache()
+        except OSError as e:
+            logger.warning(f"[文本缓存] 无法创建缓存目录，将不使用缓存: {str(e)}")
+            return None
+
+    return _default_cache
@@ -0,0 +1,109 @@
+"""
+本地token数估算
+
+不依赖模型的分词器，按文本片段的类型估算token数，用于在发送请求前按token预算截断和分块：
+- 英文单词按DeepSeek文档给出的比例（约0.3 token/字符）计算，每个单词至少1个token
+- 中日韩字符约0.6 token/字符
+- 数字每3位约1个token
+- 公式中的符号、标点等每个字符单独计为1个token（按字符数估算时公式较多的文本会被严重低估）
+
+估算值略偏高，按估算值分块不会超出模型的上下文窗口
+"""
+
+import re
+import math
+
+# 文本片段：英文单词、数字、中日韩字符、空白、其他单个字符
+_PIECE_RE = re.compile(
+    r"(?P<word>[A-Za-z]+)"
+    r"|(?P<number>\d+)"
+    r"|(?P<cjk>[぀-ヿ㐀-䶿一-鿿가-힯]+)"
+    r"|(?P<space>\s+)"
+    r"|(?P<other>.)",
+    re.DOTALL
+)
+
+WORD_TOKENS_PER_CHAR = 0.3
+CJK_TOKENS_PER_CHAR = 0.6
+DIGITS_PER_TOKEN = 3
+
+
+def _piece_tokens(match):
+    kind = match.lastgroup
+    length = match.end() - match.start()
+
+    if kind == 'word':
+        return max(1.0, length * WORD_TOKENS_PER_CHAR)
+    if kind == 'number':
+        return math.ceil(length / DIGITS_PER_TOKEN)
+    if kind == 'cjk':
+        return length * CJK_TOKENS_PER_CHAR
+    if kind == 'space':
+        # 单个空格与后面的单词合并为一个token，换行、连续空白单独计算
+        return 0.0 if length == 1 else 1.0
+    return 1.0
+
+
+def count_tokens(text):
+    """
+    估算文本的token数
+
+    参数:
+        text (str): 文本
+
+    返回:
+        int: 估算的token数
+    """
+    if not text:
+        return 0
+    return math.ceil(sum(_piece_tokens(match) for match in _PIECE_RE.finditer(text)))
+
+
+def truncate_to_tokens(text, max_tokens):
+    """
+    截取不超过max_tokens个token的文本开头部分
+
+    参数:
+        text (str): 文本
+        max_tokens (int): 最大token数
+
+    返回:
+        str: 截取后的文本（未超出时原样返回）
+    """
+    if not text or max_tokens <= 0:
+        return ""
+
+    total = 0.0
+    for match in _PIECE_RE.finditer(text):
+        total += _piece_tokens(match)
+        if total > max_tokens:
+            return text[:match.start()]
+    return text
+
+
+def split_by_tokens(text, max_tokens):
+    """
+    将文本按token数硬切分（用于无法按段落、句子切分的超长片段）
+
+    参数:
+        text (str): 文本
+        max_tokens (int): 每段的最大token数
+
+    返回:
+        list: 文本片段列表
+    """
+    parts = []
+    start = 0
+    total = 0.0
+
+    for match in _PIECE_RE.finditer(text):
+        tokens = _piece_tokens(match)
+        if total + tokens > max_tokens and match.start() > start:
+            parts.append(text[start:match.start()])
+            start = match.start()
+            total = 0.0
+        total += tokens
+
+    if start < len(text):
+        parts.append(text[start:])
+    return parts
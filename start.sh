@@ -2,6 +2,7 @@
 
 # 默认设置
 export PORT_CONFLICT_STRATEGY=${PORT_CONFLICT_STRATEGY:-auto_change}
+START_WORKER=true
 
 # 处理命令行参数
 for arg in "$@"; do
@@ -21,6 +22,10 @@ for arg in "$@"; do
             echo "所有Python进程已终止"
             shift
             ;;
+        --no-worker)
+            START_WORKER=false
+            shift
+            ;;
         --install)
             echo "安装依赖..."
             pip install -r requirements.txt
@@ -32,6 +37,7 @@ for arg in "$@"; do
             echo "  --auto-change    自动更换端口策略（默认）"
             echo "  --kill-process   终止占用进程策略"
             echo "  --force-kill     强制终止所有Python进程"
+            echo "  --no-worker      不启动后台任务worker"
             echo "  --install        安装依赖"
             echo "  --help           显示此帮助信息"
             exit 0
@@ -42,6 +48,15 @@ done
 # 显示当前设置
 echo "启动配置："
 echo "- 端口冲突策略: $PORT_CONFLICT_STRATEGY"
+echo "- 后台任务worker: $START_WORKER (进程数: ${WORKER_CONCURRENCY:-2})"
+
+# 启动后台任务worker，应用退出时一并停止
+if [ "$START_WORKER" = true ]; then
+    echo "启动后台任务worker..."
+    python worker/run_worker.py &
+    WORKER_PID=$!
+    trap 'kill -TERM $WORKER_PID 2>/dev/null; wait $WORKER_PID' EXIT
+fi
 
 # 运行应用
 echo "启动应用..."
@@ -6,21 +6,17 @@ import csv
 import io
 from flask import Flask, render_template, request, jsonify, redirect, url_for, send_file, flash
 from werkzeug.utils import secure_filename
-import pandas as pd
 import matplotlib
 matplotlib.use('Agg')  # 非交互式后端
 import matplotlib.pyplot as plt
 from datetime import datetime
-import subprocess
-import threading
 
 # 添加父目录到路径，以便导入其他模块
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # 导入项目模块
 from database.db_utils import DatabaseManager
-from pdf_processor.pdf_extractor import extract_text_from_pdf, batch_process_pdfs
-from pdf_processor.llm_processor import LLMProcessor
+from database.job_queue import JobQueue, ACTIVE_STATUSES
 
 # 导入项目配置
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -57,13 +53,13 @@ os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 # 初始化数据库管理器
 db_manager = DatabaseManager()
 
-# 初始化LLM处理器
-try:
-    llm_processor = LLMProcessor(api_key=app.config['DEEPSEEK_API_KEY'])
-    app.config['LLM_AVAILABLE'] = True
-except Exception as e:
-    logger.warning(f"无法初始化LLM处理器: {str(e)}")
-    app.config['LLM_AVAILABLE'] = False
+# 后台任务队列（由worker/run_worker.py启动的worker进程执行）
+job_queue = JobQueue(db_manager)
+
+# 参数提取由worker进程调用LLM，Web进程只检查是否配置了API密钥
+app.config['LLM_AVAILABLE'] = bool(app.config['DEEPSEEK_API_KEY'])
+if not app.config['LLM_AVAILABLE']:
+    logger.warning("DeepSeek API密钥未设置，参数提取不可用")
 
 # 添加模板全局函数
 @app.context_processor
@@ -92,12 +88,12 @@ def index():
     parameter_count = 0
     
     with db_manager.get_session() as session:
-        from database.models import Paper, LaserParameter
+        from database.models import Paper
         paper_count = session.query(Paper).count()
-        parameter_count = session.query(LaserParameter).count()
     
-    # 获取参数统计
-    parameter_stats = db_manager.get_parameter_statistics() if parameter_count > 0 else {}
+    # 获取参数统计（来自预先计算的统计表）
+    parameter_stats = db_manager.get_parameter_statistics()
+    parameter_count = parameter_stats['total_parameters']
     
     # 最近处理的论文
     recent_papers = db_manager.get_papers(limit=5)
@@ -154,90 +150,23 @@ def search():
         else:
             logger.info("未启用论文查重功能，可能会下载已存在的论文")
         
-        # 构建完整命令
-        crawler_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
-                                    'arxiv_crawler', 'arxiv_crawler_enhanced.py')
-        
-        cmd = [sys.executable, crawler_path] + args
-        
-        # 在后台运行爬虫
-        def run_crawler(cmd, output_dir):
-            try:
-                logger.info(f"运行爬虫: {' '.join(cmd)}")
-                
-                # 创建进度记录目录
-                os.makedirs(output_dir, exist_ok=True)
-                
-                # 初始化进度文件
-                progress_file = os.path.join(output_dir, "crawler_progress.json")
-                with open(progress_file, 'w', encoding='utf-8') as f:
-                    json.dump({
-                        "total": 0,
-                        "processed": 0,
-                        "skipped": 0,
-                        "completed": 0,
-                        "percent_complete": 0,
-                        "status": "starting",
-                        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        "current_paper": None
-                    }, f, ensure_ascii=False, indent=2)
-                
-                # 运行爬虫
-                subprocess.run(cmd, check=True)
-                
-                # 爬取完成后，将论文导入数据库
-                try:
-                    metadata_file = os.path.join(output_dir, 'papers_metadata.csv')
-                    if os.path.exists(metadata_file):
-                        imported_count = import_papers_from_csv(metadata_file, output_dir)
-                        logger.info(f"论文导入数据库完成，共导入 {imported_count} 篇")
-                        
-                        # 更新进度文件，标记导入完成
-                        if os.path.exists(progress_file):
-                            with open(progress_file, 'r', encoding='utf-8') as f:
-                                progress_data = json.load(f)
-                            
-                            progress_data["status"] = "imported"
-                            progress_data["imported_count"] = imported_count
-                            progress_data["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                            
-                            with open(progress_file, 'w', encoding='utf-8') as f:
-                                json.dump(progress_data, f, ensure_ascii=False, indent=2)
-                except Exception as e:
-                    logger.error(f"导入论文到数据库失败: {str(e)}")
-                    
-                    # 更新进度文件，标记导入失败
-                    if os.path.exists(progress_file):
-                        with open(progress_file, 'r', encoding='utf-8') as f:
-                            progress_data = json.load(f)
-                        
-                        progress_data["status"] = "import_failed"
-                        progress_data["error"] = str(e)
-                        progress_data["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        
-                        with open(progress_file, 'w', encoding='utf-8') as f:
-                            json.dump(progress_data, f, ensure_ascii=False, indent=2)
-                
-            except subprocess.CalledProcessError as e:
-                logger.error(f"爬虫运行失败: {str(e)}")
-                
-                # 更新进度文件，标记爬取失败
-                progress_file = os.path.join(output_dir, "crawler_progress.json")
-                if os.path.exists(progress_file):
-                    with open(progress_file, 'r', encoding='utf-8') as f:
-                        progress_data = json.load(f)
-                    
-                    progress_data["status"] = "failed"
-                    progress_data["error"] = str(e)
-                    progress_data["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    
-                    with open(progress_file, 'w', encoding='utf-8') as f:
-                        json.dump(progress_data, f, ensure_ascii=False, indent=2)
+        # 创建进度记录目录并初始化进度文件，任务开始执行前进度页面即可访问
+        os.makedirs(output_dir, exist_ok=True)
+        progress_file = os.path.join(output_dir, "crawler_progress.json")
+        with open(progress_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                "total": 0,
+                "processed": 0,
+                "skipped": 0,
+                "completed": 0,
+                "percent_complete": 0,
+                "status": "queued",
+                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "current_paper": None
+            }, f, ensure_ascii=False, indent=2)
         
-        # 启动后台线程运行爬虫
-        thread = threading.Thread(target=run_crawler, args=(cmd, output_dir))
-        thread.daemon = True
-        thread.start()
+        # 添加爬取任务，由后台worker执行（爬取完成后自动导入数据库）
+        job_queue.enqueue('crawl', {'args': args, 'output_dir': output_dir}, max_attempts=1)
         
         # 设置会话变量，用于前端显示进度
         session = {}
@@ -345,7 +274,7 @@ def papers():
     
     # 获取论文列表
     if search_query:
-        papers_list = db_manager.search_papers(search_query, limit=limit)
+        papers_list = db_manager.search_papers(search_query, limit=limit, offset=offset)
         total_count = len(papers_list)  # 简化处理，实际应该单独查询总数
     else:
         papers_list = db_manager.get_papers(limit=limit, offset=offset, 
@@ -359,8 +288,14 @@ def papers():
     # 计算总页数
     total_pages = (total_count + limit - 1) // limit
     
+    # 批量提取任务状态
+    batch_job = job_queue.get_latest_job('batch_extraction')
+    unprocessed_count = db_manager.count_unprocessed_papers()
+    
     return render_template('papers.html', 
                           papers=papers_list,
+                          batch_job=batch_job,
+                          unprocessed_count=unprocessed_count,
                           page=page,
                           limit=limit,
                           total_pages=total_pages,
@@ -469,144 +404,51 @@ def extract_parameters(paper_id):
             # 获取ID（在session内部）
             record_id = record.id
         
-        # 更新处理记录，保存详细的提取进度和日志
-        def save_extraction_progress(record_id, step, message, progress_pct=None):
-            """记录提取进度并更新处理记录"""
-            progress_info = {
-                "step": step,
-                "message": message,
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "progress_pct": progress_pct
-            }
-            with db_manager.get_session() as session:
-                from database.models import ProcessingRecord
-                record = session.query(ProcessingRecord).filter_by(id=record_id).first()
-                if record:
-                    # 更新进度信息
-                    try:
-                        progress_data = json.loads(record.message) if record.message.startswith('{') else {}
-                    except:
-                        progress_data = {}
-                    
-                    # 添加新进度信息
-                    if not "progress_log" in progress_data:
-                        progress_data["progress_log"] = []
-                    progress_data["progress_log"].append(progress_info)
-                    progress_data["current_step"] = step
-                    progress_data["current_message"] = message
-                    progress_data["progress_pct"] = progress_pct
-                    
-                    # 保存到数据库
-                    record.message = json.dumps(progress_data)
-                    session.commit()
-            
-            # 记录到日志
-            logger.info(f"[提取进度] 记录ID: {record_id}, 步骤: {step}, 进度: {progress_pct}%, 信息: {message}")
-        
-        # 启动后台提取任务
-        def extract_task(paper_id, pdf_path, record_id):
-            try:
-                # 更详细的日志记录
-                logger.info(f"[提取任务启动] 论文ID: {paper_id}, 记录ID: {record_id}")
-                save_extraction_progress(record_id, "start", "开始提取任务", 0)
-                
-                # 重新获取论文信息（避免使用外部闭包变量）
-                paper_data = db_manager.get_paper_by_id(paper_id)
-                if not paper_data:
-                    logger.error(f"[提取任务失败] 无法找到论文 ID: {paper_id}")
-                    save_extraction_progress(record_id, "error", f"无法找到论文 ID: {paper_id}", 0)
-                    db_manager.update_processing_record(record_id, "failed", f"无法找到论文 ID: {paper_id}")
-                    return
-                
-                # 提取PDF文本
-                logger.info(f"[PDF提取开始] 路径: {pdf_path}")
-                save_extraction_progress(record_id, "pdf_extraction", "开始提取PDF文本", 10)
-                
-                text = extract_text_from_pdf(pdf_path)
-                
-                if not text:
-                    logger.error(f"[PDF提取失败] 路径: {pdf_path}")
-                    save_extraction_progress(record_id, "pdf_extraction_failed", "从PDF提取文本失败", 0)
-                    db_manager.update_processing_record(record_id, "failed", "从PDF提取文本失败")
-                    return
-                
-                logger.info(f"[PDF提取成功] 提取文本长度: {len(text)} 字符")
-                save_extraction_progress(record_id, "pdf_extraction_completed", f"成功提取文本，长度: {len(text)} 字符", 30)
-                
-                # 构建论文信息
-                logger.info(f"[构建论文信息] 标题: {paper_data['title']}")
-                save_extraction_progress(record_id, "build_paper_info", "构建论文元数据", 40)
-                
-                paper_info = {
-                    "title": paper_data['title'],
-                    "authors": paper_data['authors'].split(', ') if paper_data['authors'] else [],
-                    "categories": paper_data['categories'].split(', ') if paper_data['categories'] else []
-                }
-                
-                # 推断主题
-                topic = None
-                if paper_data['categories']:
-                    if any('plasma' in cat.lower() for cat in paper_info['categories']):
-                        topic = 'wakefield'
-                        logger.info(f"[主题推断] 识别为等离子体/尾场加速主题")
-                        save_extraction_progress(record_id, "topic_inference", "识别为等离子体/尾场加速主题", 50)
-                    elif any('optic' in cat.lower() for cat in paper_info['categories']):
-                        topic = 'laser system'
-                        logger.info(f"[主题推断] 识别为激光系统主题")
-                        save_extraction_progress(record_id, "topic_inference", "识别为激光系统主题", 50)
-                    else:
-                        logger.info(f"[主题推断] 使用通用激光物理主题")
-                        save_extraction_progress(record_id, "topic_inference", "使用通用激光物理主题", 50)
-                
-                # 提取参数
-                logger.info(f"[参数提取开始] 使用主题: {topic or '通用激光物理'}")
-                save_extraction_progress(record_id, "parameter_extraction", f"开始参数提取，使用主题: {topic or '通用激光物理'}", 60)
-                
-                # 记录LLM API调用
-                save_extraction_progress(record_id, "llm_api_call", "正在调用DeepSeek API进行参数提取...", 70)
-                
-                parameters = llm_processor.extract_parameters(text, paper_info, topic)
-                
-                if not parameters:
-                    logger.warning(f"[参数提取失败] 未能提取到任何参数")
-                    save_extraction_progress(record_id, "parameter_extraction_failed", "未能提取到任何参数", 0)
-                    db_manager.update_processing_record(record_id, "failed", "未能提取到任何参数")
-                    return
-                
-                logger.info(f"[参数提取成功] 提取到 {len(parameters)} 个参数")
-                save_extraction_progress(record_id, "parameter_extraction_completed", f"成功提取 {len(parameters)} 个参数", 80)
-                
-                # 保存参数到数据库
-                logger.info(f"[参数保存开始] 正在保存到数据库...")
-                save_extraction_progress(record_id, "save_parameters", "正在保存参数到数据库", 90)
-                
-                added_count = db_manager.add_parameters(paper_id, parameters)
-                logger.info(f"[参数保存完成] 成功保存 {added_count} 个参数")
-                save_extraction_progress(record_id, "save_parameters_completed", f"成功保存 {added_count} 个参数", 100)
-                
-                # 更新处理记录
-                progress_data = {"completed": True, "parameters_count": added_count, "progress_pct": 100}
-                db_manager.update_processing_record(
-                    record_id, "success", json.dumps(progress_data), added_count
-                )
-                
-                logger.info(f"[提取任务完成] 论文ID: {paper_id}, 参数数量: {added_count}")
-                
-            except Exception as e:
-                logger.error(f"[提取任务异常] 错误信息: {str(e)}")
-                save_extraction_progress(record_id, "error", f"发生错误: {str(e)}", 0)
-                db_manager.update_processing_record(record_id, "failed", f"参数提取失败: {str(e)}")
-        
-        # 启动提取线程
-        thread = threading.Thread(target=extract_task, args=(paper_id, pdf_path, record_id))
-        thread.daemon = True
-        thread.start()
+        # 添加提取任务，由后台worker执行
+        job_queue.enqueue(
+            'parameter_extraction',
+            {'paper_id': paper_id, 'pdf_path': pdf_path, 'record_id': record_id},
+            paper_id=paper_id,
+            record_id=record_id
+        )
         
-        flash("参数提取任务已启动，请稍后刷新页面查看结果", "info")
+        flash("参数提取任务已加入队列，请稍后刷新页面查看结果", "info")
         return redirect(url_for('paper_detail', paper_id=paper_id))
     
     return render_template('extract_parameters.html', paper=paper)
 
+@app.route('/extract/all', methods=['POST'])
+def extract_all_parameters():
+    """
+    批量提取所有未处理论文的参数
+    """
+    batch_job = job_queue.get_latest_job('batch_extraction')
+    if batch_job and batch_job['status'] in ACTIVE_STATUSES:
+        flash('已有批量提取任务正在进行', 'warning')
+        return redirect(url_for('papers'))
+    
+    if not os.environ.get("DEEPSEEK_API_KEY"):
+        flash('DeepSeek API密钥未设置，请设置环境变量DEEPSEEK_API_KEY', 'error')
+        return redirect(url_for('papers'))
+    
+    limit = request.form.get('limit', type=int)
+    job_queue.enqueue('batch_extraction', {'limit': limit} if limit else {})
+    
+    flash("批量提取任务已加入队列", "info")
+    return redirect(url_for('papers'))
+
+@app.route('/extract/all/cancel', methods=['POST'])
+def cancel_extract_all():
+    """
+    停止批量提取任务（正在处理的论文完成后停止，已写入的结果会保留）
+    """
+    batch_job = job_queue.get_latest_job('batch_extraction')
+    if batch_job and job_queue.cancel(job_id=batch_job['id']):
+        flash("已停止批量提取任务", "success")
+    else:
+        flash("没有进行中的批量提取任务", "warning")
+    return redirect(url_for('papers'))
+
 # API: 获取参数提取进度
 @app.route('/api/extraction_progress/<int:record_id>', methods=['GET'])
 def api_extraction_progress(record_id):
@@ -675,38 +517,40 @@ def parameters():
         filter_criteria['category'] = category
     
     # 构建SQL查询
-    with db_manager.get_session() as session:
-        from database.models import LaserParameter, Paper
-        from sqlalchemy import func
-        
-        # 基本查询
-        query = session.query(
-            LaserParameter.parameter_name,
-            func.count(LaserParameter.id).label('count')
-        ).group_by(LaserParameter.parameter_name)
-        
-        # 应用过滤
-        if 'query' in filter_criteria:
-            query = query.filter(LaserParameter.parameter_name.like(f"%{filter_criteria['query']}%"))
-        if 'category' in filter_criteria:
-            query = query.filter(LaserParameter.category == filter_criteria['category'])
-        
-        # 执行查询
-        parameter_counts = query.order_by(func.count(LaserParameter.id).desc()).all()
-        
-        # 获取类别统计
-        categories = session.query(
-            LaserParameter.category,
-            func.count(LaserParameter.id).label('count')
-        ).group_by(LaserParameter.category).all()
-        
-        # 获取参数总数和特定类别的参数数
-        if category:
-            # 如果有类别过滤，只计算该类别的参数数
-            total_count = session.query(LaserParameter).filter(LaserParameter.category == category).count()
-        else:
-            # 否则计算所有参数
-            total_count = session.query(LaserParameter).count()
+    if not filter_criteria:
+        # 没有过滤条件时直接读取参数统计表
+        parameter_counts = db_manager.get_parameter_name_counts()
+    else:
+        with db_manager.get_session() as session:
+            from database.models import LaserParameter, Paper
+            from sqlalchemy import func
+            
+            # 基本查询
+            query = session.query(
+                LaserParameter.parameter_name,
+                func.count(LaserParameter.id).label('count')
+            ).group_by(LaserParameter.parameter_name)
+            
+            # 应用过滤
+            if 'query' in filter_criteria:
+                query = query.filter(db_manager.parameter_name_filter(filter_criteria['query']))
+            if 'category' in filter_criteria:
+                query = query.filter(LaserParameter.category == filter_criteria['category'])
+            
+            # 执行查询
+            parameter_counts = query.order_by(func.count(LaserParameter.id).desc()).all()
+    
+    # 获取类别统计（来自预先计算的统计表）
+    parameter_stats = db_manager.get_parameter_statistics()
+    categories = list(parameter_stats['by_category'].items())
+    
+    # 获取参数总数和特定类别的参数数
+    if category:
+        # 如果有类别过滤，只计算该类别的参数数
+        total_count = parameter_stats['by_category'].get(category, 0)
+    else:
+        # 否则计算所有参数
+        total_count = parameter_stats['total_parameters']
     
     # 计算总页数
     total_pages = (total_count + limit - 1) // limit if total_count > 0 else 1
@@ -847,169 +691,54 @@ def api_stats_chart():
     """
     chart_type = request.args.get('type', 'category')
     
-    with db_manager.get_session() as session:
-        from database.models import LaserParameter
-        from sqlalchemy import func
-        
-        if chart_type == 'category':
-            # 按类别统计
-            data = session.query(
-                LaserParameter.category,
-                func.count(LaserParameter.id)
-            ).group_by(LaserParameter.category).all()
-            
-            labels = [item[0] for item in data]
-            values = [item[1] for item in data]
-            
-            return jsonify({
-                'labels': labels,
-                'values': values,
-                'title': '按参数类别统计'
-            })
-            
-        elif chart_type == 'unit':
-            # 按单位统计
-            data = session.query(
-                LaserParameter.unit,
-                func.count(LaserParameter.id)
-            ).group_by(LaserParameter.unit).all()
-            
-            # 过滤空单位并限制数量
-            data = [(unit, count) for unit, count in data if unit]
-            data.sort(key=lambda x: x[1], reverse=True)
-            data = data[:10]  # 只取前10个
-            
-            labels = [item[0] for item in data]
-            values = [item[1] for item in data]
-            
-            return jsonify({
-                'labels': labels,
-                'values': values,
-                'title': '常见参数单位统计'
-            })
-            
-        elif chart_type == 'parameter':
-            # 按参数名称统计
-            data = session.query(
-                LaserParameter.parameter_name,
-                func.count(LaserParameter.id)
-            ).group_by(LaserParameter.parameter_name).order_by(
-                func.count(LaserParameter.id).desc()
-            ).limit(10).all()
-            
-            labels = [item[0] for item in data]
-            values = [item[1] for item in data]
-            
-            return jsonify({
-                'labels': labels,
-                'values': values,
-                'title': '最常见的10个参数'
-            })
-    
-    return jsonify({'error': '无效的图表类型'})
-
-# 工具函数: 导入论文从CSV
-def import_papers_from_csv(csv_file, pdf_dir):
-    """
-    从CSV文件导入论文到数据库
+    # 使用预先计算的参数统计，不扫描参数表
+    stats = db_manager.get_parameter_statistics()
     
-    参数:
-        csv_file (str): CSV文件路径
-        pdf_dir (str): PDF目录路径
+    if chart_type == 'category':
+        # 按类别统计
+        data = list(stats['by_category'].items())
         
-    返回:
-        int: 成功导入的论文数量
-    """
-    try:
-        # 读取CSV
-        df = pd.read_csv(csv_file)
+        labels = [item[0] for item in data]
+        values = [item[1] for item in data]
         
-        # 转换为字典列表
-        papers_data = []
-        duplicates_count = 0
+        return jsonify({
+            'labels': labels,
+            'values': values,
+            'title': '按参数类别统计'
+        })
         
-        # 第一阶段：一次性检查所有论文是否存在，避免导入过程中的时序问题
-        existing_arxiv_ids = set()
-        existing_dois = set()
+    elif chart_type == 'unit':
+        # 按单位统计
+        data = list(stats['by_unit'].items())
         
-        # 收集所有可能存在的DOI和arXiv ID
-        doi_list = [row.get('doi', '') for _, row in df.iterrows() if row.get('doi')]
-        arxiv_id_list = [row.get('id', '') for _, row in df.iterrows() if row.get('id')]
+        # 过滤空单位并限制数量
+        data = [(unit, count) for unit, count in data if unit]
+        data.sort(key=lambda x: x[1], reverse=True)
+        data = data[:10]  # 只取前10个
         
-        # 使用批量查询获取已存在的论文ID
-        with db_manager.get_session() as session:
-            from database.models import Paper
-            from sqlalchemy import or_
-            
-            if doi_list:
-                # 确保所有DOI都是字符串类型
-                doi_list = [str(doi) for doi in doi_list if doi]
-                try:
-                    existing_doi_records = session.query(Paper.doi).filter(Paper.doi.in_(doi_list)).all()
-                    existing_dois = set([r[0] for r in existing_doi_records if r[0]])
-                except Exception as e:
-                    logger.error(f"DOI查询失败: {str(e)}")
-                    existing_dois = set()
-            
-            if arxiv_id_list:
-                try:
-                    existing_arxiv_records = session.query(Paper.arxiv_id).filter(Paper.arxiv_id.in_(arxiv_id_list)).all()
-                    existing_arxiv_ids = set([r[0] for r in existing_arxiv_records if r[0]])
-                except Exception as e:
-                    logger.error(f"arXiv ID查询失败: {str(e)}")
-                    existing_arxiv_ids = set()
+        labels = [item[0] for item in data]
+        values = [item[1] for item in data]
         
-        # 第二阶段：准备需要导入的论文数据
-        for _, row in df.iterrows():
-            # 构建论文数据
-            paper_data = {
-                'id': row.get('id', ''),
-                'title': row.get('title', ''),
-                'authors': row.get('authors', '').split(', '),
-                'abstract': row.get('abstract', ''),
-                'categories': row.get('categories', '').split(', '),
-                'published': row.get('published', ''),
-                'updated': row.get('updated', ''),
-                'pdf_url': row.get('pdf_url', ''),
-                'doi': row.get('doi', '')  # 添加DOI支持
-            }
-            
-            # 使用之前收集的集合快速检查是否存在
-            paper_exists = False
-            if paper_data['doi'] and paper_data['doi'] in existing_dois:
-                paper_exists = True
-            elif paper_data['id'] and paper_data['id'] in existing_arxiv_ids:
-                paper_exists = True
-            
-            if paper_exists:
-                logger.info(f"论文已存在，跳过: {paper_data['id']}")
-                duplicates_count += 1
-                continue
-            
-            # 查找本地PDF文件
-            arxiv_id = paper_data['id']
-            pdf_files = [f for f in os.listdir(pdf_dir) 
-                        if f.lower().endswith('.pdf') and arxiv_id in f]
-            
-            if pdf_files:
-                paper_data['local_path'] = os.path.join(pdf_dir, pdf_files[0])
-            
-            papers_data.append(paper_data)
+        return jsonify({
+            'labels': labels,
+            'values': values,
+            'title': '常见参数单位统计'
+        })
         
-        # 批量添加到数据库
-        if papers_data:
-            added_ids = db_manager.add_papers_batch(papers_data)
-            imported_count = len(added_ids)
-            logger.info(f"成功从CSV导入 {imported_count} 篇新论文")
-        else:
-            logger.info(f"没有新论文需要导入，{duplicates_count}篇论文已在数据库中")
-            imported_count = 0
+    elif chart_type == 'parameter':
+        # 按参数名称统计
+        data = list(stats['common_parameters'].items())
         
-        return imported_count
+        labels = [item[0] for item in data]
+        values = [item[1] for item in data]
+        
+        return jsonify({
+            'labels': labels,
+            'values': values,
+            'title': '最常见的10个参数'
+        })
     
-    except Exception as e:
-        logger.error(f"从CSV导入论文失败: {str(e)}")
-        return 0
+    return jsonify({'error': '无效的图表类型'})
 
 @app.route('/view_pdf/<int:paper_id>')
 def view_pdf(paper_id):
@@ -1111,17 +840,14 @@ def cancel_extraction(paper_id):
                 record.message = "用户手动取消提取"
                 record.updated_at = datetime.datetime.utcnow()
             
+            record_ids = [record.id for record in pending_records]
+            
             # 提交更改
             session.commit()
         
-        # 清除可能的时间戳问题
-        # 运行修复脚本
-        import subprocess
-        try:
-            fix_script = os.path.join(app.root_path, "..", "fix_pending_records.py")
-            subprocess.call(["python", fix_script], timeout=10)
-        except:
-            pass
+        # 取消对应的后台任务（执行中的任务会在下次心跳时停止，不会保存结果）
+        for record_id in record_ids:
+            job_queue.cancel(record_id=record_id)
         
         flash("已成功取消提取任务", "success")
         return redirect(url_for('paper_detail', paper_id=paper_id))
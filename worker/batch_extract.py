@@ -0,0 +1,377 @@
+"""
+批量参数提取
+
+对所有未处理（processed=False）的论文提取参数并写入数据库。PDF文本提取、提示构建、LLM调用和
+数据库写入作为流水线的四个阶段并行执行，阶段之间通过有界队列连接：LLM请求等待响应时，
+下一批论文的PDF已经在解析，写入也不会阻塞API调用
+
+参数写入数据库时论文会被标记为已处理，因此中断后重新运行会从未完成的论文继续。重试也不会成功的论文
+（没有PDF文件、PDF无法解析或响应中没有参数）记录为不再重试的失败，之后的运行跳过这些论文；
+LLM调用和数据库写入等临时错误在下次运行时重试
+
+用法:
+    python worker/batch_extract.py --limit 100 --llm-workers 8
+"""
+
+import os
+import sys
+import time
+import queue
+import signal
+import logging
+import argparse
+import threading
+
+# 添加父目录到路径，以便导入其他模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+from pdf_processor.pdf_extractor import extract_text_from_pdf, PDFExtractionError
+from database.db_utils import PERMANENT_FAILURE_PREFIX
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# 队列结束标记
+_DONE = object()
+
+
+class _Stage:
+    """
+    流水线的一个阶段：若干线程从输入队列取出条目处理后放入输出队列
+
+    上游结束时向输入队列为每个线程放入一个结束标记；本阶段最后一个线程退出时，
+    再为下游的每个线程放入结束标记
+    """
+
+    def __init__(self, name, func, in_queue, out_queue, workers, stop_event):
+        self.name = name
+        self.func = func
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.workers = workers
+        self.stop_event = stop_event
+        self.downstream_workers = 1
+        self._running = workers
+        self._lock = threading.Lock()
+        self.threads = [
+            threading.Thread(target=self._run, name=f"batch-{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+
+    def _run(self):
+        while True:
+            item = self.in_queue.get()
+            if item is _DONE:
+                break
+
+            # 已失败的条目和停止后的条目直接交给写入阶段记录
+            if item.get('error') is None and not self.stop_event.is_set():
+                try:
+                    self.func(item)
+                except Exception as e:
+                    logger.error(f"[批量提取] 论文 {item['paper']['id']} 在{self.name}阶段失败: {str(e)}")
+                    item['error'] = f"{self.name}失败: {str(e)}"
+
+            self.out_queue.put(item)
+
+        with self._lock:
+            self._running -= 1
+            last = self._running == 0
+        if last:
+            for _ in range(self.downstream_workers):
+                self.out_queue.put(_DONE)
+
+
+class BatchExtractionPipeline:
+    """
+    批量参数提取流水线
+    """
+
+    def __init__(self, db_manager, llm_processor, pdf_workers=None, llm_workers=None, queue_size=None,
+                 write_batch_size=20, report_interval=30):
+        """
+        初始化流水线
+
+        参数:
+            db_manager (DatabaseManager): 数据库管理器
+            llm_processor (LLMProcessor): LLM处理器
+            pdf_workers (int, optional): PDF文本提取线程数，默认读取环境变量BATCH_PDF_WORKERS，未设置时为2
+            llm_workers (int, optional): 同时进行的LLM请求数，默认使用LLM处理器的max_concurrency
+            queue_size (int, optional): 阶段之间队列的容量，默认读取BATCH_QUEUE_SIZE，未设置时为LLM请求数的两倍
+            write_batch_size (int): 每次写入数据库的最大论文数
+            report_interval (float): 进度报告间隔（秒）
+        """
+        self.db_manager = db_manager
+        self.llm_processor = llm_processor
+        self.pdf_workers = max(1, pdf_workers or int(os.environ.get('BATCH_PDF_WORKERS', 2)))
+        self.llm_workers = max(1, llm_workers or llm_processor.max_concurrency)
+        self.queue_size = max(1, queue_size or int(os.environ.get('BATCH_QUEUE_SIZE', 0)) or self.llm_workers * 2)
+        self.write_batch_size = max(1, write_batch_size)
+        self.report_interval = report_interval
+
+    def run(self, limit=None, should_stop=None, on_progress=None):
+        """
+        运行流水线，直到所有未处理的论文（不包括不再重试的论文）都处理完成、达到数量上限或收到停止信号
+
+        参数:
+            limit (int, optional): 本次最多处理的论文数
+            should_stop (callable, optional): 返回True时停止：正在进行的PDF解析和LLM请求完成后写入结果，
+                其余论文保持未处理状态
+            on_progress (callable, optional): 定期调用，参数为当前统计信息
+
+        返回:
+            dict: 统计信息
+        """
+        stop_event = threading.Event()
+        paper_queue = queue.Queue(self.queue_size)
+        text_queue = queue.Queue(self.queue_size)
+        prompt_queue = queue.Queue(self.queue_size)
+        result_queue = queue.Queue(self.queue_size)
+
+        stages = [
+            _Stage("PDF文本提取", self._extract_text, paper_queue, text_queue, self.pdf_workers, stop_event),
+            _Stage("提示构建", self._build_prompt, text_queue, prompt_queue, 1, stop_event),
+            _Stage("LLM调用", self._call_llm, prompt_queue, result_queue, self.llm_workers, stop_event),
+        ]
+        for stage, downstream in zip(stages, stages[1:]):
+            stage.downstream_workers = downstream.workers
+
+        stats = {
+            'total': self.db_manager.count_unprocessed_papers(skip_permanent_failures=True),
+            'queued': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'parameters': 0,
+            'tokens': 0,
+            'elapsed': 0.0,
+            'papers_per_minute': 0.0,
+            'tokens_per_minute': 0.0,
+            'stopped': False,
+        }
+        if limit:
+            stats['total'] = min(stats['total'], limit)
+
+        start_time = time.time()
+        start_tokens = self.llm_processor.get_token_usage()['total_tokens']
+        logger.info(f"[批量提取] 开始处理 {stats['total']} 篇未处理的论文，"
+                    f"PDF线程: {self.pdf_workers}，LLM并发: {self.llm_workers}")
+
+        def check_stop():
+            if not stop_event.is_set() and should_stop and should_stop():
+                logger.info("[批量提取] 收到停止信号，等待处理中的论文完成")
+                stop_event.set()
+                stats['stopped'] = True
+            return stop_event.is_set()
+
+        feeder = threading.Thread(
+            target=self._feed, args=(paper_queue, self.pdf_workers, limit, stats, check_stop),
+            name="batch-feeder", daemon=True
+        )
+        feeder.start()
+        for stage in stages:
+            stage.start()
+
+        # 写入阶段在当前线程执行，同时负责进度报告
+        pending = []
+        last_flush = time.time()
+        last_report = time.time()
+
+        def update_stats():
+            elapsed = time.time() - start_time
+            stats['elapsed'] = round(elapsed, 1)
+            stats['tokens'] = self.llm_processor.get_token_usage()['total_tokens'] - start_tokens
+            minutes = elapsed / 60 if elapsed > 0 else 0
+            stats['papers_per_minute'] = round(stats['succeeded'] / minutes, 2) if minutes else 0.0
+            stats['tokens_per_minute'] = round(stats['tokens'] / minutes, 1) if minutes else 0.0
+
+        while True:
+            try:
+                item = result_queue.get(timeout=1)
+            except queue.Empty:
+                item = None
+
+            if item is _DONE:
+                break
+            if item is not None:
+                pending.append(item)
+
+            check_stop()
+
+            if pending and (len(pending) >= self.write_batch_size or item is None or time.time() - last_flush >= 5):
+                self._write(pending, stats)
+                pending = []
+                last_flush = time.time()
+
+            if time.time() - last_report >= self.report_interval:
+                update_stats()
+                self._report(stats)
+                if on_progress:
+                    on_progress(dict(stats))
+                last_report = time.time()
+
+        if pending:
+            self._write(pending, stats)
+
+        feeder.join()
+        update_stats()
+        self._report(stats)
+        if on_progress:
+            on_progress(dict(stats))
+
+        logger.info(f"[批量提取] 完成: 成功 {stats['succeeded']} 篇，失败 {stats['failed']} 篇，"
+                    f"共 {stats['parameters']} 个参数，耗时 {stats['elapsed']} 秒")
+        return stats
+
+    def _feed(self, paper_queue, downstream_workers, limit, stats, check_stop):
+        """按id顺序读取未处理的论文放入队列（有界队列满时阻塞，读取速度与处理速度一致）"""
+        after_id = 0
+        try:
+            while not check_stop():
+                batch_size = self.queue_size
+                if limit:
+                    batch_size = min(batch_size, limit - stats['queued'])
+                    if batch_size <= 0:
+                        break
+
+                papers = self.db_manager.get_unprocessed_papers(
+                    after_id=after_id, limit=batch_size, skip_permanent_failures=True
+                )
+                if not papers:
+                    break
+
+                for paper in papers:
+                    paper_queue.put({'paper': paper, 'error': None})
+                    stats['queued'] += 1
+                after_id = papers[-1]['id']
+        except Exception as e:
+            logger.error(f"[批量提取] 读取未处理论文失败: {str(e)}")
+        finally:
+            for _ in range(downstream_workers):
+                paper_queue.put(_DONE)
+
+    @staticmethod
+    def _fail_permanently(item, message):
+        """记录重试也不会成功的失败，之后的运行跳过该论文"""
+        item['error'] = message
+        item['permanent'] = True
+
+    def _extract_text(self, item):
+        pdf_path = item['paper']['local_pdf_path']
+        if not pdf_path or not os.path.exists(pdf_path):
+            self._fail_permanently(item, "没有可用的PDF文件")
+            return
+
+        try:
+            text = extract_text_from_pdf(pdf_path, raise_errors=True)
+        except PDFExtractionError as e:
+            self._fail_permanently(item, f"从PDF提取文本失败（{e.reason}）: {str(e)}")
+            return
+        if not text:
+            self._fail_permanently(item, "从PDF提取文本失败: 未提取到文本")
+            return
+        item['text'] = text
+
+    def _build_prompt(self, item):
+        from worker.tasks import infer_topic
+
+        paper = item['paper']
+        paper_info = {
+            "title": paper['title'],
+            "authors": paper['authors'].split(', ') if paper['authors'] else [],
+            "categories": paper['categories'].split(', ') if paper['categories'] else []
+        }
+        topic = infer_topic(paper_info['categories'])
+
+        item['paper_info'] = paper_info
+        item['topic'] = topic
+        item['prompt'] = self.llm_processor.build_prompt(item.pop('text'), paper_info, topic)
+
+    def _call_llm(self, item):
+        # API调用失败时抛出异常，由_Stage记录为可以重试的失败
+        parameters = self.llm_processor.extract_parameters_from_prompt(
+            item.pop('prompt'), item['paper_info'], item['topic'], raise_errors=True
+        )
+        if not parameters:
+            self._fail_permanently(item, "未能提取到任何参数")
+            return
+        item['parameters'] = parameters
+
+    def _write(self, items, stats):
+        """
+        批量写入提取结果；失败的论文记录失败原因并保持未处理状态，临时错误在下次运行时重试，
+        不再重试的失败在处理记录的消息前加上PERMANENT_FAILURE_PREFIX
+        """
+        succeeded = {item['paper']['id']: item['parameters'] for item in items
+                     if item.get('error') is None and 'parameters' in item}
+
+        if succeeded:
+            try:
+                added_counts = self.db_manager.add_parameters_bulk(succeeded)
+                stats['succeeded'] += len(added_counts)
+                stats['parameters'] += sum(added_counts.values())
+            except Exception as e:
+                logger.error(f"[批量提取] 写入参数失败: {str(e)}")
+                for item in items:
+                    if item['paper']['id'] in succeeded:
+                        item['error'] = f"写入数据库失败: {str(e)}"
+
+        # 停止后跳过的论文没有结果也没有错误，不记录失败
+        for item in items:
+            if item.get('error') is None:
+                continue
+
+            stats['failed'] += 1
+            message = PERMANENT_FAILURE_PREFIX + item['error'] if item.get('permanent') else item['error']
+            try:
+                self.db_manager.add_processing_record(
+                    item['paper']['id'], "parameter_extraction", "failed", message
+                )
+            except Exception as e:
+                logger.error(f"[批量提取] 记录论文 {item['paper']['id']} 的失败原因失败: {str(e)}")
+
+    def _report(self, stats):
+        logger.info(
+            f"[批量提取] 进度: {stats['succeeded'] + stats['failed']}/{stats['total']}，"
+            f"成功 {stats['succeeded']}，失败 {stats['failed']}，"
+            f"{stats['papers_per_minute']} 篇/分钟，{stats['tokens_per_minute']} tokens/分钟"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量提取所有未处理论文的参数')
+    parser.add_argument('--limit', type=int, help='本次最多处理的论文数')
+    parser.add_argument('--pdf-workers', type=int, help='PDF文本提取线程数')
+    parser.add_argument('--llm-workers', type=int, help='同时进行的LLM请求数')
+    parser.add_argument('--queue-size', type=int, help='阶段之间队列的容量')
+    parser.add_argument('--report-interval', type=float, default=30, help='进度报告间隔（秒）')
+    args = parser.parse_args()
+
+    load_dotenv()
+
+    from database.db_utils import DatabaseManager
+    from worker.tasks import get_llm_processor
+
+    pipeline = BatchExtractionPipeline(
+        DatabaseManager(), get_llm_processor(),
+        pdf_workers=args.pdf_workers, llm_workers=args.llm_workers, queue_size=args.queue_size,
+        report_interval=args.report_interval
+    )
+
+    # Ctrl+C后不再读取新论文，处理中的论文完成后退出
+    interrupted = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: interrupted.set())
+
+    stats = pipeline.run(limit=args.limit, should_stop=interrupted.is_set)
+    print(f"成功: {stats['succeeded']} 篇，失败: {stats['failed']} 篇，参数: {stats['parameters']} 个")
+    print(f"吞吐量: {stats['papers_per_minute']} 篇/分钟，{stats['tokens_per_minute']} tokens/分钟")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+后台任务worker
+
+启动若干个worker进程从数据库任务队列中领取并执行任务（参数提取、批量提取、论文爬取、论文导入），
+主进程定期将租约过期的任务重新排队、清理中断的处理记录，并重启意外退出的worker进程
+
+用法:
+    python worker/run_worker.py --concurrency 4
+"""
+
+import os
+import sys
+import time
+import signal
+import socket
+import logging
+import argparse
+import threading
+import multiprocessing
+
+# 添加父目录到路径，以便导入其他模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+from database.db_utils import DatabaseManager
+from database.job_queue import JobQueue, JobCancelled
+from worker.tasks import TASK_HANDLERS, TaskFailed
+
+# 加载环境变量
+load_dotenv()
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class JobContext:
+    """
+    传给任务处理函数的上下文
+    """
+
+    def __init__(self, queue, db_manager, job, worker_id, cancelled):
+        self.queue = queue
+        self.db_manager = db_manager
+        self.job = job
+        self.worker_id = worker_id
+        self._cancelled = cancelled
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def check_cancelled(self):
+        """任务已被取消或租约已失效时抛出JobCancelled"""
+        if self._cancelled.is_set():
+            raise JobCancelled(f"任务 {self.job['id']} 已被取消")
+
+    def report_progress(self, progress):
+        """保存任务的中间进度（完成后会被最终结果覆盖）"""
+        try:
+            self.queue.update_progress(self.job['id'], self.worker_id, progress)
+        except Exception as e:
+            logger.warning(f"[worker] 保存任务 {self.job['id']} 的进度失败: {str(e)}")
+
+
+def _heartbeat_loop(queue, job_id, worker_id, cancelled, stop, interval):
+    """定期续约，续约失败（任务被取消或被其他worker接管）时设置取消标记"""
+    while not stop.wait(interval):
+        try:
+            if not queue.heartbeat(job_id, worker_id):
+                logger.warning(f"[worker] 任务 {job_id} 的租约已失效，停止执行")
+                cancelled.set()
+                return
+        except Exception as e:
+            logger.warning(f"[worker] 任务 {job_id} 续约失败: {str(e)}")
+
+
+def run_job(queue, db_manager, job, worker_id):
+    """
+    执行一个已领取的任务
+
+    参数:
+        queue (JobQueue): 任务队列
+        db_manager (DatabaseManager): 数据库管理器
+        job (dict): 任务信息
+        worker_id (str): worker标识
+    """
+    handler = TASK_HANDLERS.get(job['job_type'])
+    if handler is None:
+        queue.fail(job['id'], worker_id, f"未知的任务类型: {job['job_type']}", retry=False)
+        return
+
+    cancelled = threading.Event()
+    stop = threading.Event()
+    heartbeat = threading.Thread(
+        target=_heartbeat_loop,
+        args=(queue, job['id'], worker_id, cancelled, stop, max(1.0, queue.lease_seconds / 3)),
+        daemon=True
+    )
+    heartbeat.start()
+
+    start_time = time.time()
+    logger.info(f"[worker] 开始执行任务 {job['id']}: {job['job_type']}")
+
+    try:
+        result = handler(JobContext(queue, db_manager, job, worker_id, cancelled), job['payload'])
+        if queue.complete(job['id'], worker_id, result):
+            logger.info(f"[worker] 任务 {job['id']} 完成，耗时 {time.time() - start_time:.1f} 秒")
+        else:
+            logger.warning(f"[worker] 任务 {job['id']} 已完成，但租约已失效，结果未记录")
+    except JobCancelled as e:
+        logger.info(f"[worker] {str(e)}")
+    except TaskFailed as e:
+        queue.fail(job['id'], worker_id, str(e), retry=False)
+    except Exception as e:
+        logger.exception(f"[worker] 任务 {job['id']} 执行异常: {str(e)}")
+        queue.fail(job['id'], worker_id, str(e))
+    finally:
+        stop.set()
+        heartbeat.join()
+
+
+def worker_loop(job_types, poll_interval, stop_event):
+    """
+    worker进程主循环：领取任务并执行，直到收到停止信号
+
+    参数:
+        job_types (list): 只处理这些类型的任务，None表示全部
+        poll_interval (float): 队列为空时的轮询间隔（秒）
+        stop_event (multiprocessing.Event): 停止信号
+    """
+    # 停止信号由主进程统一处理，当前任务执行完后退出；主进程超时强制结束时使用默认的SIGTERM行为
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    db_manager = DatabaseManager()
+    queue = JobQueue(db_manager)
+
+    logger.info(f"[worker] {worker_id} 已启动")
+
+    while not stop_event.is_set():
+        try:
+            job = queue.claim(worker_id, job_types)
+        except Exception as e:
+            logger.error(f"[worker] 领取任务失败: {str(e)}")
+            job = None
+
+        if job is None:
+            stop_event.wait(poll_interval)
+            continue
+
+        run_job(queue, db_manager, job, worker_id)
+
+    logger.info(f"[worker] {worker_id} 已退出")
+
+
+def _start_worker(job_types, poll_interval, stop_event):
+    process = multiprocessing.Process(
+        target=worker_loop, args=(job_types, poll_interval, stop_event), daemon=False
+    )
+    process.start()
+    return process
+
+
+def main():
+    parser = argparse.ArgumentParser(description='后台任务worker')
+    parser.add_argument('--concurrency', type=int, default=int(os.environ.get('WORKER_CONCURRENCY', 2)),
+                        help='worker进程数（默认读取环境变量WORKER_CONCURRENCY）')
+    parser.add_argument('--types', nargs='*', choices=sorted(TASK_HANDLERS.keys()),
+                        help='只处理指定类型的任务')
+    parser.add_argument('--poll-interval', type=float, default=float(os.environ.get('WORKER_POLL_INTERVAL', 2)),
+                        help='队列为空时的轮询间隔（秒）')
+    parser.add_argument('--reap-interval', type=float, default=30,
+                        help='检查租约过期任务的间隔（秒）')
+    parser.add_argument('--shutdown-timeout', type=float, default=60,
+                        help='停止时等待当前任务完成的最长时间（秒），超时后强制结束，任务会在租约过期后重新执行')
+    args = parser.parse_args()
+
+    # 每个worker进程有独立的限流器，配置的限额在worker进程间平分（子进程继承环境变量）
+    os.environ.setdefault('LLM_RATE_LIMIT_PROCESSES', str(max(1, args.concurrency)))
+
+    stop_event = multiprocessing.Event()
+
+    # 信号处理函数中只设置线程事件：在信号处理函数里调用multiprocessing.Event.set()，
+    # 而主线程正阻塞在同一个事件的wait()中时会死锁
+    shutdown = threading.Event()
+
+    def handle_signal(signum, frame):
+        logger.info("[worker] 收到停止信号，等待当前任务完成...")
+        shutdown.set()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    processes = [_start_worker(args.types, args.poll_interval, stop_event) for _ in range(args.concurrency)]
+    logger.info(f"[worker] 已启动 {len(processes)} 个worker进程")
+
+    # 主进程负责回收过期租约，不执行任务
+    queue = JobQueue(DatabaseManager())
+
+    while not shutdown.is_set():
+        try:
+            requeued, failed = queue.requeue_expired()
+            if requeued or failed:
+                logger.info(f"[worker] 租约过期: 重新排队 {requeued} 个任务，标记失败 {failed} 个任务")
+            queue.fail_orphaned_records()
+        except Exception as e:
+            logger.error(f"[worker] 回收过期任务失败: {str(e)}")
+
+        # 重启意外退出的worker进程
+        for i, process in enumerate(processes):
+            if not process.is_alive() and not shutdown.is_set():
+                logger.warning(f"[worker] worker进程 {process.pid} 已退出（退出码: {process.exitcode}），正在重启")
+                processes[i] = _start_worker(args.types, args.poll_interval, stop_event)
+
+        shutdown.wait(args.reap_interval)
+
+    stop_event.set()
+    deadline = time.time() + args.shutdown_timeout
+    for process in processes:
+        process.join(max(0, deadline - time.time()))
+        if process.is_alive():
+            logger.warning(f"[worker] worker进程 {process.pid} 未能按时退出，强制结束")
+            process.terminate()
+            process.join()
+
+    logger.info("[worker] 已停止")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,532 @@
+"""
+后台任务实现
+
+每个任务处理函数接收 (context, payload)：
+- context.db_manager: 当前worker进程的数据库管理器
+- context.job: 任务信息
+- context.check_cancelled(): 任务已被取消或租约失效时抛出JobCancelled
+- context.report_progress(progress): 保存任务的中间进度
+
+处理函数正常返回表示任务成功，返回值作为任务结果保存；抛出TaskFailed表示不需要重试的失败，
+其他异常会按任务的最大执行次数重试
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import subprocess
+from datetime import datetime
+
+import pandas as pd
+
+# 添加父目录到路径，以便导入其他模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_processor.pdf_extractor import extract_text_from_pdf, PDFExtractionError
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CRAWLER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'arxiv_crawler', 'arxiv_crawler_enhanced.py')
+
+
+class TaskFailed(Exception):
+    """任务失败且不需要重试（如PDF无法解析）"""
+    pass
+
+
+_llm_processor = None
+
+
+def get_llm_processor():
+    """
+    获取当前进程的LLM处理器（首次使用时创建）
+
+    返回:
+        LLMProcessor: LLM处理器
+    """
+    global _llm_processor
+
+    if _llm_processor is None:
+        from pdf_processor.llm_processor import LLMProcessor
+
+        try:
+            from config import DEEPSEEK_API_KEY
+        except ImportError:
+            DEEPSEEK_API_KEY = os.environ.get("DEEPSEEK_API_KEY")
+
+        _llm_processor = LLMProcessor(api_key=DEEPSEEK_API_KEY)
+
+    return _llm_processor
+
+
+# 主题推断结果的说明
+TOPIC_DESCRIPTIONS = {
+    'wakefield': '等离子体/尾场加速主题',
+    'laser system': '激光系统主题',
+    None: '通用激光物理主题',
+}
+
+
+def infer_topic(categories):
+    """
+    根据论文分类推断提示主题
+
+    参数:
+        categories (list): 论文分类列表
+
+    返回:
+        str: 主题名称，使用通用激光物理提示时返回None
+    """
+    if any('plasma' in cat.lower() for cat in categories):
+        return 'wakefield'
+    if any('optic' in cat.lower() for cat in categories):
+        return 'laser system'
+    return None
+
+
+def save_extraction_progress(db_manager, record_id, step, message, progress_pct=None, extra=None):
+    """
+    记录提取进度并更新处理记录
+
+    参数:
+        db_manager (DatabaseManager): 数据库管理器
+        record_id (int): 处理记录ID
+        step (str): 当前步骤
+        message (str): 进度信息
+        progress_pct (int, optional): 进度百分比
+        extra (dict, optional): 同时保存到处理记录中的其他字段
+    """
+    from database.models import ProcessingRecord
+
+    progress_info = {
+        "step": step,
+        "message": message,
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "progress_pct": progress_pct
+    }
+    with db_manager.get_session() as session:
+        record = session.query(ProcessingRecord).filter_by(id=record_id).first()
+        if record:
+            # 更新进度信息
+            try:
+                progress_data = json.loads(record.message) if record.message and record.message.startswith('{') else {}
+            except ValueError:
+                progress_data = {}
+
+            # 添加新进度信息
+            if "progress_log" not in progress_data:
+                progress_data["progress_log"] = []
+            progress_data["progress_log"].append(progress_info)
+            progress_data["current_step"] = step
+            progress_data["current_message"] = message
+            progress_data["progress_pct"] = progress_pct
+            progress_data.update(extra or {})
+
+            # 保存到数据库
+            record.message = json.dumps(progress_data)
+            session.commit()
+
+    # 记录到日志
+    logger.info(f"[提取进度] 记录ID: {record_id}, 步骤: {step}, 进度: {progress_pct}%, 信息: {message}")
+
+
+class StreamingParameterWriter:
+    """
+    流式提取时分批写入参数：每解析出一行参数就加入缓冲，攒够一批或超过时间间隔后写入数据库并更新进度
+
+    已写入参数的ID保存在处理记录中，任务失败、取消或worker中断后重新执行时可以删除这些参数
+    """
+
+    def __init__(self, context, paper_id, record_id, batch_size=10, flush_interval=2.0):
+        self.context = context
+        self.db_manager = context.db_manager
+        self.paper_id = paper_id
+        self.record_id = record_id
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.parameter_ids = []
+        self._buffer = []
+        self._last_flush = time.time()
+
+    def add(self, parameter):
+        self._buffer.append(parameter)
+        if len(self._buffer) >= self.batch_size or time.time() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """写入缓冲中的参数（任务已取消时抛出JobCancelled，不再写入）"""
+        self._last_flush = time.time()
+        if not self._buffer:
+            return
+
+        self.context.check_cancelled()
+        latest = self._buffer[-1]
+        self.parameter_ids.extend(self.db_manager.insert_parameters(self.paper_id, self._buffer))
+        self._buffer = []
+
+        save_extraction_progress(
+            self.db_manager, self.record_id, "parameter_streaming",
+            f"已保存 {len(self.parameter_ids)} 个参数，最新: {latest.get('parameter_name')} = "
+            f"{latest.get('value')} {latest.get('unit') or ''}".rstrip(),
+            75, extra={"partial_parameter_ids": self.parameter_ids}
+        )
+
+    def rollback(self):
+        """删除本次已写入的参数"""
+        self._buffer = []
+        if self.parameter_ids:
+            deleted = self.db_manager.delete_parameters(paper_id=self.paper_id, parameter_ids=self.parameter_ids)
+            logger.info(f"[流式写入] 已删除未完成提取写入的 {deleted} 个参数")
+            self.parameter_ids = []
+            save_extraction_progress(
+                self.db_manager, self.record_id, "parameter_rollback", f"已删除未完成提取写入的 {deleted} 个参数",
+                0, extra={"partial_parameter_ids": []}
+            )
+
+    @staticmethod
+    def discard_partial(db_manager, paper_id, record_id):
+        """删除上一次执行中断前写入的参数（任务重试时调用）"""
+        from database.models import ProcessingRecord
+
+        with db_manager.get_session() as session:
+            record = session.query(ProcessingRecord).filter_by(id=record_id).first()
+            message = record.message if record else None
+
+        try:
+            progress_data = json.loads(message) if message and message.startswith('{') else {}
+        except ValueError:
+            progress_data = {}
+
+        parameter_ids = progress_data.get("partial_parameter_ids")
+        if parameter_ids:
+            deleted = db_manager.delete_parameters(paper_id=paper_id, parameter_ids=parameter_ids)
+            logger.info(f"[流式写入] 已删除上次中断前写入的 {deleted} 个参数")
+
+
+def _fail_extraction(db_manager, record_id, step, message):
+    """记录提取失败并结束任务（不重试）"""
+    save_extraction_progress(db_manager, record_id, step, message, 0)
+    db_manager.update_processing_record(record_id, "failed", message)
+    raise TaskFailed(message)
+
+
+def run_parameter_extraction(context, payload):
+    """
+    参数提取任务
+
+    payload:
+        paper_id (int): 论文ID
+        pdf_path (str): PDF文件路径
+        record_id (int): 处理记录ID
+    """
+    db_manager = context.db_manager
+    paper_id = payload['paper_id']
+    pdf_path = payload['pdf_path']
+    record_id = payload['record_id']
+    writer = None
+
+    try:
+        logger.info(f"[提取任务启动] 论文ID: {paper_id}, 记录ID: {record_id}, 第 {context.job['attempts']} 次执行")
+        if context.job['attempts'] > 1:
+            StreamingParameterWriter.discard_partial(db_manager, paper_id, record_id)
+        save_extraction_progress(db_manager, record_id, "start", "开始提取任务", 0, extra={"partial_parameter_ids": []})
+
+        paper_data = db_manager.get_paper_by_id(paper_id)
+        if not paper_data:
+            logger.error(f"[提取任务失败] 无法找到论文 ID: {paper_id}")
+            _fail_extraction(db_manager, record_id, "error", f"无法找到论文 ID: {paper_id}")
+
+        # 提取PDF文本
+        logger.info(f"[PDF提取开始] 路径: {pdf_path}")
+        save_extraction_progress(db_manager, record_id, "pdf_extraction", "开始提取PDF文本", 10)
+
+        try:
+            text = extract_text_from_pdf(pdf_path, raise_errors=True)
+        except PDFExtractionError as e:
+            logger.error(f"[PDF提取失败] 路径: {pdf_path}, 原因: {e.reason}")
+            _fail_extraction(db_manager, record_id, "pdf_extraction_failed", f"从PDF提取文本失败（{e.reason}）: {str(e)}")
+
+        if not text:
+            logger.error(f"[PDF提取失败] 路径: {pdf_path}")
+            _fail_extraction(db_manager, record_id, "pdf_extraction_failed", "从PDF提取文本失败: 未提取到文本")
+
+        logger.info(f"[PDF提取成功] 提取文本长度: {len(text)} 字符")
+        save_extraction_progress(db_manager, record_id, "pdf_extraction_completed", f"成功提取文本，长度: {len(text)} 字符", 30)
+        context.check_cancelled()
+
+        # 构建论文信息
+        logger.info(f"[构建论文信息] 标题: {paper_data['title']}")
+        save_extraction_progress(db_manager, record_id, "build_paper_info", "构建论文元数据", 40)
+
+        paper_info = {
+            "title": paper_data['title'],
+            "authors": paper_data['authors'].split(', ') if paper_data['authors'] else [],
+            "categories": paper_data['categories'].split(', ') if paper_data['categories'] else []
+        }
+
+        # 推断主题
+        topic = None
+        if paper_data['categories']:
+            topic = infer_topic(paper_info['categories'])
+            message = f"识别为{TOPIC_DESCRIPTIONS[topic]}" if topic else f"使用{TOPIC_DESCRIPTIONS[None]}"
+            logger.info(f"[主题推断] {message}")
+            save_extraction_progress(db_manager, record_id, "topic_inference", message, 50)
+
+        # 提取参数
+        logger.info(f"[参数提取开始] 使用主题: {topic or '通用激光物理'}")
+        save_extraction_progress(db_manager, record_id, "parameter_extraction", f"开始参数提取，使用主题: {topic or '通用激光物理'}", 60)
+
+        # 记录LLM API调用
+        save_extraction_progress(db_manager, record_id, "llm_api_call", "正在调用DeepSeek API进行参数提取...", 70)
+
+        # 流式模式下参数边解析边写入数据库
+        llm_processor = get_llm_processor()
+        if llm_processor.streaming:
+            writer = StreamingParameterWriter(context, paper_id, record_id)
+
+        # API调用失败（包括流式响应中途中断）时抛出异常，交给任务队列重试；重试前删除已流式写入的参数
+        parameters = llm_processor.extract_parameters(
+            text, paper_info, topic, on_parameter=writer.add if writer else None, raise_errors=True
+        )
+
+        # 任务在LLM调用期间被取消时不保存结果（已流式写入的参数会被删除）
+        context.check_cancelled()
+
+        # API调用成功但响应中没有参数，重试通常得到相同的结果
+        if not parameters:
+            logger.warning(f"[参数提取失败] 未能提取到任何参数")
+            _fail_extraction(db_manager, record_id, "parameter_extraction_failed", "未能提取到任何参数")
+
+        logger.info(f"[参数提取成功] 提取到 {len(parameters)} 个参数")
+        save_extraction_progress(db_manager, record_id, "parameter_extraction_completed", f"成功提取 {len(parameters)} 个参数", 80)
+
+        # 保存参数到数据库
+        logger.info(f"[参数保存开始] 正在保存到数据库...")
+        save_extraction_progress(db_manager, record_id, "save_parameters", "正在保存参数到数据库", 90)
+
+        if writer:
+            writer.flush()
+            db_manager.update_paper(paper_id, {'processed': True})
+            added_count = len(writer.parameter_ids)
+        else:
+            added_count = db_manager.add_parameters(paper_id, parameters)
+        logger.info(f"[参数保存完成] 成功保存 {added_count} 个参数")
+        save_extraction_progress(db_manager, record_id, "save_parameters_completed", f"成功保存 {added_count} 个参数", 100)
+
+        # 更新处理记录
+        progress_data = {"completed": True, "parameters_count": added_count, "progress_pct": 100}
+        db_manager.update_processing_record(
+            record_id, "success", json.dumps(progress_data), added_count
+        )
+
+        logger.info(f"[提取任务完成] 论文ID: {paper_id}, 参数数量: {added_count}")
+        return {"parameters_count": added_count}
+
+    except TaskFailed:
+        if writer:
+            writer.rollback()
+        raise
+    except Exception as e:
+        if writer:
+            writer.rollback()
+        # 记录错误后交给任务队列决定是否重试，最终失败时处理记录会被标记为失败
+        logger.error(f"[提取任务异常] 错误信息: {str(e)}")
+        save_extraction_progress(db_manager, record_id, "error", f"发生错误: {str(e)}", 0)
+        raise
+
+
+def run_batch_extraction(context, payload):
+    """
+    批量参数提取任务：处理所有未处理的论文，任务取消后在处理中的论文完成后停止
+
+    payload:
+        limit (int, optional): 最多处理的论文数
+    """
+    from worker.batch_extract import BatchExtractionPipeline
+
+    pipeline = BatchExtractionPipeline(context.db_manager, get_llm_processor())
+    stats = pipeline.run(
+        limit=payload.get('limit'),
+        should_stop=lambda: context.cancelled,
+        on_progress=context.report_progress
+    )
+    context.check_cancelled()
+    return stats
+
+
+def _update_crawler_progress(progress_file, **fields):
+    """更新爬虫进度文件中的字段"""
+    if not os.path.exists(progress_file):
+        return
+
+    with open(progress_file, 'r', encoding='utf-8') as f:
+        progress_data = json.load(f)
+
+    progress_data.update(fields)
+    progress_data["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    with open(progress_file, 'w', encoding='utf-8') as f:
+        json.dump(progress_data, f, ensure_ascii=False, indent=2)
+
+
+def run_crawl(context, payload):
+    """
+    论文爬取任务：运行爬虫脚本，完成后将论文导入数据库
+
+    payload:
+        args (list): 爬虫命令行参数
+        output_dir (str): 输出目录
+    """
+    output_dir = payload['output_dir']
+    cmd = [sys.executable, CRAWLER_PATH] + list(payload.get('args', []))
+    progress_file = os.path.join(output_dir, "crawler_progress.json")
+
+    os.makedirs(output_dir, exist_ok=True)
+    _update_crawler_progress(progress_file, status="starting")
+
+    logger.info(f"运行爬虫: {' '.join(cmd)}")
+    process = subprocess.Popen(cmd)
+
+    # 等待爬虫结束，期间检查任务是否被取消
+    while True:
+        try:
+            returncode = process.wait(timeout=5)
+            break
+        except subprocess.TimeoutExpired:
+            try:
+                context.check_cancelled()
+            except Exception:
+                process.terminate()
+                raise
+
+    if returncode != 0:
+        message = f"爬虫运行失败，退出码: {returncode}"
+        logger.error(message)
+        _update_crawler_progress(progress_file, status="failed", error=message)
+        raise TaskFailed(message)
+
+    # 爬取完成后，将论文导入数据库
+    metadata_file = os.path.join(output_dir, 'papers_metadata.csv')
+    if not os.path.exists(metadata_file):
+        return {"imported_count": 0}
+
+    try:
+        imported_count = import_papers_from_csv(context.db_manager, metadata_file, output_dir)
+        logger.info(f"论文导入数据库完成，共导入 {imported_count} 篇")
+        _update_crawler_progress(progress_file, status="imported", imported_count=imported_count)
+    except Exception as e:
+        logger.error(f"导入论文到数据库失败: {str(e)}")
+        _update_crawler_progress(progress_file, status="import_failed", error=str(e))
+        raise TaskFailed(f"导入论文到数据库失败: {str(e)}")
+
+    return {"imported_count": imported_count}
+
+
+def run_import(context, payload):
+    """
+    论文导入任务
+
+    payload:
+        csv_file (str): 论文元数据CSV文件
+        pdf_dir (str): PDF目录
+    """
+    imported_count = import_papers_from_csv(context.db_manager, payload['csv_file'], payload['pdf_dir'])
+    return {"imported_count": imported_count}
+
+
+def import_papers_from_csv(db_manager, csv_file, pdf_dir):
+    """
+    从CSV文件导入论文到数据库
+
+    参数:
+        db_manager (DatabaseManager): 数据库管理器
+        csv_file (str): CSV文件路径
+        pdf_dir (str): PDF目录路径
+
+    返回:
+        int: 成功导入的论文数量
+    """
+    # 读取CSV
+    df = pd.read_csv(csv_file)
+
+    # 转换为字典列表
+    papers_data = []
+    duplicates_count = 0
+
+    # 第一阶段：一次性检查所有论文是否存在，避免导入过程中的时序问题
+    existing_arxiv_ids = set()
+    existing_dois = set()
+
+    # 收集所有可能存在的DOI和arXiv ID
+    doi_list = [row.get('doi', '') for _, row in df.iterrows() if row.get('doi')]
+    arxiv_id_list = [row.get('id', '') for _, row in df.iterrows() if row.get('id')]
+
+    # 使用批量查询获取已存在的论文ID
+    try:
+        existing_arxiv_ids, existing_dois = db_manager.find_existing_papers(
+            arxiv_ids=arxiv_id_list, dois=doi_list
+        )
+    except Exception as e:
+        logger.error(f"批量查重失败: {str(e)}")
+
+    # 第二阶段：准备需要导入的论文数据
+    for _, row in df.iterrows():
+        # 构建论文数据
+        paper_data = {
+            'id': row.get('id', ''),
+            'title': row.get('title', ''),
+            'authors': row.get('authors', '').split(', '),
+            'abstract': row.get('abstract', ''),
+            'categories': row.get('categories', '').split(', '),
+            'published': row.get('published', ''),
+            'updated': row.get('updated', ''),
+            'pdf_url': row.get('pdf_url', ''),
+            'doi': row.get('doi', '')  # 添加DOI支持
+        }
+
+        # 使用之前收集的集合快速检查是否存在
+        paper_exists = False
+        if paper_data['doi'] and paper_data['doi'] in existing_dois:
+            paper_exists = True
+        elif paper_data['id'] and paper_data['id'] in existing_arxiv_ids:
+            paper_exists = True
+
+        if paper_exists:
+            logger.info(f"论文已存在，跳过: {paper_data['id']}")
+            duplicates_count += 1
+            continue
+
+        # 查找本地PDF文件
+        arxiv_id = paper_data['id']
+        pdf_files = [f for f in os.listdir(pdf_dir)
+                     if f.lower().endswith('.pdf') and arxiv_id in f]
+
+        if pdf_files:
+            paper_data['local_path'] = os.path.join(pdf_dir, pdf_files[0])
+
+        papers_data.append(paper_data)
+
+    # 批量添加到数据库
+    if papers_data:
+        added_ids = db_manager.add_papers_batch(papers_data)
+        imported_count = len(added_ids)
+        logger.info(f"成功从CSV导入 {imported_count} 篇新论文")
+    else:
+        logger.info(f"没有新论文需要导入，{duplicates_count}篇论文已在数据库中")
+        imported_count = 0
+
+    return imported_count
+
+
+# 任务类型到处理函数的映射
+TASK_HANDLERS = {
+    'parameter_extraction': run_parameter_extraction,
+    'batch_extraction': run_batch_extraction,
+    'crawl': run_crawl,
+    'import': run_import,
+}